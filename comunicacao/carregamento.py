@@ -1,15 +1,20 @@
 # comunicacao/carregamento.py
 import logging
+from typing import TYPE_CHECKING
 import pandas as pd
 import numpy as np
-from sqlalchemy.engine import Engine
+from utils.instrumentacao import instrumentar
+
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Engine
 
 logger = logging.getLogger(__name__)
 
 # Define o tamanho de cada lote. 10,000 é um bom valor inicial.
 CHUNK_SIZE = 10000
 
-def carregar_dataframe_para_sql(df: pd.DataFrame, nome_tabela: str, engine: Engine) -> None:
+@instrumentar("carga_sql")
+def carregar_dataframe_para_sql(df: pd.DataFrame, nome_tabela: str, engine: "Engine") -> None:
     """
     Carrega um DataFrame para uma tabela SQL em lotes (chunks), com transações
     separadas para cada lote, evitando timeouts.
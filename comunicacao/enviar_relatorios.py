@@ -2,138 +2,76 @@
 import logging
 import sys
 import os
-import pandas as pd
 from pathlib import Path
-import win32com.client as win32
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options as ChromeOptions
-import time
 import argparse
+import importlib.util
 
 try:
-    from processamento.processamento_dados_base import obter_dados_processados
     from config.config import CONFIG
+    from config.logger_config import configurar_logger
+    from comunicacao.screenshots import capturar_screenshots
+    from comunicacao.gerentes import carregar_gerentes_do_csv
+    from comunicacao.manifesto_relatorios import carregar_manifesto_relatorios, caminho_absoluto
+    from comunicacao.transporte_email import MensagemEmail, criar_transporte, TRANSPORTES
+    from visualizacao.previa_estatica import renderizar_previas
+    from utils.instrumentacao import etapa, execucao_instrumentada
 except ImportError:
     logging.basicConfig(level=logging.INFO)
     logging.critical("Erro: Arquivos essenciais de 'processamento' ou 'config' não foram encontrados.")
     sys.exit(1)
 
-def carregar_gerentes_do_csv() -> dict:
-    caminho_csv = CONFIG.paths.gerentes_csv
-    if not caminho_csv.exists():
-        logger.error(f"Arquivo de gerentes não encontrado: {caminho_csv}")
-        return {}
-    try:
-        df_gerentes = pd.read_csv(caminho_csv, engine='python', encoding='utf-8-sig').fillna('')
-        df_gerentes.columns = df_gerentes.columns.str.strip()
-        gerentes_dict = {
-            str(row['unidade']).upper().strip(): {
-                'nome_novo': str(row['nome_novo']).strip(),
-                'gerente': str(row['gerente']).strip(),
-                'email': str(row['email']).strip(),
-                'tratamento': str(row['tratamento']).strip(),
-                'equipe_cc': str(row['equipe']).strip()
-            }
-            for _, row in df_gerentes.iterrows()
-        }
-        logger.info(f"{len(gerentes_dict)} gerentes carregados de '{caminho_csv.name}'.")
-        return gerentes_dict
-    except Exception as e:
-        logger.exception(f"Falha ao processar o arquivo CSV de gerentes: {e}")
-        return {}
-
 logger = logging.getLogger(__name__)
 
-def capturar_screenshot_relatorio(html_path: Path) -> Path | None:
-    if not html_path.exists():
-        logger.error(f"Arquivo HTML para screenshot não encontrado: {html_path}")
-        return None
-    screenshot_path = CONFIG.paths.docs_dir / f"temp_screenshot_{html_path.stem}.png"
-    options = ChromeOptions()
-    options.add_argument("--headless")
-    options.add_argument("--window-size=1280,1024")
-    options.add_argument("--hide-scrollbars")
-    try:
-        caminho_driver = CONFIG.paths.drivers / "chromedriver.exe"
-        if not caminho_driver.is_file():
-            logger.error(f"ERRO CRÍTICO: O driver do Chrome não foi encontrado em: {caminho_driver}")
-            return None
-        service = Service(executable_path=str(caminho_driver))
-        driver = webdriver.Chrome(service=service, options=options)
-        driver.get(f"file:///{html_path.resolve()}")
-        time.sleep(4)
-        driver.save_screenshot(str(screenshot_path))
-        driver.quit()
-        logger.info(f"Screenshot salvo com sucesso em: '{screenshot_path}'")
-        return screenshot_path
-    except Exception as e:
-        logger.error(f"Falha ao capturar screenshot para '{html_path.name}': {e}", exc_info=True)
-        return None
+# Content-ID da prévia do dashboard, referenciada no corpo do e-mail como 'cid:dashboard_preview'.
+CID_PREVIA = "dashboard_preview"
 
-def enviar_via_outlook(destinatario: str, cc: str, assunto: str, corpo_html: str, anexos: list[Path] | None = None):
-    try:
-        outlook = win32.Dispatch('outlook.application')
-        mail = outlook.CreateItem(0)
-        mail.To = destinatario
-        if cc:
-            mail.CC = cc
-        mail.Subject = assunto
-        if anexos:
-            for anexo_path in anexos:
-                if anexo_path and anexo_path.exists():
-                    attachment = mail.Attachments.Add(str(anexo_path.resolve()))
-                    if anexo_path.suffix.lower() == '.png':
-                        cid = "dashboard_preview"
-                        attachment.PropertyAccessor.SetProperty("http://schemas.microsoft.com/mapi/proptag/0x3712001F", cid)
-                        corpo_html = corpo_html.replace('cid:screenshot_placeholder', f'cid:{cid}')
-        mail.HTMLBody = corpo_html
-        mail.Display()
-        logger.info(f"E-mail para {destinatario} (CC: {cc or 'Nenhum'}) criado para revisão.")
-        return True
-    except Exception as e:
-        logger.exception(f"Falha ao criar e-mail no Outlook para {destinatario}.")
-        return False
+def gerar_previas(relatorios: dict[str, dict], modo: str = 'imagem', navegadores: int = 2, workers: int = 1) -> dict[str, Path | None]:
+    """
+    Gera de uma vez a prévia do corpo do e-mail de cada unidade (nome antigo -> PNG, ou None se falhou),
+    a partir das entradas do manifesto de relatórios.
 
-def preparar_e_enviar_email_por_unidade(unidade_antiga_nome: str, gerentes_info: dict, df_base_total: pd.DataFrame):
+    Modo 'imagem' (padrão): KPIs e tendência registrados pelo gerar_relatorio.py, desenhados sem navegador.
+    Modo 'navegador': captura do dashboard publicado em 'docs/' pelo pool de sessões do Chrome.
+    """
+    html_paths = {unidade: caminho_absoluto(relatorio['html']) for unidade, relatorio in relatorios.items()}
+    if modo == 'navegador':
+        capturas = capturar_screenshots([p for p in html_paths.values() if p.exists()], navegadores=navegadores)
+        return {unidade: capturas.get(html_path) for unidade, html_path in html_paths.items()}
+
+    destinos = {unidade: CONFIG.paths.docs_dir / f"temp_screenshot_{html_path.stem}.png" for unidade, html_path in html_paths.items()}
+    logger.info(f"Gerando {len(destinos)} prévia(s) estática(s) dos dashboards...")
+    geradas = renderizar_previas(
+        {destinos[unidade]: (relatorio['kpis'], relatorio['tendencia']) for unidade, relatorio in relatorios.items()},
+        workers=workers,
+    )
+    return {unidade: geradas.get(destino) for unidade, destino in destinos.items()}
+
+def montar_email_unidade(unidade_antiga_nome: str, gerentes_info: dict, relatorio: dict,
+                         screenshot_path: Path | None = None) -> MensagemEmail | None:
     info_gerente = gerentes_info[unidade_antiga_nome.upper()]
-    unidade_nova_nome = info_gerente['nome_novo']
+    unidade_nova_nome = relatorio['unidade_nova']
     
     logger.info(f"\n--- Preparando envio para a unidade: {unidade_nova_nome} (Dados de: {unidade_antiga_nome}) ---")
     
-    nome_arquivo_sanitizado = unidade_nova_nome.replace(' ', '_').replace('/', '_')
-    nome_arquivo_html = f"dashboard_{nome_arquivo_sanitizado}.html"
-    html_path = CONFIG.paths.docs_dir / nome_arquivo_html
+    html_path = caminho_absoluto(relatorio['html'])
+    excel_path = caminho_absoluto(relatorio.get('excel'))
+    nome_arquivo_html = html_path.name
     if not html_path.exists():
         logger.warning(f"Relatório '{nome_arquivo_html}' não encontrado. Verifique se 'gerar_relatorio.py' foi executado.")
-        return
+        return None
 
     dashboard_url = f"{os.getenv('GITHUB_PAGES_URL', 'https://ufcsebrae.github.io/PlanNatureza/')}{nome_arquivo_html}"
     
-    df_unidade = df_base_total[df_base_total['UNIDADE_FINAL'] == unidade_antiga_nome].copy()
-    if df_unidade.empty:
-        logger.warning(f"Sem dados para a unidade '{unidade_antiga_nome}'. Pulando.")
-        return
-
-    excel_filename = f"dados_analiticos_{nome_arquivo_sanitizado}.xlsx"
-    excel_path = CONFIG.paths.relatorios_excel_dir / excel_filename 
-    logger.info(f"Gerando arquivo Excel em '{excel_path}'...")
-    try:
-        df_para_excel = df_unidade.drop(columns=['Descricao_Natureza_Orcamentaria'], errors='ignore')
-        df_para_excel.to_excel(excel_path, index=False, sheet_name="Dados_Detalhados")
-        logger.info(f"Arquivo Excel '{excel_filename}' gerado na pasta 'docs/excel'.")
-    except Exception as e:
-        logger.error(f"Falha ao gerar arquivo Excel para '{unidade_nova_nome}': {e}")
-        return
+    if excel_path is None or not excel_path.exists():
+        logger.warning(f"Planilha analítica de '{unidade_nova_nome}' indisponível. Verifique se 'gerar_relatorio.py' foi executado.")
+        return None
 
-    screenshot_path = capturar_screenshot_relatorio(html_path)
-    
     if screenshot_path:
         screenshot_html_block = f'''
         <div style="margin-top: 25px; padding-top: 25px; border-top: 1px solid #e2e8f0;">
             <p style="margin: 0 0 15px 0; font-size: 14px; color: #475569; font-weight: 500;">Prévia do Painel Interativo:</p>
             <a href="{dashboard_url}" target="_blank" style="text-decoration: none;">
-                <img src="cid:screenshot_placeholder" alt="Prévia do Dashboard" style="width:100%; max-width:800px; border: 1px solid #e2e8f0; border-radius: 8px;">
+                <img src="cid:{CID_PREVIA}" alt="Prévia do Dashboard" style="width:100%; max-width:800px; border: 1px solid #e2e8f0; border-radius: 8px;">
             </a>
         </div>'''
     else:
@@ -198,47 +136,48 @@ def preparar_e_enviar_email_por_unidade(unidade_antiga_nome: str, gerentes_info:
     </html>
     """
 
-    try:
-        anexos_para_enviar = [excel_path]
-        if screenshot_path:
-            anexos_para_enviar.append(screenshot_path)
-            
-        enviar_via_outlook(
-            destinatario=info_gerente['email'],
-            cc=info_gerente['equipe_cc'],
-            assunto=assunto,
-            corpo_html=corpo_email,
-            anexos=anexos_para_enviar
-        )
-    finally:
-        if screenshot_path and screenshot_path.exists():
-            os.remove(screenshot_path)
-            logger.info(f"Screenshot temporário '{screenshot_path.name}' removido.")
+    return MensagemEmail(
+        destinatario=info_gerente['email'],
+        cc=info_gerente['equipe_cc'],
+        assunto=assunto,
+        corpo_html=corpo_email,
+        anexos=[excel_path],
+        imagens_inline={CID_PREVIA: screenshot_path} if screenshot_path else {},
+    )
 
 def main():
     parser = argparse.ArgumentParser(description="Envia relatórios de performance orçamentária por e-mail.")
     parser.add_argument("--enviar-todos", action="store_true", help="Envia e-mails para todas as unidades elegíveis sem interação manual.")
+    parser.add_argument("--previa", choices=("imagem", "navegador"), default=os.getenv("PREVIA_EMAIL", "imagem"),
+                        help="Prévia no corpo do e-mail: 'imagem' (KPIs e tendência, sem navegador) ou 'navegador' (captura do dashboard).")
+    parser.add_argument("--navegadores", type=int, default=int(os.getenv("SCREENSHOT_NAVEGADORES", 2)),
+                        help="Sessões do Chrome abertas em paralelo no modo --previa navegador (padrão: SCREENSHOT_NAVEGADORES ou 2).")
+    parser.add_argument("--workers", type=int, default=1, help="Processos para gerar as prévias estáticas em paralelo (padrão: 1).")
+    parser.add_argument("--transporte", choices=TRANSPORTES, default=os.getenv("TRANSPORTE_EMAIL", "outlook"),
+                        help="Como entregar os e-mails: 'outlook' (exibe para revisão), 'smtp' (envia) ou 'eml' (grava em caixa_saida/).")
     args = parser.parse_args()
-
-    logger.info("Carregando base de dados e arquivo de gerentes...")
-    df_base_total = obter_dados_processados()
+    # O pywin32 só é importado pelo transporte do Outlook; sem ele, falha antes de capturar as prévias.
+    if args.transporte == 'outlook' and importlib.util.find_spec("win32com") is None:
+        parser.error("o transporte 'outlook' exige Windows com o pywin32 instalado; use --transporte smtp ou --transporte eml.")
+    configurar_logger("envio_relatorios.log")
+
+    # Tudo vem do manifesto gravado pelo gerar_relatorio.py: o envio não consulta a base de dados.
+    logger.info("Carregando manifesto de relatórios e arquivo de gerentes...")
+    relatorios = carregar_manifesto_relatorios()
     gerentes_info = carregar_gerentes_do_csv()
 
-    if df_base_total is None or df_base_total.empty or not gerentes_info:
-        logger.error("Base de dados ou arquivo de gerentes não pôde ser carregado. Encerrando.")
+    if not relatorios or not gerentes_info:
+        logger.error("Manifesto de relatórios ou arquivo de gerentes não pôde ser carregado. Execute 'gerar_relatorio.py' antes. Encerrando.")
         sys.exit(1)
-        
-    CONFIG.paths.relatorios_excel_dir.mkdir(parents=True, exist_ok=True)
 
-    unidades_antigas_disponiveis = df_base_total['UNIDADE_FINAL'].unique()
     unidades_map = {
-        unidade_antiga.upper(): gerentes_info[unidade_antiga.upper()]
-        for unidade_antiga in unidades_antigas_disponiveis
+        unidade_antiga: gerentes_info[unidade_antiga.upper()]
+        for unidade_antiga in relatorios
         if unidade_antiga.upper() in gerentes_info
     }
 
     if not unidades_map:
-        logger.warning("Nenhuma unidade na base de dados corresponde a um gerente no arquivo. Encerrando.")
+        logger.warning("Nenhuma unidade do manifesto de relatórios corresponde a um gerente no arquivo. Encerrando.")
         sys.exit(0)
 
     lista_exibicao = sorted([(v['nome_novo'], k) for k, v in unidades_map.items()])
@@ -272,9 +211,26 @@ def main():
                 sys.exit(1)
 
     if unidades_a_processar:
-        logger.info(f"Iniciando processo de envio para: {', '.join([unidades_map[k.upper()]['nome_novo'] for k in unidades_a_processar])}")
-        for unidade_antiga in unidades_a_processar:
-            preparar_e_enviar_email_por_unidade(unidade_antiga, gerentes_info, df_base_total)
+        logger.info(f"Iniciando processo de envio para: {', '.join([unidades_map[k]['nome_novo'] for k in unidades_a_processar])}")
+        # A seleção interativa fica de fora: as métricas cobrem só prévias e envio.
+        with execucao_instrumentada("envio_relatorios"):
+            # Gera as prévias de todas as unidades selecionadas antes de montar os e-mails.
+            with etapa("previas"):
+                previas = gerar_previas({unidade: relatorios[unidade] for unidade in unidades_a_processar}, modo=args.previa,
+                                        navegadores=args.navegadores, workers=args.workers)
+            try:
+                mensagens = [
+                    mensagem for unidade_antiga in unidades_a_processar
+                    if (mensagem := montar_email_unidade(unidade_antiga, gerentes_info, relatorios[unidade_antiga],
+                                                         screenshot_path=previas.get(unidade_antiga))) is not None
+                ]
+                with etapa(f"envio_{args.transporte}"), criar_transporte(args.transporte) as transporte:
+                    resultados = transporte.enviar_varios(mensagens)
+                logger.info("%d de %d e-mail(s) entregues via '%s'.", sum(resultados), len(mensagens), transporte.nome)
+            finally:
+                for screenshot_path in previas.values():
+                    if screenshot_path and screenshot_path.exists():
+                        os.remove(screenshot_path)
     else:
         logger.info("Nenhuma unidade válida selecionada para envio.")
 
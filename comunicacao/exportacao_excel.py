@@ -0,0 +1,214 @@
+# comunicacao/exportacao_excel.py
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from config.config import CONFIG
+from processamento.base_mapeada import executar_por_unidade
+from processamento.particionamento import ParticaoUnidades
+from visualizacao.build_incremental import impressao_dados, sha256_arquivo, saida_atualizada
+
+logger = logging.getLogger(__name__)
+
+NOME_PLANILHA = "Dados_Detalhados"
+COLUNAS_EXCLUIDAS = ['Descricao_Natureza_Orcamentaria']
+LARGURA_MAXIMA_COLUNA = 50
+# Linhas usadas para estimar a largura das colunas de texto.
+AMOSTRA_LARGURA = 1000
+# Linhas convertidas e escritas por vez.
+LINHAS_POR_LOTE = 5000
+# Versão do manifesto das planilhas; mudar o formato das entradas descarta as planilhas registradas.
+VERSAO_MANIFESTO_EXCEL = 1
+
+
+def caminho_planilha(unidade_nova: str) -> Path:
+    nome_arquivo_sanitizado = unidade_nova.replace(' ', '_').replace('/', '_')
+    return CONFIG.paths.relatorios_excel_dir / f"dados_analiticos_{nome_arquivo_sanitizado}.xlsx"
+
+
+def impressao_planilha(df_unidade: pd.DataFrame) -> str:
+    """Impressão digital da planilha de uma unidade: os dados exportados e o código deste módulo."""
+    componentes = {'dados': impressao_dados(df_unidade), 'codigo': sha256_arquivo(Path(__file__))}
+    return hashlib.sha256(json.dumps(componentes, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def _tipo_coluna(serie: pd.Series) -> str:
+    """Tipo de célula da coluna: 'numero', 'inteiro', 'data', 'booleano' ou 'texto'."""
+    if pd.api.types.is_bool_dtype(serie):
+        return 'booleano'
+    if pd.api.types.is_numeric_dtype(serie):
+        return 'inteiro' if pd.api.types.is_integer_dtype(serie) else 'numero'
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return 'data'
+    return 'texto'
+
+
+def _converter_valores(serie: pd.Series, tipo: str) -> list:
+    """Valores de (um trecho de) uma coluna como tipos nativos do Python para o xlsxwriter, com nulos como None."""
+    if tipo == 'booleano':
+        return [None if pd.isna(v) else bool(v) for v in serie.tolist()]
+    if tipo in ('numero', 'inteiro'):
+        valores = serie.astype('float64').to_numpy()
+        return [None if v != v or v in (float('inf'), float('-inf')) else v for v in valores.tolist()]
+    if tipo == 'data':
+        if getattr(serie.dt, 'tz', None) is not None:
+            serie = serie.dt.tz_localize(None)
+        return [None if pd.isna(v) else v.to_pydatetime() for v in serie]
+    return [None if pd.isna(v) else str(v) for v in serie.tolist()]
+
+
+def escrever_planilha(df: pd.DataFrame, destino: Path) -> Path:
+    """
+    Grava o DataFrame em .xlsx com o xlsxwriter em modo de memória constante: cada linha vai
+    para o disco assim que é escrita, então o consumo não cresce com o tamanho da unidade.
+
+    Cada coluna é escrita com o tipo de célula do seu dtype (número, data, booleano ou texto),
+    com cabeçalho formatado, filtro e primeira linha congelada. A gravação é atômica.
+    """
+    import xlsxwriter
+
+    destino = Path(destino)
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    caminho_tmp = destino.with_name(destino.name + '.tmp')
+
+    workbook = xlsxwriter.Workbook(str(caminho_tmp), {'constant_memory': True, 'tmpdir': str(CONFIG.paths.cache_dir)})
+    worksheet = workbook.add_worksheet(NOME_PLANILHA)
+    formato_cabecalho = workbook.add_format({'bold': True, 'font_color': '#FFFFFF', 'bg_color': '#4F46E5', 'border': 1, 'text_wrap': True, 'valign': 'top'})
+    formatos = {
+        'numero': workbook.add_format({'num_format': '#,##0.00'}),
+        'inteiro': workbook.add_format({'num_format': '0'}),
+        'data': workbook.add_format({'num_format': 'dd/mm/yyyy'}),
+        'booleano': None,
+        'texto': None,
+    }
+    escritores = {
+        'numero': worksheet.write_number,
+        'inteiro': worksheet.write_number,
+        'data': worksheet.write_datetime,
+        'booleano': worksheet.write_boolean,
+        'texto': worksheet.write_string,
+    }
+
+    colunas = []
+    for c, nome in enumerate(df.columns):
+        tipo = _tipo_coluna(df[nome])
+        if tipo == 'texto':
+            amostra = _converter_valores(df[nome].iloc[:AMOSTRA_LARGURA], tipo)
+            largura = max((len(v) for v in amostra if v is not None), default=0)
+        else:
+            largura = 14
+        worksheet.set_column(c, c, min(max(largura, len(str(nome))) + 2, LARGURA_MAXIMA_COLUNA), formatos[tipo])
+        colunas.append((c, tipo, escritores[tipo], formatos[tipo]))
+
+    # Em memória constante as linhas precisam ser escritas em ordem: cabeçalho primeiro, depois linha a linha.
+    # Os valores são convertidos por lotes de linhas, para que só um lote exista como objetos Python por vez.
+    for c, nome in enumerate(df.columns):
+        worksheet.write_string(0, c, str(nome), formato_cabecalho)
+    for inicio in range(0, len(df), LINHAS_POR_LOTE):
+        lote = df.iloc[inicio:inicio + LINHAS_POR_LOTE]
+        valores_lote = [_converter_valores(lote.iloc[:, c], tipo) for c, tipo, _, _ in colunas]
+        for deslocamento, valores_linha in enumerate(zip(*valores_lote)):
+            linha = inicio + deslocamento + 1
+            for (c, _, escrever, formato), valor in zip(colunas, valores_linha):
+                if valor is not None:
+                    escrever(linha, c, valor, formato)
+
+    worksheet.freeze_panes(1, 0)
+    if len(df.columns):
+        worksheet.autofilter(0, 0, len(df), len(df.columns) - 1)
+    workbook.close()
+    os.replace(caminho_tmp, destino)
+    return destino
+
+
+def carregar_manifesto_excel(caminho: Path | None = None) -> dict[str, dict]:
+    """Lê o manifesto das planilhas exportadas (arquivo -> entrada). Manifesto ausente ou inválido equivale a vazio."""
+    caminho = caminho or CONFIG.paths.manifesto_excel
+    if not caminho.exists():
+        return {}
+    try:
+        dados = json.loads(caminho.read_text(encoding='utf-8'))
+    except (OSError, ValueError) as e:
+        logger.warning("Manifesto de planilhas '%s' ilegível (%s). Todas as planilhas serão geradas.", caminho.name, e)
+        return {}
+    if dados.get('versao') != VERSAO_MANIFESTO_EXCEL:
+        return {}
+    return dados.get('planilhas', {})
+
+
+def salvar_manifesto_excel(planilhas: dict[str, dict], caminho: Path | None = None) -> None:
+    caminho = caminho or CONFIG.paths.manifesto_excel
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    conteudo = json.dumps({'versao': VERSAO_MANIFESTO_EXCEL, 'planilhas': planilhas}, indent=2, sort_keys=True, ensure_ascii=False)
+    caminho_tmp = caminho.with_name(caminho.name + '.tmp')
+    caminho_tmp.write_text(conteudo, encoding='utf-8')
+    os.replace(caminho_tmp, caminho)
+    logger.info("Manifesto de planilhas salvo em '%s' (%d planilhas).", caminho, len(planilhas))
+
+
+def _dados_planilha(df_unidade: pd.DataFrame) -> pd.DataFrame:
+    return df_unidade.drop(columns=COLUNAS_EXCLUIDAS, errors='ignore')
+
+
+# --- Exportação em paralelo ---
+def _exportar_bloco(bloco: pd.DataFrame, destino: Path) -> Path:
+    return escrever_planilha(_dados_planilha(bloco), destino)
+
+
+def exportar_planilhas(destinos: dict[str, Path], particao_base: ParticaoUnidades, workers: int = 1,
+                       forcar: bool = False) -> dict[str, Path | None]:
+    """
+    Exporta a planilha analítica de cada unidade (nome antigo -> arquivo .xlsx), em série ou em um pool de processos.
+
+    Planilhas cuja impressão digital confere com o manifesto em 'docs/excel' (e cujo arquivo não foi
+    alterado) são reaproveitadas. Retorna nome antigo -> caminho da planilha, ou None se a unidade
+    não tem dados ou a exportação falhou.
+    """
+    manifesto = carregar_manifesto_excel()
+    resultado: dict[str, Path | None] = {}
+    pendentes: dict[str, tuple[Path, str]] = {}
+    reaproveitadas = 0
+    for unidade, destino in destinos.items():
+        df_unidade = particao_base.bloco(unidade)
+        if df_unidade.empty:
+            logger.warning(f"Sem dados para a unidade '{unidade}'. Planilha não gerada.")
+            resultado[unidade] = None
+            continue
+        impressao = impressao_planilha(_dados_planilha(df_unidade))
+        if not forcar and saida_atualizada(manifesto.get(destino.name), impressao, destino):
+            resultado[unidade] = destino
+            reaproveitadas += 1
+        else:
+            pendentes[unidade] = (destino, impressao)
+
+    logger.info("Planilhas analíticas: %d a gerar, %d inalteradas desde a última exportação.", len(pendentes), reaproveitadas)
+
+    def _registrar(unidade: str, caminho: Path | None, erro: Exception | None = None) -> None:
+        destino, impressao = pendentes[unidade]
+        if erro is not None:
+            logger.error(f"Falha ao gerar arquivo Excel para '{unidade}': {erro}")
+            manifesto.pop(destino.name, None)
+            resultado[unidade] = None
+            return
+        manifesto[destino.name] = {'arquivo': destino.name, 'impressao': impressao, 'sha256': sha256_arquivo(caminho)}
+        resultado[unidade] = caminho
+        logger.info(f"Arquivo Excel '{destino.name}' gerado na pasta '{destino.parent.name}'.")
+
+    if workers <= 1 or len(pendentes) <= 1:
+        for unidade, (destino, _) in pendentes.items():
+            try:
+                _registrar(unidade, escrever_planilha(_dados_planilha(particao_base.bloco(unidade)), destino))
+            except Exception as e:
+                _registrar(unidade, None, e)
+    elif pendentes:
+        tarefas = {unidade: (unidade, (destino,)) for unidade, (destino, _) in pendentes.items()}
+        for unidade, caminho, erro in executar_por_unidade(_exportar_bloco, particao_base, tarefas, workers):
+            _registrar(unidade, caminho, erro)
+
+    if pendentes:
+        salvar_manifesto_excel(manifesto)
+    return {unidade: resultado[unidade] for unidade in destinos}
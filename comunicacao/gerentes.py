@@ -0,0 +1,40 @@
+# comunicacao/gerentes.py
+import csv
+import logging
+
+from config.config import CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+def carregar_gerentes_do_csv() -> dict:
+    """
+    Lê 'gerentes.csv' (unidade -> nome novo, gerente, e-mail, tratamento e equipe em cópia).
+
+    Usa o módulo csv da biblioteca padrão: o envio dos e-mails não precisa do pandas.
+    """
+    caminho_csv = CONFIG.paths.gerentes_csv
+    if not caminho_csv.exists():
+        logger.error(f"Arquivo de gerentes não encontrado: {caminho_csv}")
+        return {}
+    try:
+        with open(caminho_csv, newline='', encoding='utf-8-sig') as arquivo:
+            linhas = [
+                {(chave or '').strip(): (valor or '') for chave, valor in linha.items()}
+                for linha in csv.DictReader(arquivo)
+            ]
+        gerentes_dict = {
+            str(row['unidade']).upper().strip(): {
+                'nome_novo': str(row['nome_novo']).strip(),
+                'gerente': str(row['gerente']).strip(),
+                'email': str(row['email']).strip(),
+                'tratamento': str(row['tratamento']).strip(),
+                'equipe_cc': str(row['equipe']).strip()
+            }
+            for row in linhas
+        }
+        logger.info(f"{len(gerentes_dict)} gerentes carregados de '{caminho_csv.name}'.")
+        return gerentes_dict
+    except Exception as e:
+        logger.exception(f"Falha ao processar o arquivo CSV de gerentes: {e}")
+        return {}
@@ -0,0 +1,56 @@
+# comunicacao/manifesto_relatorios.py
+import json
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+
+from config.config import CONFIG
+
+logger = logging.getLogger(__name__)
+
+VERSAO_MANIFESTO_RELATORIOS = 1
+
+
+def caminho_relativo(caminho: Path | None) -> str | None:
+    """Caminho relativo à raiz do projeto, no formato gravado no manifesto."""
+    if caminho is None:
+        return None
+    return Path(caminho).resolve().relative_to(CONFIG.paths.base_dir).as_posix()
+
+
+def caminho_absoluto(relativo: str | None) -> Path | None:
+    return None if relativo is None else CONFIG.paths.base_dir / relativo
+
+
+def carregar_manifesto_relatorios(caminho: Path | None = None) -> dict[str, dict]:
+    """
+    Lê o manifesto dos relatórios gerados (nome antigo da unidade -> artefatos).
+
+    Cada entrada traz o que o envio precisa, sem consultar a base: 'unidade_nova', 'html',
+    'impressao' (dos dados do dashboard), 'kpis', 'tendencia', 'excel' e 'gerado_em'.
+    Manifesto ausente ou de outra versão equivale a vazio.
+    """
+    caminho = caminho or CONFIG.paths.manifesto_relatorios
+    if not caminho.exists():
+        return {}
+    try:
+        dados = json.loads(caminho.read_text(encoding='utf-8'))
+    except (OSError, ValueError) as e:
+        logger.warning("Manifesto de relatórios '%s' ilegível (%s).", caminho.name, e)
+        return {}
+    if dados.get('versao') != VERSAO_MANIFESTO_RELATORIOS:
+        return {}
+    return dados.get('relatorios', {})
+
+
+def salvar_manifesto_relatorios(relatorios: dict[str, dict], caminho: Path | None = None) -> None:
+    caminho = caminho or CONFIG.paths.manifesto_relatorios
+    conteudo = json.dumps(
+        {'versao': VERSAO_MANIFESTO_RELATORIOS, 'execucao': datetime.now().isoformat(timespec='seconds'), 'relatorios': relatorios},
+        indent=2, sort_keys=True, ensure_ascii=False,
+    )
+    caminho_tmp = caminho.with_name(caminho.name + '.tmp')
+    caminho_tmp.write_text(conteudo, encoding='utf-8')
+    os.replace(caminho_tmp, caminho)
+    logger.info("Manifesto de relatórios salvo em '%s' (%d unidades).", caminho, len(relatorios))
@@ -0,0 +1,125 @@
+# comunicacao/screenshots.py
+import logging
+import os
+import queue
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from config.config import CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Tempo máximo de espera pelo sinal de renderização do dashboard (window.dashboardRenderizado).
+TIMEOUT_RENDERIZACAO_S = 30
+LARGURA_JANELA, ALTURA_JANELA = 1280, 1024
+
+
+def localizar_chromedriver() -> str | None:
+    """
+    Caminho do chromedriver: variável CHROMEDRIVER_PATH, depois 'drivers/' do projeto e o PATH.
+    None deixa o Selenium Manager localizar (ou baixar) um driver compatível com o Chrome instalado.
+    """
+    if caminho_env := os.getenv("CHROMEDRIVER_PATH"):
+        if Path(caminho_env).is_file():
+            return caminho_env
+        logger.warning("CHROMEDRIVER_PATH aponta para um arquivo inexistente: %s", caminho_env)
+    for nome in ("chromedriver.exe", "chromedriver"):
+        if (CONFIG.paths.drivers / nome).is_file():
+            return str(CONFIG.paths.drivers / nome)
+    return shutil.which("chromedriver")
+
+
+class PoolNavegadores:
+    """
+    Sessões de Chrome headless mantidas abertas entre unidades, para capturar os dashboards
+    sem pagar a inicialização do navegador a cada captura.
+
+    Cada captura espera o sinal `window.dashboardRenderizado` definido pelo template depois que
+    todos os gráficos foram desenhados, em vez de um tempo fixo. Use como gerenciador de contexto:
+
+        with PoolNavegadores(2) as pool:
+            capturas = pool.capturar_varios(caminhos_html)
+    """
+    def __init__(self, tamanho: int = 2, timeout: float = TIMEOUT_RENDERIZACAO_S):
+        self.tamanho = max(1, tamanho)
+        self.timeout = timeout
+        self._sessoes: queue.Queue = queue.Queue()
+        self._todas: list = []
+
+    def __enter__(self) -> "PoolNavegadores":
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options as ChromeOptions
+        from selenium.webdriver.chrome.service import Service
+
+        options = ChromeOptions()
+        options.add_argument("--headless=new")
+        options.add_argument(f"--window-size={LARGURA_JANELA},{ALTURA_JANELA}")
+        options.add_argument("--hide-scrollbars")
+        options.add_argument("--no-sandbox")
+        options.add_argument("--disable-dev-shm-usage")
+        # Permite que o dashboard aberto via file:// carregue os arquivos vizinhos (assets/, dados/).
+        options.add_argument("--allow-file-access-from-files")
+
+        caminho_driver = localizar_chromedriver()
+        logger.info("Abrindo %d sessão(ões) do Chrome (driver: %s)...", self.tamanho, caminho_driver or "Selenium Manager")
+        try:
+            for _ in range(self.tamanho):
+                driver = webdriver.Chrome(service=Service(executable_path=caminho_driver), options=options)
+                driver.set_page_load_timeout(self.timeout)
+                self._todas.append(driver)
+                self._sessoes.put(driver)
+        except Exception:
+            self.__exit__(None, None, None)
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        for driver in self._todas:
+            try:
+                driver.quit()
+            except Exception:
+                logger.debug("Falha ao encerrar sessão do Chrome.", exc_info=True)
+        self._todas.clear()
+
+    def capturar(self, html_path: Path, destino: Path | None = None) -> Path | None:
+        """Captura um dashboard assim que ele sinaliza que terminou de renderizar. Retorna None em caso de falha."""
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        html_path = Path(html_path)
+        if not html_path.exists():
+            logger.error(f"Arquivo HTML para screenshot não encontrado: {html_path}")
+            return None
+        destino = destino or CONFIG.paths.docs_dir / f"temp_screenshot_{html_path.stem}.png"
+
+        driver = self._sessoes.get()
+        try:
+            driver.get(html_path.resolve().as_uri())
+            WebDriverWait(driver, self.timeout).until(
+                lambda d: d.execute_script("return window.dashboardRenderizado === true")
+            )
+            driver.save_screenshot(str(destino))
+            logger.info(f"Screenshot salvo com sucesso em: '{destino}'")
+            return destino
+        except Exception as e:
+            logger.error(f"Falha ao capturar screenshot para '{html_path.name}': {e}", exc_info=True)
+            return None
+        finally:
+            self._sessoes.put(driver)
+
+    def capturar_varios(self, html_paths: list[Path]) -> dict[Path, Path | None]:
+        """Captura vários dashboards em paralelo, uma captura por sessão do pool."""
+        with ThreadPoolExecutor(max_workers=self.tamanho) as executor:
+            return dict(zip(html_paths, executor.map(self.capturar, html_paths)))
+
+
+def capturar_screenshots(html_paths: list[Path], navegadores: int = 2) -> dict[Path, Path | None]:
+    """Atalho: abre um pool, captura todos os dashboards e encerra as sessões."""
+    if not html_paths:
+        return {}
+    try:
+        with PoolNavegadores(min(navegadores, len(html_paths))) as pool:
+            return pool.capturar_varios(html_paths)
+    except Exception as e:
+        logger.error(f"Não foi possível iniciar o Chrome para as capturas: {e}", exc_info=True)
+        return {caminho: None for caminho in html_paths}
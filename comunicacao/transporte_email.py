@@ -0,0 +1,282 @@
+# comunicacao/transporte_email.py
+import logging
+import mimetypes
+import os
+import queue
+import re
+import smtplib
+import ssl
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from email.message import EmailMessage
+from email.utils import formatdate, make_msgid
+from pathlib import Path
+
+from config.config import CONFIG
+
+logger = logging.getLogger(__name__)
+
+TRANSPORTES = ('outlook', 'smtp', 'eml')
+# Propriedade MAPI que associa um anexo do Outlook ao 'cid:' usado no HTML.
+PROPRIEDADE_CONTENT_ID = "http://schemas.microsoft.com/mapi/proptag/0x3712001F"
+
+
+@dataclass
+class MensagemEmail:
+    """Um e-mail pronto para envio, independente do transporte."""
+    destinatario: str
+    assunto: str
+    corpo_html: str
+    cc: str = ""
+    anexos: list[Path] = field(default_factory=list)
+    # Imagens exibidas no corpo: content-id (usado como 'cid:<id>' no HTML) -> arquivo.
+    imagens_inline: dict[str, Path] = field(default_factory=dict)
+
+
+def _enderecos(texto: str) -> list[str]:
+    return [e.strip() for e in re.split(r'[;,]', texto or '') if e.strip()]
+
+
+def montar_mensagem_mime(mensagem: MensagemEmail, remetente: str) -> EmailMessage:
+    """Converte a mensagem em MIME: HTML com as imagens inline (multipart/related) e os anexos."""
+    msg = EmailMessage()
+    msg['From'] = remetente
+    msg['To'] = ", ".join(_enderecos(mensagem.destinatario))
+    if mensagem.cc:
+        msg['Cc'] = ", ".join(_enderecos(mensagem.cc))
+    msg['Subject'] = mensagem.assunto
+    msg['Date'] = formatdate(localtime=True)
+    msg['Message-ID'] = make_msgid()
+    msg.set_content("Este e-mail contém HTML. Abra-o em um cliente de e-mail compatível.")
+    msg.add_alternative(mensagem.corpo_html, subtype='html')
+
+    corpo_html = msg.get_payload()[-1]
+    for cid, caminho in mensagem.imagens_inline.items():
+        caminho = Path(caminho)
+        if not caminho.exists():
+            continue
+        tipo, subtipo = (mimetypes.guess_type(caminho.name)[0] or 'image/png').split('/', 1)
+        corpo_html.add_related(caminho.read_bytes(), maintype=tipo, subtype=subtipo, cid=f"<{cid}>", filename=caminho.name)
+
+    for caminho in mensagem.anexos:
+        caminho = Path(caminho)
+        if not caminho.exists():
+            logger.warning(f"Anexo não encontrado, ignorado: {caminho}")
+            continue
+        tipo, subtipo = (mimetypes.guess_type(caminho.name)[0] or 'application/octet-stream').split('/', 1)
+        msg.add_attachment(caminho.read_bytes(), maintype=tipo, subtype=subtipo, filename=caminho.name)
+    return msg
+
+
+class TransporteEmail(ABC):
+    """
+    Interface dos transportes de e-mail. Use como gerenciador de contexto, para que conexões
+    abertas sejam reaproveitadas entre as mensagens e fechadas ao final:
+
+        with criar_transporte() as transporte:
+            resultados = transporte.enviar_varios(mensagens)
+    """
+    nome = "base"
+
+    def __enter__(self) -> "TransporteEmail":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+    @abstractmethod
+    def enviar(self, mensagem: MensagemEmail) -> bool:
+        """Entrega uma mensagem. Retorna True se ela foi aceita pelo transporte."""
+
+    def enviar_varios(self, mensagens: list[MensagemEmail]) -> list[bool]:
+        """Envia as mensagens em ordem; transportes com várias conexões sobrescrevem para enviar em paralelo."""
+        return [self.enviar(mensagem) for mensagem in mensagens]
+
+
+class TransporteOutlook(TransporteEmail):
+    """Cria cada e-mail no Outlook (COM) e o exibe para revisão e envio manual. Exclusivo para Windows."""
+    nome = "outlook"
+
+    def __enter__(self) -> "TransporteOutlook":
+        import win32com.client as win32
+        self._outlook = win32.Dispatch('outlook.application')
+        return self
+
+    def enviar(self, mensagem: MensagemEmail) -> bool:
+        try:
+            mail = self._outlook.CreateItem(0)
+            mail.To = mensagem.destinatario
+            if mensagem.cc:
+                mail.CC = mensagem.cc
+            mail.Subject = mensagem.assunto
+            for anexo_path in mensagem.anexos:
+                if anexo_path and Path(anexo_path).exists():
+                    mail.Attachments.Add(str(Path(anexo_path).resolve()))
+            for cid, imagem_path in mensagem.imagens_inline.items():
+                if imagem_path and Path(imagem_path).exists():
+                    attachment = mail.Attachments.Add(str(Path(imagem_path).resolve()))
+                    attachment.PropertyAccessor.SetProperty(PROPRIEDADE_CONTENT_ID, cid)
+            mail.HTMLBody = mensagem.corpo_html
+            mail.Display()
+            logger.info(f"E-mail para {mensagem.destinatario} (CC: {mensagem.cc or 'Nenhum'}) criado para revisão.")
+            return True
+        except Exception:
+            logger.exception(f"Falha ao criar e-mail no Outlook para {mensagem.destinatario}.")
+            return False
+
+
+class TransporteArquivoEml(TransporteEmail):
+    """Grava cada e-mail como arquivo .eml em uma caixa de saída, para revisão antes do envio."""
+    nome = "eml"
+
+    def __init__(self, diretorio: Path | None = None, remetente: str | None = None):
+        self.diretorio = Path(diretorio or CONFIG.paths.caixa_saida_emails)
+        self.remetente = remetente or os.getenv("EMAIL_REMETENTE", "")
+
+    def enviar(self, mensagem: MensagemEmail) -> bool:
+        try:
+            self.diretorio.mkdir(parents=True, exist_ok=True)
+            nome = re.sub(r'[^\w.-]+', '_', f"{_enderecos(mensagem.destinatario)[0] if mensagem.destinatario else 'sem_destinatario'}_{mensagem.assunto}")[:150]
+            destino = self.diretorio / f"{nome}.eml"
+            destino.write_bytes(bytes(montar_mensagem_mime(mensagem, self.remetente)))
+            logger.info(f"E-mail para {mensagem.destinatario} gravado em '{destino}'.")
+            return True
+        except Exception:
+            logger.exception(f"Falha ao gravar o e-mail para {mensagem.destinatario}.")
+            return False
+
+
+class TransporteSMTP(TransporteEmail):
+    """
+    Envia por SMTP mantendo até `conexoes` conexões abertas e reaproveitadas entre as mensagens,
+    que são enviadas em paralelo, uma por conexão. `mensagens_por_minuto` limita a taxa total
+    de envio (0 = sem limite); uma conexão derrubada pelo servidor é reaberta uma vez.
+    """
+    nome = "smtp"
+
+    def __init__(self, host: str, porta: int = 587, usuario: str | None = None, senha: str | None = None,
+                 remetente: str | None = None, seguranca: str = "starttls", conexoes: int = 2,
+                 mensagens_por_minuto: float = 0, timeout: float = 60):
+        self.host = host
+        self.porta = porta
+        self.usuario = usuario
+        self.senha = senha
+        self.remetente = remetente or usuario or ""
+        self.seguranca = seguranca
+        self.conexoes = max(1, conexoes)
+        self.timeout = timeout
+        self._intervalo = 60.0 / mensagens_por_minuto if mensagens_por_minuto else 0.0
+        self._proximo_envio = 0.0
+        self._trava_taxa = threading.Lock()
+        self._livres: queue.Queue = queue.Queue()
+        self._abertas: list[smtplib.SMTP] = []
+        self._trava_conexoes = threading.Lock()
+
+    def _conectar(self) -> smtplib.SMTP:
+        if self.seguranca == "ssl":
+            smtp = smtplib.SMTP_SSL(self.host, self.porta, timeout=self.timeout, context=ssl.create_default_context())
+        else:
+            smtp = smtplib.SMTP(self.host, self.porta, timeout=self.timeout)
+            if self.seguranca == "starttls":
+                smtp.starttls(context=ssl.create_default_context())
+        if self.usuario:
+            smtp.login(self.usuario, self.senha or "")
+        return smtp
+
+    def _obter_conexao(self) -> smtplib.SMTP:
+        try:
+            return self._livres.get_nowait()
+        except queue.Empty:
+            pass
+        with self._trava_conexoes:
+            if len(self._abertas) < self.conexoes:
+                smtp = self._conectar()
+                self._abertas.append(smtp)
+                return smtp
+        return self._livres.get()
+
+    def _aguardar_taxa(self) -> None:
+        if not self._intervalo:
+            return
+        with self._trava_taxa:
+            agora = time.monotonic()
+            espera = self._proximo_envio - agora
+            self._proximo_envio = max(agora, self._proximo_envio) + self._intervalo
+        if espera > 0:
+            time.sleep(espera)
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        for smtp in self._abertas:
+            try:
+                smtp.quit()
+            except Exception:
+                logger.debug("Falha ao encerrar conexão SMTP.", exc_info=True)
+        self._abertas.clear()
+        self._livres = queue.Queue()
+
+    def enviar(self, mensagem: MensagemEmail) -> bool:
+        try:
+            msg = montar_mensagem_mime(mensagem, self.remetente)
+            destinatarios = _enderecos(mensagem.destinatario) + _enderecos(mensagem.cc)
+        except Exception:
+            logger.exception(f"Falha ao montar o e-mail para {mensagem.destinatario}.")
+            return False
+
+        self._aguardar_taxa()
+        smtp = None
+        try:
+            smtp = self._obter_conexao()
+            try:
+                smtp.send_message(msg, from_addr=self.remetente, to_addrs=destinatarios)
+            except smtplib.SMTPServerDisconnected:
+                logger.info("Conexão SMTP encerrada pelo servidor. Reconectando...")
+                with self._trava_conexoes:
+                    self._abertas.remove(smtp)
+                smtp = None
+                smtp = self._conectar()
+                with self._trava_conexoes:
+                    self._abertas.append(smtp)
+                smtp.send_message(msg, from_addr=self.remetente, to_addrs=destinatarios)
+            logger.info(f"E-mail enviado por SMTP para {mensagem.destinatario} (CC: {mensagem.cc or 'Nenhum'}).")
+            return True
+        except Exception:
+            logger.exception(f"Falha ao enviar e-mail por SMTP para {mensagem.destinatario}.")
+            return False
+        finally:
+            if smtp is not None:
+                self._livres.put(smtp)
+
+    def enviar_varios(self, mensagens: list[MensagemEmail]) -> list[bool]:
+        if self.conexoes <= 1 or len(mensagens) <= 1:
+            return super().enviar_varios(mensagens)
+        with ThreadPoolExecutor(max_workers=self.conexoes) as executor:
+            return list(executor.map(self.enviar, mensagens))
+
+
+def criar_transporte(nome: str | None = None) -> TransporteEmail:
+    """Cria o transporte escolhido (ou o de TRANSPORTE_EMAIL), configurado pelas variáveis de ambiente."""
+    nome = (nome or os.getenv("TRANSPORTE_EMAIL", "outlook")).strip().lower()
+    if nome == 'outlook':
+        return TransporteOutlook()
+    if nome == 'eml':
+        return TransporteArquivoEml()
+    if nome == 'smtp':
+        host = os.getenv("SMTP_HOST")
+        if not host:
+            raise ValueError("TRANSPORTE_EMAIL=smtp requer a variável SMTP_HOST no .env.")
+        if not (os.getenv("EMAIL_REMETENTE") or os.getenv("SMTP_USUARIO")):
+            raise ValueError("TRANSPORTE_EMAIL=smtp requer EMAIL_REMETENTE (ou SMTP_USUARIO) no .env para o campo 'From'.")
+        return TransporteSMTP(
+            host=host,
+            porta=int(os.getenv("SMTP_PORTA", 587)),
+            usuario=os.getenv("SMTP_USUARIO") or None,
+            senha=os.getenv("SMTP_SENHA") or None,
+            remetente=os.getenv("EMAIL_REMETENTE") or None,
+            seguranca=os.getenv("SMTP_SEGURANCA", "starttls").strip().lower(),
+            conexoes=int(os.getenv("SMTP_CONEXOES", 2)),
+            mensagens_por_minuto=float(os.getenv("SMTP_MENSAGENS_POR_MINUTO", 0)),
+        )
+    raise ValueError(f"Transporte de e-mail desconhecido: '{nome}'. Opções: {', '.join(TRANSPORTES)}.")
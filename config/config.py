@@ -57,6 +57,10 @@ class Config:
                 tipo='sqlite',
                 caminho=self.paths.cache_db
             ),
+            "CacheBase": DbConfig(
+                tipo='sqlite',
+                caminho=self.paths.cache_base_processada
+            ),
         }
 
     class _Paths:
@@ -65,14 +69,24 @@ class Config:
             self.base_dir = base_dir
             self.config_dir = self.base_dir / "config"
             self.logs_dir = self.base_dir / "logs"
+            self.metricas_dir = self.logs_dir / "metricas"
             self.docs_dir = self.base_dir / "docs"
+            self.assets_dir = self.docs_dir / "assets"
+            self.manifesto_build = self.docs_dir / "manifesto_build.json"
+            self.manifesto_relatorios = self.docs_dir / "manifesto_relatorios.json"
+            self.dashboards_dados_dir = self.docs_dir / "dados"
             self.drivers = self.base_dir / "drivers"
             self.templates_dir = self.base_dir / "templates"
             self.relatorios_excel_dir = self.docs_dir / "excel"
+            self.manifesto_excel = self.relatorios_excel_dir / "manifesto_excel.json"
+            self.caixa_saida_emails = self.base_dir / "caixa_saida"
             self.queries_dir = self.base_dir / "queries"
             self.dados_dir = self.base_dir / "dados"
             self.cache_dir = self.base_dir / "cache"
             self.cache_db = self.cache_dir / "local_cache.db"
+            self.cache_base_processada = self.cache_dir / "base_processada.db"
+            self.historico_execucoes = self.cache_dir / "historico_execucoes.db"
+            self.checkpoints_dir = self.cache_dir / "checkpoints"
             self.query_nacional = self.queries_dir / "nacional.sql"
             self.query_cc = self.queries_dir / "cc.sql"
             self.gerentes_csv = self.dados_dir / "gerentes.csv"
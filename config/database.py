@@ -1,16 +1,18 @@
 # database.py
 import logging
-from typing import Union
-
-from pyadomd import Pyadomd
-from sqlalchemy import create_engine
-from sqlalchemy.engine import Engine, URL
+from typing import TYPE_CHECKING, Union
 
 from .config import DbConfig
 
+# SQLAlchemy e pyadomd são importados só ao criar a conexão: quem não acessa o banco
+# (ajuda da linha de comando, execuções só com cache) não paga o custo de carregá-los.
+if TYPE_CHECKING:
+    from pyadomd import Pyadomd
+    from sqlalchemy.engine import Engine
+
 logger = logging.getLogger(__name__)
 
-Conexao = Union[Engine, Pyadomd]
+Conexao = Union["Engine", "Pyadomd"]
 
 
 def get_conexao(config: DbConfig) -> Conexao:
@@ -21,6 +23,9 @@ def get_conexao(config: DbConfig) -> Conexao:
     logger.info("Criando conexão do tipo '%s' para '%s'...", config.tipo, destino_log)
 
     if config.tipo == "sql":
+        from sqlalchemy import create_engine
+        from sqlalchemy.engine import URL
+
         # Abordagem moderna e segura para criar a URL de conexão
         conn_url = URL.create(
             "mssql+pyodbc",
@@ -37,6 +42,11 @@ def get_conexao(config: DbConfig) -> Conexao:
         return create_engine(conn_url, fast_executemany=True)
 
     elif config.tipo == "olap":
+        # A DLL do AdomdClient precisa estar carregada antes de importar o pyadomd.
+        from .inicializacao import carregar_drivers_externos
+        carregar_drivers_externos()
+        from pyadomd import Pyadomd
+
         conn_str_olap = (
             f"Provider={config.provider};"
             f"Data Source={config.data_source};"
@@ -53,6 +63,8 @@ def get_conexao(config: DbConfig) -> Conexao:
             raise e
 
     elif config.tipo == "sqlite":
+        from sqlalchemy import create_engine
+
         # Garante que o caminho seja absoluto para evitar ambiguidades
         conn_str = f"sqlite:///{config.caminho.resolve()}"
         return create_engine(conn_str)
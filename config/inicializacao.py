@@ -1,6 +1,5 @@
 # config/inicializacao.py (VERSÃO REATORADA)
 import logging
-import clr
 from pathlib import Path
 
 # Importa a instância centralizada da configuração
@@ -8,12 +7,21 @@ from .config import CONFIG
 
 logger = logging.getLogger(__name__)
 
+_DRIVERS_CARREGADOS = False
+
 
 def carregar_drivers_externos() -> None:
     """
     Localiza e carrega a DLL do AdomdClient a partir do caminho definido
     na variável de ambiente 'ADOMD_DLL_PATH'.
+
+    Chamada por `get_conexao` ao abrir a primeira conexão OLAP: o pythonnet (clr) e a DLL
+    só são carregados quando realmente usados, e uma única vez por processo.
     """
+    global _DRIVERS_CARREGADOS
+    if _DRIVERS_CARREGADOS:
+        return
+
     logger.info("Inicializando... Carregando drivers externos.")
 
     # --- ALTERAÇÃO APLICADA ---
@@ -33,7 +41,9 @@ def carregar_drivers_externos() -> None:
             logger.error("Verifique o caminho definido em 'ADOMD_DLL_PATH' no seu arquivo .env.")
             raise FileNotFoundError(f"DLL do gateway não encontrada: {caminho_dll}")
 
+        import clr
         clr.AddReference(str(caminho_dll))
+        _DRIVERS_CARREGADOS = True
         logger.info("Driver AdomdClient carregado com sucesso de: %s", caminho_dll)
 
     except Exception as e:
@@ -1,81 +1,241 @@
 # gerar_relatorio.py (VERSÃO FINAL COM INJEÇÃO DE CORES)
+# O pandas e o restante do pipeline são importados nas funções que os usam, para que '--help'
+# e argumentos inválidos sejam resolvidos sem carregá-los.
+from __future__ import annotations
+
 import argparse
 import logging
+import os
 import sys
-import json
-import pandas as pd
-
-try:
-    from config.logger_config import configurar_logger
-    configurar_logger("geracao_relatorio.log")
-    from config.inicializacao import carregar_drivers_externos
-    carregar_drivers_externos()
-except (ImportError, FileNotFoundError) as e:
-    logging.basicConfig(level=logging.INFO)
-    logging.critical("Falha gravíssima na inicialização: %s", e, exc_info=True)
-    sys.exit(1)
-
-from processamento.processamento_dados_base import obter_dados_processados
-from comunicacao.enviar_relatorios import carregar_gerentes_do_csv
-# Importando CORES junto com CONFIG
-from config.config import CONFIG, CORES
-from visualizacao.componentes_plotly import criar_grafico_sunburst, criar_grafico_heatmap, criar_grafico_inercia
-from visualizacao.preparadores_dados import (
-    preparar_dados_kpi,
-    preparar_dados_grafico_tendencia,
-    preparar_dados_treemap,
-    preparar_dados_orcamento_ocioso,
-    preparar_dados_execucao_sem_planejamento
-)
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from processamento.particionamento import ParticaoUnidades
 
 logger = logging.getLogger(__name__)
 
-def gerar_relatorio_para_unidade(unidade_antiga: str, unidade_nova: str, df_base_total: pd.DataFrame):
-    logger.info(f"Iniciando a geração do dashboard para: '{unidade_nova}' (dados de: '{unidade_antiga}')...")
-    df_unidade = df_base_total[df_base_total['UNIDADE_FINAL'] == unidade_antiga].copy()
+
+def _periodo(texto: str) -> tuple[int, str]:
+    ano, separador, ppa = texto.partition('|')
+    if not separador or not ano.strip().isdigit() or not ppa.strip():
+        raise argparse.ArgumentTypeError(f"período inválido: '{texto}'. Use o formato 'ANO|PPA'.")
+    return int(ano.strip()), ppa.strip()
+
+
+def criar_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Gera dashboards de performance orçamentária por unidade.")
+    parser.add_argument("--unidade", type=str, help="Gera o dashboard para uma unidade específica (usar o nome novo).")
+    parser.add_argument("--todas", action="store_true", help="Gera relatórios para todas as unidades disponíveis.")
+    parser.add_argument("--atualizar-base", action="store_true", help="Ignora o cache local e busca novamente todas as partições (ano, PPA) da base.")
+    parser.add_argument("--workers", type=int, default=1, help="Número de processos para gerar os dashboards em paralelo (padrão: 1).")
+    parser.add_argument("--periodo", type=_periodo, help="Período dos dashboards no formato 'ANO|PPA' (padrão: o último de PERIODOS_FILTRO).")
+    parser.add_argument("--forcar", action="store_true", help="Gera novamente todos os dashboards e planilhas selecionados, mesmo os inalterados desde o último build.")
+    return parser
+
+
+def _configurar_logging() -> None:
+    try:
+        from config.logger_config import configurar_logger
+        configurar_logger("geracao_relatorio.log")
+    except (ImportError, FileNotFoundError) as e:
+        logging.basicConfig(level=logging.INFO)
+        logging.critical("Falha gravíssima na inicialização: %s", e, exc_info=True)
+        sys.exit(1)
+
+
+def _parametros_heatmap() -> dict:
+    """
+    Heatmap: número máximo de projetos exibidos e publicação opcional da matriz completa
+    em 'docs/dados/', carregada pela página apenas quando o usuário pede.
+    """
+    from visualizacao.preparadores_dados import MAX_PROJETOS_HEATMAP
+    return {
+        'heatmap_max_projetos': int(os.getenv("HEATMAP_MAX_PROJETOS", MAX_PROJETOS_HEATMAP)),
+        'heatmap_matriz_completa': os.getenv("HEATMAP_MATRIZ_COMPLETA", "0").strip().lower() in ("1", "true", "sim"),
+    }
+
+
+def gerar_relatorio_para_unidade(unidade_antiga: str, unidade_nova: str, particao_cubo: ParticaoUnidades, entrada_manifesto: dict | None = None) -> dict | None:
+    """
+    Gera o dashboard de uma unidade a partir do cubo agregado particionado por unidade.
+
+    Retorna a entrada do manifesto de build da unidade (ou None se ela não tem dados), que inclui
+    os KPIs e a tendência usados nas prévias dos e-mails. Se a impressão digital coincide com
+    `entrada_manifesto` e o HTML em 'docs/' não foi alterado, nada é gerado e a entrada anterior é devolvida.
+    """
+    from config.config import CONFIG, CORES
+    from visualizacao.ativos import publicar_plotly_js
+    from visualizacao.build_incremental import gravar_se_alterado, impressao_dashboard, saida_atualizada, sha256_arquivo
+    from visualizacao.codificacao_json import codificar_dados_graficos
+    from visualizacao.preparadores_dados import (
+        preparar_dados_kpi,
+        preparar_dados_grafico_tendencia,
+        preparar_dados_treemap,
+        preparar_dados_orcamento_ocioso,
+        preparar_dados_execucao_sem_planejamento,
+        preparar_dados_sunburst,
+        preparar_dados_heatmap,
+        preparar_dados_inercia,
+    )
+    from visualizacao.renderizador_template import carregar_template
+
+    df_unidade = particao_cubo.bloco(unidade_antiga)
     if df_unidade.empty:
         logger.warning(f"Nenhum dado encontrado para a unidade '{unidade_antiga}'. Relatório não gerado.")
-        return
+        return None
+
+    template = carregar_template(CONFIG.paths.templates_dir / "dashboard_template.html")
+    plotly_js_src = publicar_plotly_js()
+    output_sanitized_name = unidade_nova.replace(' ', '_').replace('/', '_')
+    output_path = CONFIG.paths.docs_dir / f"dashboard_{output_sanitized_name}.html"
+
+    parametros = _parametros_heatmap()
+    impressao = impressao_dashboard(df_unidade, unidade_nova, template.sha256, CORES, plotly_js_src, parametros)
+    if saida_atualizada(entrada_manifesto, impressao, output_path):
+        logger.info(f"Dashboard de '{unidade_nova}' inalterado desde o último build. Geração ignorada.")
+        return entrada_manifesto
+
+    logger.info(f"Iniciando a geração do dashboard para: '{unidade_nova}' (dados de: '{unidade_antiga}')...")
 
-    df_exclusivos = df_unidade[df_unidade['tipo_projeto'] == 'Exclusivo'].copy()
-    df_compartilhados = df_unidade[df_unidade['tipo_projeto'] == 'Compartilhado'].copy()
+    df_exclusivos = particao_cubo.exclusivos(unidade_antiga)
+    df_compartilhados = particao_cubo.compartilhados(unidade_antiga)
 
     kpi_dict = preparar_dados_kpi(df_unidade, df_exclusivos, df_compartilhados, unidade_nova)
+    tendencia = preparar_dados_grafico_tendencia(df_unidade)
     
     dados_graficos_json = {
-        "trend": preparar_dados_grafico_tendencia(df_unidade),
+        "trend": tendencia,
         "treemap_exclusivo": preparar_dados_treemap(df_exclusivos),
         "treemap_compartilhado": preparar_dados_treemap(df_compartilhados),
         "idle_budget": preparar_dados_orcamento_ocioso(df_unidade),
         "unplanned_exclusivo": preparar_dados_execucao_sem_planejamento(df_exclusivos, 'Exclusivo'),
         "unplanned_compartilhado": preparar_dados_execucao_sem_planejamento(df_compartilhados, 'Compartilhado'),
+        "sunburst": preparar_dados_sunburst(df_exclusivos),
+        "heatmap": preparar_dados_heatmap(df_exclusivos, parametros['heatmap_max_projetos']),
+        "inercia": preparar_dados_inercia(df_exclusivos),
         # --- CORREÇÃO APLICADA AQUI: Injetando as cores no JSON ---
         "cores": CORES
     }
 
+    extras = {}
+    if parametros['heatmap_matriz_completa'] and dados_graficos_json["heatmap"].get("omitidos"):
+        caminho_matriz = CONFIG.paths.dashboards_dados_dir / f"heatmap_{output_sanitized_name}.json"
+        gravar_se_alterado(caminho_matriz, codificar_dados_graficos(preparar_dados_heatmap(df_exclusivos, None)))
+        nome_matriz = caminho_matriz.relative_to(CONFIG.paths.docs_dir).as_posix()
+        dados_graficos_json["heatmap"]["completo"] = nome_matriz
+        extras[nome_matriz] = sha256_arquivo(caminho_matriz)
+
     placeholders_html = {
-        "__SUNBURST_PLACEHOLDER__": criar_grafico_sunburst(df_exclusivos),
-        "__HEATMAP_PLACEHOLDER__": criar_grafico_heatmap(df_exclusivos),
-        "__INERCIA_PLACEHOLDER__": criar_grafico_inercia(df_exclusivos)
+        "__PLOTLY_JS_SRC__": plotly_js_src,
     }
 
     try:
-        template_path = CONFIG.paths.templates_dir / "dashboard_template.html"
-        final_html = template_path.read_text(encoding='utf-8')
-
-        for key, value in {**kpi_dict, **placeholders_html}.items():
-            final_html = final_html.replace(key, str(value))
-        
-        json_string = json.dumps(dados_graficos_json, indent=None, ensure_ascii=False)
-        final_html = final_html.replace('<!--__JSON_DATA_PLACEHOLDER__-->', json_string)
-        
-        output_sanitized_name = unidade_nova.replace(' ', '_').replace('/', '_')
-        output_path = CONFIG.paths.docs_dir / f"dashboard_{output_sanitized_name}.html"
-        output_path.write_text(final_html, encoding='utf-8')
+        json_string = codificar_dados_graficos(dados_graficos_json)
+        alterado = template.renderizar_para_arquivo(
+            {**kpi_dict, **placeholders_html, "__JSON_DATA_PLACEHOLDER__": json_string},
+            output_path,
+        )
         
         logger.info(f"Dashboard para '{unidade_nova}' salvo com sucesso em: '{output_path}'")
     except Exception as e:
         logger.exception(f"Ocorreu um erro ao gerar o HTML para '{unidade_nova}': {e}")
+        raise
+
+    gerado_em = datetime.now().isoformat(timespec='seconds')
+    if not alterado and entrada_manifesto:
+        # HTML idêntico ao anterior (ex.: mudança de código sem efeito nesta unidade): mantém a data original.
+        gerado_em = entrada_manifesto.get('gerado_em', gerado_em)
+    return {
+        'arquivo': output_path.name,
+        'impressao': impressao,
+        'sha256': sha256_arquivo(output_path),
+        'gerado_em': gerado_em,
+        'extras': extras,
+        'kpis': kpi_dict,
+        'tendencia': tendencia,
+    }
+
+# --- Geração em paralelo (--workers) ---
+def _gerar_relatorio_do_bloco(bloco: pd.DataFrame, unidade_antiga: str, unidade_nova: str, entrada_manifesto: dict | None) -> dict | None:
+    from processamento.particionamento import ParticaoUnidades
+    # Processos iniciados por 'spawn' (Windows) não herdam a configuração de logging do processo principal.
+    if not logging.getLogger().handlers:
+        _configurar_logging()
+    return gerar_relatorio_para_unidade(unidade_antiga, unidade_nova, ParticaoUnidades(bloco), entrada_manifesto)
+
+def gerar_relatorios(unidades: list[tuple[str, str]], particao_cubo: ParticaoUnidades, workers: int = 1,
+                     manifesto: dict[str, dict] | None = None) -> tuple[dict[str, dict | None], dict[str, str]]:
+    """
+    Gera os dashboards das unidades (pares nome antigo/nome novo), em série ou em um pool de processos.
+    Unidades cuja entrada em `manifesto` ainda confere com os dados são puladas.
+    Retorna as entradas de manifesto por unidade (nome novo -> entrada, None se sem dados) e as falhas
+    por unidade (nome novo -> mensagem de erro); uma falha não interrompe as demais.
+    """
+    from processamento.base_mapeada import executar_por_unidade
+
+    manifesto = manifesto or {}
+    entradas: dict[str, dict | None] = {}
+    falhas: dict[str, str] = {}
+    if workers <= 1 or len(unidades) <= 1:
+        for unidade_antiga, unidade_nova in unidades:
+            try:
+                entradas[unidade_nova] = gerar_relatorio_para_unidade(unidade_antiga, unidade_nova, particao_cubo, manifesto.get(unidade_nova))
+            except Exception as e:
+                falhas[unidade_nova] = f"{type(e).__name__}: {e}"
+        return entradas, falhas
+
+    logger.info("Gerando %d dashboards em %d processos...", len(unidades), workers)
+    tarefas = {
+        unidade_nova: (unidade_antiga, (unidade_antiga, unidade_nova, manifesto.get(unidade_nova)))
+        for unidade_antiga, unidade_nova in unidades
+    }
+    for unidade_nova, entrada, erro in executar_por_unidade(_gerar_relatorio_do_bloco, particao_cubo, tarefas, workers, prefixo="cubo_mapeado_"):
+        if erro is not None:
+            falhas[unidade_nova] = f"{type(erro).__name__}: {erro}"
+        else:
+            entradas[unidade_nova] = entrada
+    return entradas, falhas
+
+def registrar_relatorios(unidades: list[tuple[str, str]], entradas: dict[str, dict | None], df_base_total: pd.DataFrame,
+                         workers: int = 1, forcar: bool = False) -> None:
+    """
+    Exporta as planilhas analíticas das unidades geradas e registra os artefatos de cada uma no
+    manifesto de relatórios, que é tudo o que o envio dos e-mails consome. Unidades de execuções
+    anteriores não selecionadas agora são mantidas.
+    """
+    from comunicacao.exportacao_excel import caminho_planilha, exportar_planilhas
+    from comunicacao.manifesto_relatorios import caminho_relativo, carregar_manifesto_relatorios, salvar_manifesto_relatorios
+    from config.config import CONFIG
+    from processamento.particionamento import ParticaoUnidades
+    from utils.instrumentacao import etapa
+
+    geradas = [(unidade_antiga, unidade_nova) for unidade_antiga, unidade_nova in unidades if entradas.get(unidade_nova)]
+    CONFIG.paths.relatorios_excel_dir.mkdir(parents=True, exist_ok=True)
+    with etapa("exportacao_excel", linhas_entrada=len(df_base_total)):
+        planilhas = exportar_planilhas(
+            {unidade_antiga: caminho_planilha(unidade_nova) for unidade_antiga, unidade_nova in geradas},
+            ParticaoUnidades(df_base_total), workers=workers, forcar=forcar,
+        )
+
+    relatorios = carregar_manifesto_relatorios()
+    for unidade_antiga, unidade_nova in unidades:
+        entrada = entradas.get(unidade_nova)
+        if entrada is None:
+            relatorios.pop(unidade_antiga, None)
+            continue
+        relatorios[unidade_antiga] = {
+            'unidade_nova': unidade_nova,
+            'html': caminho_relativo(CONFIG.paths.docs_dir / entrada['arquivo']),
+            'impressao': entrada['impressao'],
+            'kpis': entrada['kpis'],
+            'tendencia': entrada['tendencia'],
+            'excel': caminho_relativo(planilhas.get(unidade_antiga)),
+            'gerado_em': entrada['gerado_em'],
+        }
+    salvar_manifesto_relatorios(relatorios)
 
 def selecionar_unidades_interativamente(unidades_map: dict) -> list[str]:
     if not unidades_map: return []
@@ -93,21 +253,42 @@ def selecionar_unidades_interativamente(unidades_map: dict) -> list[str]:
         except (ValueError, IndexError): print("Entrada inválida.")
 
 def main():
-    parser = argparse.ArgumentParser(description="Gera dashboards de performance orçamentária por unidade.")
-    parser.add_argument("--unidade", type=str, help="Gera o dashboard para uma unidade específica (usar o nome novo).")
-    parser.add_argument("--todas", action="store_true", help="Gera relatórios para todas as unidades disponíveis.")
-    args = parser.parse_args()
+    args = criar_parser().parse_args()
+    _configurar_logging()
+    from utils.instrumentacao import execucao_instrumentada
+    # Tempo, CPU, linhas e memória de cada etapa vão para logs/metricas/ ao final.
+    with execucao_instrumentada("geracao_relatorio"):
+        executar_geracao(args)
+
+def executar_geracao(args: argparse.Namespace) -> None:
+    from comunicacao.gerentes import carregar_gerentes_do_csv
+    from config.config import CONFIG
+    from processamento.cubo_agregado import construir_cubo_agregado
+    from processamento.particionamento import ParticaoUnidades
+    from processamento.processamento_dados_base import obter_dados_processados, selecionar_periodo
+    from utils.instrumentacao import etapa
+    from visualizacao.ativos import publicar_plotly_js
+    from visualizacao.build_incremental import carregar_manifesto, salvar_manifesto
 
     CONFIG.paths.docs_dir.mkdir(parents=True, exist_ok=True)
-    df_base_total = obter_dados_processados()
+    # Publica o plotly.js compartilhado antes de qualquer worker, para que todos reutilizem o mesmo arquivo.
+    publicar_plotly_js()
+    df_base_total = obter_dados_processados(forcar_atualizacao=args.atualizar_base)
     if df_base_total is None or df_base_total.empty:
         logger.error("A base de dados não pôde ser carregada. Encerrando."); sys.exit(1)
         
+    # Os dashboards mostram um período (ano, PPA) por vez: meses de anos diferentes não são somados.
+    df_base_total, periodo = selecionar_periodo(df_base_total, args.periodo)
+    logger.info("Gerando os relatórios do período %s (%d linhas da base).", periodo, len(df_base_total))
+
     gerentes_info = carregar_gerentes_do_csv()
     if not gerentes_info:
         logger.error("Arquivo de gerentes não pôde ser carregado. Encerrando."); sys.exit(1)
 
-    unidades_antigas_disponiveis = df_base_total['UNIDADE_FINAL'].unique()
+    # Agregação única para toda a organização; cada dashboard lê apenas o seu bloco.
+    particao_cubo = ParticaoUnidades(construir_cubo_agregado(df_base_total))
+
+    unidades_antigas_disponiveis = particao_cubo.unidades
     unidades_map = { nome_antigo: gerentes_info.get(nome_antigo.upper(), {'nome_novo': nome_antigo.replace("UNIDADE ", "").strip()}) for nome_antigo in unidades_antigas_disponiveis }
 
     unidades_a_gerar_chaves = []
@@ -121,15 +302,39 @@ def main():
     else:
         unidades_a_gerar_chaves = selecionar_unidades_interativamente(unidades_map)
 
+    falhas = {}
     if unidades_a_gerar_chaves:
         logger.info(f"Gerando dashboards para: {', '.join([unidades_map[k]['nome_novo'] for k in unidades_a_gerar_chaves])}")
-        for chave_antiga in unidades_a_gerar_chaves:
-            nome_novo = unidades_map[chave_antiga]['nome_novo']
-            gerar_relatorio_para_unidade(chave_antiga, nome_novo, df_base_total)
+        unidades = [(chave_antiga, unidades_map[chave_antiga]['nome_novo']) for chave_antiga in unidades_a_gerar_chaves]
+        manifesto = carregar_manifesto()
+        with etapa("dashboards", linhas_entrada=len(particao_cubo.df)):
+            entradas, falhas = gerar_relatorios(unidades, particao_cubo, workers=args.workers, manifesto={} if args.forcar else manifesto)
+
+        inalterados = sum(1 for unidade_nova, entrada in entradas.items() if entrada is not None and entrada == manifesto.get(unidade_nova))
+        gerados = sum(1 for entrada in entradas.values() if entrada is not None) - inalterados
+        logger.info("%d dashboard(s) gerados, %d inalterados desde o último build.", gerados, inalterados)
+        # Unidades não selecionadas nesta execução mantêm suas entradas; as que falharam são removidas
+        # para serem geradas de novo na próxima execução.
+        for unidade_nova, entrada in entradas.items():
+            if entrada is None:
+                manifesto.pop(unidade_nova, None)
+            else:
+                manifesto[unidade_nova] = entrada
+        for unidade_nova in falhas:
+            manifesto.pop(unidade_nova, None)
+        salvar_manifesto(manifesto)
+        registrar_relatorios(unidades, entradas, df_base_total, workers=args.workers, forcar=args.forcar)
     else:
         logger.info("Nenhuma unidade selecionada. Encerrando.")
+
+    if falhas:
+        logger.error("%d dashboard(s) falharam:", len(falhas))
+        for unidade_nova, erro in sorted(falhas.items()):
+            logger.error("  - %s: %s", unidade_nova, erro)
     
     logger.info("\n--- FIM DO SCRIPT DE GERAÇÃO DE DASHBOARD ---")
+    if falhas:
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
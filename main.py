@@ -1,37 +1,27 @@
 # main.py
+# O pandas, os drivers de banco e o restante do pipeline são importados nas funções que os usam,
+# para que '--help' e argumentos inválidos sejam resolvidos sem carregá-los.
+from __future__ import annotations
+
 import argparse
 import logging
 import sys
-import pandas as pd
+from typing import TYPE_CHECKING
 
-# 1. INICIALIZAÇÃO CRÍTICA
-try:
-    from config.logger_config import configurar_logger
-    # Passa o nome do arquivo de log específico para esta pipeline
-    configurar_logger("pipeline_principal.log")
-    
-    from config.inicializacao import carregar_drivers_externos
-    carregar_drivers_externos()
-except (ImportError, FileNotFoundError, Exception) as e:
-    logging.basicConfig(level=logging.INFO)
-    logging.critical("Falha gravíssima na inicialização: %s", e, exc_info=True)
-    sys.exit(1)
-
-
-from config.config import CONFIG
-from comunicacao.carregamento import carregar_dataframe_para_sql
-from config.database import get_conexao
-from processamento.extracao import obter_dados_brutos
-from processamento.correcao_chaves import iniciar_correcao_interativa_chaves
-from processamento.enriquecimento import enriquecer_orcado_com_cc
-from processamento.validacao import (
-    aplicar_mapa_correcoes,
-    carregar_mapa_correcoes,
-    preparar_dados_para_validacao,
-)
+if TYPE_CHECKING:
+    import pandas as pd
 
 logger = logging.getLogger(__name__)
 
+
+def criar_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Robô de Enriquecimento de Dados.")
+    parser.add_argument("--modo-interativo", action="store_true", help="Ativa o modo interativo para correção de chaves.")
+    parser.add_argument("--resume", action="store_true",
+                        help="Retoma a partir da primeira etapa com entradas alteradas ou que falhou, lendo as anteriores dos checkpoints.")
+    return parser
+
+
 def tratar_falhas_de_enriquecimento(
     df_enriquecido: pd.DataFrame, df_referencia_cc: pd.DataFrame, args: argparse.Namespace
 ) -> None:
@@ -45,17 +35,68 @@ def tratar_falhas_de_enriquecimento(
     logger.warning("\n--- ATENÇÃO: %d COMBINAÇÕES ÚNICAS NÃO FORAM ENRIQUECIDAS ---", len(chaves_com_falha))
     
     if args.modo_interativo:
+        from processamento.correcao_chaves import iniciar_correcao_interativa_chaves
         iniciar_correcao_interativa_chaves(chaves_com_falha, df_referencia_cc)
         logger.info("Processo de correção finalizado. O mapa de correções foi atualizado.")
     else:
         print("\nPara corrigir as falhas restantes, execute com a flag: python main.py --modo-interativo")
 
 
+def organizar_colunas_finais(df_enriquecido: pd.DataFrame) -> pd.DataFrame:
+    """Restaura o ano da fotografia e seleciona as colunas da tabela final, na ordem de gravação."""
+    logger.info("Organizando colunas para a tabela final...")
+
+    if 'ANO_FOTOGRAFIA' in df_enriquecido.columns:
+        logger.info("Restaurando o ano original da fotografia...")
+        df_enriquecido['ANO'] = df_enriquecido['ANO_FOTOGRAFIA']
+
+    colunas_finais_ordenadas = [
+        'ANO', 'MES', 'PROJETO', 'ACAO', 'UNIDADE', 'CODCCUSTO',
+        'Valor_Ajustado', 'Descricao_PPA', 'Codigo_Natureza_Orcamentaria',
+        'Descricao_Natureza_Orcamentaria', 'DTUNIDADE', 'DTPROJETO', 'DTACAO'
+    ]
+    
+    # Garante que apenas colunas existentes sejam selecionadas para evitar KeyErrors
+    colunas_presentes = [col for col in colunas_finais_ordenadas if col in df_enriquecido.columns]
+    return df_enriquecido[colunas_presentes]
+
+
 def run_pipeline(args: argparse.Namespace) -> None:
     """
     Executa o fluxo completo: extração, validação, correção, enriquecimento e salvamento.
+
+    A saída de cada etapa é gravada como checkpoint em 'cache/checkpoints/'. Com --resume, as
+    etapas cujas entradas não mudaram desde a última execução bem-sucedida são lidas do disco.
     """
-    df_orcado_raw, df_cc_raw = obter_dados_brutos()
+    from config.config import CONFIG
+    from comunicacao.carregamento import carregar_dataframe_para_sql
+    from config.database import get_conexao
+    from processamento.checkpoints import CheckpointsPipeline
+    from processamento.extracao import obter_dados_brutos
+    from processamento.enriquecimento import enriquecer_orcado_com_cc
+    from processamento.validacao import (
+        aplicar_mapa_correcoes,
+        carregar_mapa_correcoes,
+        preparar_dados_para_validacao,
+    )
+
+    checkpoints = CheckpointsPipeline(retomar=args.resume)
+    # Os dados brutos vêm de 'local_cache.db' (ou dos bancos, que o recriam): apagá-lo ou recriá-lo
+    # muda a chave, e a extração é refeita mesmo com --resume. O estado é lido de novo após a
+    # extração, que cria o arquivo quando ele não existe.
+    def estado_cache_local() -> list[int] | None:
+        cache_local = CONFIG.paths.cache_db
+        return [cache_local.stat().st_mtime_ns, cache_local.stat().st_size] if cache_local.exists() else None
+
+    df_orcado_raw, df_cc_raw = checkpoints.executar(
+        "extracao", obter_dados_brutos,
+        entradas={
+            'queries': (CONFIG.paths.query_nacional, CONFIG.paths.query_cc),
+            'conexoes': {nome: vars(CONFIG.conexoes[nome]) for nome in ("FINANCA_SQL", "HubDados")},
+            'cache_local': estado_cache_local,
+        },
+        codigo=("processamento/extracao.py",),
+    )
 
     if df_orcado_raw.empty or df_cc_raw.empty:
         logger.error("Dados brutos do Orçado ou CC estão vazios. Abortando.")
@@ -63,15 +104,27 @@ def run_pipeline(args: argparse.Namespace) -> None:
 
     # 1. PREPARAÇÃO
     chaves_base = ['PROJETO', 'ACAO', 'UNIDADE']
-    df_orcado = preparar_dados_para_validacao(df_orcado_raw, chaves_base, incluir_ano_na_chave=True)
-    df_cc = preparar_dados_para_validacao(df_cc_raw, chaves_base, incluir_ano_na_chave=True)
+    df_orcado, df_cc = checkpoints.executar(
+        "preparacao",
+        lambda: (preparar_dados_para_validacao(df_orcado_raw, chaves_base, incluir_ano_na_chave=True),
+                 preparar_dados_para_validacao(df_cc_raw, chaves_base, incluir_ano_na_chave=True)),
+        entradas={'dados_brutos': checkpoints.impressao("extracao"), 'chaves': chaves_base},
+        codigo=("processamento/validacao.py",),
+    )
 
     # 2. APLICAÇÃO DE CORREÇÕES EXISTENTES
     mapa_correcoes = carregar_mapa_correcoes()
-    df_orcado_corrigido = aplicar_mapa_correcoes(df_orcado, mapa_correcoes)
+    df_orcado_corrigido = checkpoints.executar(
+        "correcao", aplicar_mapa_correcoes, {'preparacao': checkpoints.impressao("preparacao"), 'mapa': mapa_correcoes},
+        df_orcado, mapa_correcoes, codigo=("processamento/validacao.py",),
+    )
 
     # 3. ENRIQUECIMENTO
-    df_enriquecido = enriquecer_orcado_com_cc(df_orcado_corrigido, df_cc)
+    df_enriquecido = checkpoints.executar(
+        "enriquecimento", enriquecer_orcado_com_cc,
+        {'correcao': checkpoints.impressao("correcao"), 'preparacao': checkpoints.impressao("preparacao")},
+        df_orcado_corrigido, df_cc, codigo=("processamento/enriquecimento.py",),
+    )
 
     # 4. TRATAMENTO DE FALHAS (se houver)
     tratar_falhas_de_enriquecimento(df_enriquecido, df_cc, args)
@@ -81,44 +134,62 @@ def run_pipeline(args: argparse.Namespace) -> None:
     
     NOME_TABELA_FINAL = "ORCADO_ENRIQUECIDO_COM_CC"
     
-    engine_financa = get_conexao(CONFIG.conexoes["FINANCA_SQL"])
-    
-    logger.info("Organizando colunas para a tabela final...")
+    df_para_salvar = organizar_colunas_finais(df_enriquecido)
+    destino = {'conexao': vars(CONFIG.conexoes["FINANCA_SQL"]), 'tabela': NOME_TABELA_FINAL}
 
-    if 'ANO_FOTOGRAFIA' in df_enriquecido.columns:
-        logger.info("Restaurando o ano original da fotografia...")
-        df_enriquecido['ANO'] = df_enriquecido['ANO_FOTOGRAFIA']
+    # Com --resume, uma carga já concluída com os mesmos dados e destino não é repetida.
+    carga_executada = False
 
-    colunas_finais_ordenadas = [
-        'ANO', 'MES', 'PROJETO', 'ACAO', 'UNIDADE', 'CODCCUSTO',
-        'Valor_Ajustado', 'Descricao_PPA', 'Codigo_Natureza_Orcamentaria',
-        'Descricao_Natureza_Orcamentaria', 'DTUNIDADE', 'DTPROJETO', 'DTACAO'
-    ]
-    
-    # Garante que apenas colunas existentes sejam selecionadas para evitar KeyErrors
-    colunas_presentes = [col for col in colunas_finais_ordenadas if col in df_enriquecido.columns]
-    df_para_salvar = df_enriquecido[colunas_presentes]
+    def carregar() -> None:
+        nonlocal carga_executada
+        carregar_dataframe_para_sql(df_para_salvar, NOME_TABELA_FINAL, get_conexao(CONFIG.conexoes["FINANCA_SQL"]))
+        carga_executada = True
 
-    carregar_dataframe_para_sql(df_para_salvar, NOME_TABELA_FINAL, engine_financa)
-    
-    logger.info(
-        "SUCESSO! A tabela '%s' foi salva no banco de dados '%s'.",
-        NOME_TABELA_FINAL, CONFIG.conexoes["FINANCA_SQL"].banco
+    checkpoints.executar(
+        "carga_sql", carregar,
+        entradas={'dados': df_para_salvar, 'destino': destino},
+        codigo=("comunicacao/carregamento.py",),
     )
+    
+    if carga_executada:
+        logger.info(
+            "SUCESSO! A tabela '%s' foi salva no banco de dados '%s'.",
+            NOME_TABELA_FINAL, CONFIG.conexoes["FINANCA_SQL"].banco
+        )
+    else:
+        logger.info(
+            "A tabela '%s' do banco '%s' já contém estes dados (carga concluída em execução anterior, reaproveitada do checkpoint).",
+            NOME_TABELA_FINAL, CONFIG.conexoes["FINANCA_SQL"].banco
+        )
 
 
 def main() -> None:
     """Ponto de entrada principal da aplicação."""
-    parser = argparse.ArgumentParser(description="Robô de Enriquecimento de Dados.")
-    parser.add_argument("--modo-interativo", action="store_true", help="Ativa o modo interativo para correção de chaves.")
-    args = parser.parse_args()
-    
+    args = criar_parser().parse_args()
+
+    # 1. INICIALIZAÇÃO CRÍTICA
+    # A DLL do AdomdClient não é carregada aqui: get_conexao a carrega ao abrir uma conexão OLAP.
+    try:
+        from config.logger_config import configurar_logger
+        # Passa o nome do arquivo de log específico para esta pipeline
+        configurar_logger("pipeline_principal.log")
+    except (ImportError, FileNotFoundError, Exception) as e:
+        logging.basicConfig(level=logging.INFO)
+        logging.critical("Falha gravíssima na inicialização: %s", e, exc_info=True)
+        sys.exit(1)
+
+    from utils.instrumentacao import execucao_instrumentada
+
     logger.info("--- INICIANDO ROBÔ DE ENRIQUECIMENTO DE DADOS ---")
     if args.modo_interativo:
         logger.info("Modo interativo ATIVADO.")
+    if args.resume:
+        logger.info("Retomada ATIVADA: etapas com entradas inalteradas serão lidas dos checkpoints.")
 
     try:
-        run_pipeline(args)
+        # Tempo, CPU, linhas e memória de cada etapa vão para logs/metricas/ ao final.
+        with execucao_instrumentada("pipeline_principal"):
+            run_pipeline(args)
     except FileNotFoundError as e:
         logger.critical("ERRO: Arquivo essencial não encontrado: %s.", e)
     except ValueError as e:
@@ -0,0 +1,117 @@
+# processamento/base_mapeada.py
+import logging
+import pickle
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Hashable, Iterator
+
+import numpy as np
+import pandas as pd
+
+from config.config import CONFIG
+
+logger = logging.getLogger(__name__)
+
+ARQUIVO_METADADOS = "metadados.pkl"
+
+
+def salvar_base_mapeada(df: pd.DataFrame, diretorio: Path) -> Path:
+    """
+    Grava um DataFrame em formato colunar, um arquivo .npy por coluna, para ser
+    mapeado em memória por outros processos.
+
+    Colunas numéricas, booleanas e de data vão como estão; as demais (texto) são
+    codificadas como inteiros com um dicionário de valores à parte. Assim cada
+    processo lê só as linhas de que precisa, sem receber o DataFrame inteiro via pickle.
+    """
+    diretorio = Path(diretorio)
+    diretorio.mkdir(parents=True, exist_ok=True)
+
+    colunas = []
+    for i, nome in enumerate(df.columns):
+        serie = df[nome]
+        arquivo = f"coluna_{i:03d}.npy"
+        if isinstance(serie.dtype, np.dtype) and serie.dtype.kind in 'biufcmM':
+            np.save(diretorio / arquivo, serie.to_numpy())
+            colunas.append({'nome': nome, 'arquivo': arquivo, 'dtype': serie.dtype, 'valores': None})
+        else:
+            codigos, valores = pd.factorize(serie)
+            np.save(diretorio / arquivo, codigos.astype(np.int32 if len(valores) < 2**31 else np.int64))
+            colunas.append({'nome': nome, 'arquivo': arquivo, 'dtype': serie.dtype, 'valores': np.asarray(valores, dtype=object)})
+
+    with open(diretorio / ARQUIVO_METADADOS, 'wb') as f:
+        pickle.dump({'linhas': len(df), 'colunas': colunas}, f)
+
+    logger.info("Base de %d linhas gravada em formato mapeado em '%s'.", len(df), diretorio)
+    return diretorio
+
+
+class BaseMapeada:
+    """Leitura por intervalo de linhas de uma base gravada por `salvar_base_mapeada`."""
+
+    def __init__(self, diretorio: Path):
+        diretorio = Path(diretorio)
+        with open(diretorio / ARQUIVO_METADADOS, 'rb') as f:
+            metadados = pickle.load(f)
+        self.linhas: int = metadados['linhas']
+        self._colunas = [
+            (coluna, np.load(diretorio / coluna['arquivo'], mmap_mode='r'))
+            for coluna in metadados['colunas']
+        ]
+
+    def fatia(self, inicio: int = 0, fim: int | None = None) -> pd.DataFrame:
+        """Materializa apenas as linhas [inicio, fim)."""
+        fim = self.linhas if fim is None else fim
+        dados = {}
+        for coluna, dados_mapeados in self._colunas:
+            parte = np.asarray(dados_mapeados[inicio:fim])
+            if coluna['valores'] is None:
+                dados[coluna['nome']] = pd.Series(parte, copy=True)
+            else:
+                valores = pd.api.extensions.take(coluna['valores'], parte, allow_fill=True)
+                dados[coluna['nome']] = pd.Series(valores, dtype=coluna['dtype'])
+        return pd.DataFrame(dados)
+
+
+# --- Pool de processos sobre a base mapeada ---
+# Cada processo mapeia em memória a base gravada em disco e materializa só o bloco da sua unidade.
+_BASE_MAPEADA_WORKER: BaseMapeada | None = None
+
+def _inicializar_worker(diretorio_base: str) -> None:
+    global _BASE_MAPEADA_WORKER
+    _BASE_MAPEADA_WORKER = BaseMapeada(diretorio_base)
+
+def _executar_no_bloco(funcao: Callable, inicio: int, fim: int, argumentos: tuple):
+    return funcao(_BASE_MAPEADA_WORKER.fatia(inicio, fim), *argumentos)
+
+
+def executar_por_unidade(funcao: Callable, particao, tarefas: dict[Hashable, tuple[str, tuple]], workers: int,
+                         prefixo: str = "base_mapeada_") -> Iterator[tuple[Hashable, object, Exception | None]]:
+    """
+    Executa `funcao(bloco, *argumentos)` em um pool de `workers` processos, para cada tarefa
+    (chave -> (unidade, argumentos)) sobre o bloco da unidade em `particao` (uma `ParticaoUnidades`).
+
+    A base da partição é gravada uma única vez em 'cache/' por `salvar_base_mapeada` e apagada ao
+    final; `funcao` precisa ser importável pelos processos (definida no nível do módulo). As unidades
+    maiores são enviadas primeiro, para equilibrar a carga. Gera (chave, resultado, erro) à medida
+    que as tarefas terminam, com `erro` None em caso de sucesso.
+    """
+    diretorio_base = tempfile.mkdtemp(prefix=prefixo, dir=CONFIG.paths.cache_dir)
+    try:
+        salvar_base_mapeada(particao.df, diretorio_base)
+        intervalos = {chave: particao.intervalo(unidade) for chave, (unidade, _) in tarefas.items()}
+        ordem = sorted(tarefas, key=lambda chave: intervalos[chave][1] - intervalos[chave][0], reverse=True)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_inicializar_worker, initargs=(diretorio_base,)) as executor:
+            futuros = {
+                executor.submit(_executar_no_bloco, funcao, *intervalos[chave], tarefas[chave][1]): chave
+                for chave in ordem
+            }
+            for futuro in as_completed(futuros):
+                try:
+                    yield futuros[futuro], futuro.result(), None
+                except Exception as e:
+                    yield futuros[futuro], None, e
+    finally:
+        shutil.rmtree(diretorio_base, ignore_errors=True)
@@ -0,0 +1,145 @@
+# processamento/checkpoints.py
+import hashlib
+import json
+import logging
+import os
+import pickle
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+import pandas as pd
+
+from config.config import CONFIG
+from visualizacao.build_incremental import impressao_dados
+
+logger = logging.getLogger(__name__)
+
+VERSAO_CHECKPOINTS = 1
+ARQUIVO_MANIFESTO = "manifesto.json"
+
+
+def impressao_objeto(objeto) -> str:
+    """
+    Impressão digital de uma entrada ou saída de etapa: DataFrames pelo conteúdo (ver `impressao_dados`),
+    tuplas e listas elemento a elemento, arquivos pelo conteúdo e o resto pela representação JSON.
+    """
+    if isinstance(objeto, pd.DataFrame):
+        return impressao_dados(objeto)
+    if isinstance(objeto, (tuple, list)):
+        conteudo = json.dumps([impressao_objeto(item) for item in objeto])
+    elif isinstance(objeto, Path):
+        conteudo = hashlib.sha256(objeto.read_bytes()).hexdigest() if objeto.exists() else f"ausente:{objeto.name}"
+    else:
+        conteudo = json.dumps(objeto, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(conteudo.encode('utf-8')).hexdigest()
+
+
+class CheckpointsPipeline:
+    """
+    Saída de cada etapa do main.py gravada em 'cache/checkpoints/', com a impressão digital das
+    suas entradas (saídas das etapas anteriores, mapas, queries e o código da etapa).
+
+    Toda execução grava os checkpoints. Com `retomar=True`, uma etapa cujas entradas coincidem com
+    as do último checkpoint bem-sucedido não é executada: a saída é lida do disco. A execução recomeça,
+    assim, na primeira etapa com entradas alteradas ou que falhou, e as seguintes só são refeitas
+    se a saída recalculada mudar.
+    """
+
+    def __init__(self, retomar: bool = False, diretorio: Path | None = None):
+        self.retomar = retomar
+        self.diretorio = Path(diretorio or CONFIG.paths.checkpoints_dir)
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+        self._manifesto = self._carregar_manifesto()
+
+    def impressao(self, nome: str) -> str | None:
+        """Impressão digital da saída da etapa `nome` nesta execução (ou no checkpoint reaproveitado)."""
+        return self._manifesto.get(nome, {}).get('impressao_saida')
+
+    def executar(self, nome: str, funcao: Callable, entradas: dict, *args, codigo: tuple[str, ...] = (), **kwargs):
+        """
+        Executa `funcao(*args, **kwargs)` como a etapa `nome`, ou devolve a saída do checkpoint se
+        `retomar` está ativo e `entradas` (nome -> objeto ou impressão) e os arquivos em `codigo`
+        não mudaram desde a última execução bem-sucedida.
+
+        Entradas chamáveis são avaliadas antes da etapa e de novo ao gravar o checkpoint: servem para
+        estados que a própria etapa altera, como o cache local criado pela extração.
+        """
+        chave = self._chave(entradas, codigo)
+        entrada_anterior = self._manifesto.get(nome, {})
+        if self.retomar and entrada_anterior.get('chave') == chave and entrada_anterior.get('status') == 'ok':
+            try:
+                resultado = self._ler(nome, chave)
+                logger.info("Etapa '%s' retomada do checkpoint de %s.", nome, entrada_anterior.get('gravado_em'))
+                return resultado
+            except (OSError, ValueError, pickle.UnpicklingError, EOFError) as e:
+                logger.warning("Checkpoint da etapa '%s' ilegível (%s). A etapa será executada.", nome, e)
+        elif self.retomar:
+            motivo = "falhou na última execução" if entrada_anterior.get('chave') == chave else "entradas alteradas ou sem checkpoint"
+            logger.info("Etapa '%s' será executada (%s).", nome, motivo)
+
+        try:
+            resultado = funcao(*args, **kwargs)
+        except BaseException as e:
+            self._registrar(nome, {'chave': chave, 'status': 'erro', 'erro': f"{type(e).__name__}: {e}"[:500]})
+            raise
+        if any(callable(valor) for valor in entradas.values()):
+            chave = self._chave(entradas, codigo)
+        self._gravar(nome, chave, resultado)
+        self._registrar(nome, {'chave': chave, 'status': 'ok', 'impressao_saida': impressao_objeto(resultado)})
+        return resultado
+
+    def _chave(self, entradas: dict, codigo: tuple[str, ...]) -> str:
+        base_dir = CONFIG.paths.base_dir
+        componentes = {
+            'versao': VERSAO_CHECKPOINTS,
+            'entradas': {nome: self._impressao_entrada(valor) for nome, valor in entradas.items()},
+            'codigo': {arquivo: impressao_objeto(base_dir / arquivo) for arquivo in codigo},
+        }
+        return hashlib.sha256(json.dumps(componentes, sort_keys=True).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _impressao_entrada(valor) -> str:
+        if callable(valor):
+            valor = valor()
+        return valor if isinstance(valor, str) else impressao_objeto(valor)
+
+    def _caminho(self, nome: str) -> Path:
+        return self.diretorio / f"{nome}.pkl"
+
+    def _gravar(self, nome: str, chave: str, resultado) -> None:
+        """Grava a saída com a chave junto, em arquivo temporário renomeado ao final (gravação atômica)."""
+        caminho = self._caminho(nome)
+        caminho_tmp = caminho.with_name(caminho.name + '.tmp')
+        with open(caminho_tmp, 'wb') as f:
+            pickle.dump({'chave': chave, 'resultado': resultado}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(caminho_tmp, caminho)
+
+    def _ler(self, nome: str, chave: str):
+        with open(self._caminho(nome), 'rb') as f:
+            conteudo = pickle.load(f)
+        if conteudo.get('chave') != chave:
+            raise ValueError("chave do arquivo difere do manifesto")
+        return conteudo['resultado']
+
+    def _registrar(self, nome: str, entrada: dict) -> None:
+        entrada['gravado_em'] = datetime.now().isoformat(timespec='seconds')
+        self._manifesto[nome] = entrada
+        caminho = self.diretorio / ARQUIVO_MANIFESTO
+        conteudo = json.dumps({'versao': VERSAO_CHECKPOINTS, 'etapas': self._manifesto}, indent=2, sort_keys=True, ensure_ascii=False)
+        caminho_tmp = caminho.with_name(caminho.name + '.tmp')
+        caminho_tmp.write_text(conteudo, encoding='utf-8')
+        os.replace(caminho_tmp, caminho)
+
+    def _carregar_manifesto(self) -> dict[str, dict]:
+        caminho = self.diretorio / ARQUIVO_MANIFESTO
+        if not caminho.exists():
+            return {}
+        try:
+            dados = json.loads(caminho.read_text(encoding='utf-8'))
+        except (OSError, ValueError) as e:
+            logger.warning("Manifesto de checkpoints '%s' ilegível (%s). Todas as etapas serão executadas.", caminho, e)
+            return {}
+        if dados.get('versao') != VERSAO_CHECKPOINTS:
+            return {}
+        return dados.get('etapas', {})
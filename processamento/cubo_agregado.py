@@ -0,0 +1,141 @@
+# processamento/cubo_agregado.py
+import logging
+import os
+import re
+
+import pandas as pd
+
+from config.config import CONFIG
+from utils.instrumentacao import instrumentar
+
+logger = logging.getLogger(__name__)
+
+# Período (ano, PPA) da partição de origem: numa base com vários períodos, o mesmo mês de anos
+# diferentes fica em células distintas. Os dashboards usam um período por vez (ver `selecionar_periodo`).
+DIMENSOES_PERIODO = ['ANO_REFERENCIA', 'PPA_REFERENCIA']
+DIMENSOES_CUBO = DIMENSOES_PERIODO + ['UNIDADE_FINAL', 'tipo_projeto', 'PROJETO', 'ACAO', 'NATUREZA_FINAL', 'MES']
+CHAVES_LINHA_ORCAMENTARIA = DIMENSOES_CUBO[:-1]
+MOTORES_AGREGACAO = ('pandas', 'duckdb')
+# Formato aceito em DUCKDB_MEMORIA, como "4GB", "512 MiB" ou "1.5GB".
+PADRAO_MEMORIA_DUCKDB = re.compile(r'^\d+(\.\d+)?\s*[KMGT]i?B$', re.IGNORECASE)
+
+
+@instrumentar("cubo_agregado")
+def construir_cubo_agregado(df_base: pd.DataFrame, motor: str | None = None) -> pd.DataFrame:
+    """
+    Agrega a base processada uma única vez por (período, unidade, tipo, projeto, ação, natureza, mês).
+
+    Além das somas de Planejado/Executado, cada célula guarda:
+      - 'Saldo_Positivo': soma dos saldos (Planejado - Executado) positivos linha a linha;
+      - 'Primeiro_Mes_Planejado' / 'Primeiro_Mes_Executado': se aquele mês é o primeiro
+        com valor positivo na linha orçamentária (período, unidade, tipo, projeto, ação, natureza).
+
+    Os construtores de gráficos recebem fatias deste cubo com os mesmos nomes de coluna
+    da base, de modo que o custo de gerar todos os dashboards passa a depender do número
+    de células e não de linhas x unidades. Chaves nulas são preservadas (dropna=False)
+    para que os totais batam com a base.
+
+    `motor` (ou a variável de ambiente MOTOR_AGREGACAO) escolhe quem executa a agregação:
+    'pandas' (padrão) ou 'duckdb', que roda o mesmo cálculo em SQL com vários núcleos e
+    despejo em disco quando a base não cabe na memória. Os dois produzem o mesmo cubo
+    (ver utils/verificar_motor_agregacao.py).
+    """
+    motor = (motor or os.getenv("MOTOR_AGREGACAO", "pandas")).strip().lower()
+    if motor not in MOTORES_AGREGACAO:
+        raise ValueError(f"Motor de agregação desconhecido: '{motor}'. Opções: {', '.join(MOTORES_AGREGACAO)}.")
+    ausentes = [col for col in DIMENSOES_CUBO if col not in df_base.columns]
+    if ausentes:
+        raise KeyError(f"Colunas ausentes na base para o cubo agregado: {', '.join(ausentes)}.")
+
+    if motor == 'duckdb':
+        try:
+            cubo = _construir_cubo_duckdb(df_base)
+        except ImportError:
+            logger.warning("MOTOR_AGREGACAO=duckdb, mas o pacote 'duckdb' não está instalado. Usando pandas.")
+            motor = 'pandas'
+    if motor == 'pandas':
+        cubo = _construir_cubo_pandas(df_base)
+
+    logger.info("Cubo agregado construído (%s): %d células a partir de %d linhas.", motor, len(cubo), len(df_base))
+    return cubo
+
+
+def _construir_cubo_pandas(df_base: pd.DataFrame) -> pd.DataFrame:
+    saldo = df_base['Valor_Planejado'].fillna(0) - df_base['Valor_Executado'].fillna(0)
+    df = df_base[DIMENSOES_CUBO].assign(
+        Valor_Planejado=df_base['Valor_Planejado'],
+        Valor_Executado=df_base['Valor_Executado'],
+        Saldo_Positivo=saldo.where(saldo > 0, 0.0),
+        planejado_positivo=df_base['Valor_Planejado'] > 0,
+        executado_positivo=df_base['Valor_Executado'] > 0,
+    )
+
+    cubo = df.groupby(DIMENSOES_CUBO, dropna=False).agg(
+        Valor_Planejado=('Valor_Planejado', 'sum'),
+        Valor_Executado=('Valor_Executado', 'sum'),
+        Saldo_Positivo=('Saldo_Positivo', 'sum'),
+        planejado_positivo=('planejado_positivo', 'any'),
+        executado_positivo=('executado_positivo', 'any'),
+    ).reset_index()
+
+    chaves = [cubo[col] for col in CHAVES_LINHA_ORCAMENTARIA]
+    for marcador, coluna_flag in (('Primeiro_Mes_Planejado', 'planejado_positivo'), ('Primeiro_Mes_Executado', 'executado_positivo')):
+        meses_validos = cubo['MES'].where(cubo.pop(coluna_flag))
+        primeiro_mes = meses_validos.groupby(chaves, dropna=False).transform('min')
+        cubo[marcador] = meses_validos.eq(primeiro_mes)
+    return cubo
+
+
+def _configuracao_duckdb() -> dict[str, str]:
+    """Opções da conexão DuckDB: despejo em 'cache/duckdb_tmp' e o limite de memória de DUCKDB_MEMORIA, se definido."""
+    configuracao = {'temp_directory': (CONFIG.paths.cache_dir / "duckdb_tmp").as_posix()}
+    if memoria := os.getenv("DUCKDB_MEMORIA", "").strip():
+        if not PADRAO_MEMORIA_DUCKDB.match(memoria):
+            raise ValueError(f"DUCKDB_MEMORIA inválido: '{memoria}'. Use um tamanho como '4GB' ou '512MiB'.")
+        configuracao['memory_limit'] = memoria
+    return configuracao
+
+
+def _construir_cubo_duckdb(df_base: pd.DataFrame) -> pd.DataFrame:
+    """
+    Mesmo cálculo de `_construir_cubo_pandas` em SQL no DuckDB, lendo o DataFrame sem cópia.
+
+    As regras do pandas são reproduzidas explicitamente: soma de grupo só com nulos é 0,
+    comparação com nulo é falsa, chaves nulas formam um grupo e o resultado sai ordenado
+    pelas dimensões com nulos por último.
+    """
+    import duckdb
+
+    dims = ", ".join(f'"{col}"' for col in DIMENSOES_CUBO)
+    chaves = ", ".join(f'"{col}"' for col in CHAVES_LINHA_ORCAMENTARIA)
+    ordem = ", ".join(f'"{col}" ASC NULLS LAST' for col in DIMENSOES_CUBO)
+    sql = f"""
+        WITH celulas AS (
+            SELECT {dims},
+                   COALESCE(SUM("Valor_Planejado"), 0) AS "Valor_Planejado",
+                   COALESCE(SUM("Valor_Executado"), 0) AS "Valor_Executado",
+                   COALESCE(SUM(GREATEST(COALESCE("Valor_Planejado", 0) - COALESCE("Valor_Executado", 0), 0)), 0) AS "Saldo_Positivo",
+                   COALESCE(BOOL_OR("Valor_Planejado" > 0), FALSE) AS planejado_positivo,
+                   COALESCE(BOOL_OR("Valor_Executado" > 0), FALSE) AS executado_positivo
+            FROM base
+            GROUP BY {dims}
+        )
+        SELECT {dims}, "Valor_Planejado", "Valor_Executado", "Saldo_Positivo",
+               COALESCE(planejado_positivo AND "MES" = MIN(CASE WHEN planejado_positivo THEN "MES" END) OVER (PARTITION BY {chaves}), FALSE) AS "Primeiro_Mes_Planejado",
+               COALESCE(executado_positivo AND "MES" = MIN(CASE WHEN executado_positivo THEN "MES" END) OVER (PARTITION BY {chaves}), FALSE) AS "Primeiro_Mes_Executado"
+        FROM celulas
+        ORDER BY {ordem}
+    """
+
+    with duckdb.connect(config=_configuracao_duckdb()) as con:
+        con.register('base', df_base[DIMENSOES_CUBO + ['Valor_Planejado', 'Valor_Executado']])
+        cubo = con.execute(sql).df()
+
+    # Devolve às dimensões os tipos da base (ex.: textos como object, mês inteiro).
+    for col in DIMENSOES_CUBO:
+        if cubo[col].dtype != df_base[col].dtype:
+            try:
+                cubo[col] = cubo[col].astype(df_base[col].dtype)
+            except (TypeError, ValueError):
+                pass
+    return cubo
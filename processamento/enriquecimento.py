@@ -1,11 +1,13 @@
 # processamento/enriquecimento.py
 import logging
 import pandas as pd
+from utils.instrumentacao import instrumentar
 
 logger = logging.getLogger(__name__)
 
 CHAVES_MERGE = ["PROJETO", "ACAO", "UNIDADE", "ANO"]
 
+@instrumentar("enriquecimento")
 def enriquecer_orcado_com_cc(
     df_orcado_pronto: pd.DataFrame, df_cc_pronto: pd.DataFrame
 ) -> pd.DataFrame:
@@ -1,14 +1,18 @@
 # processamento/extracao.py (VERSÃO REATORADA)
 import logging
+from typing import TYPE_CHECKING
 from pathlib import Path
 
 import pandas as pd
-from sqlalchemy.engine import Engine
 
 # Importações do projeto
 from config.config import CONFIG
 from config.database import get_conexao
 from utils.utils import carregar_script_sql
+from utils.instrumentacao import instrumentar
+
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Engine
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +21,7 @@ TABELA_ORCADO_CACHE = "orcado_nacional_raw"
 TABELA_CC_CACHE = "cc_estrutura_raw"
 
 
+@instrumentar("extracao")
 def obter_dados_brutos() -> tuple[pd.DataFrame, pd.DataFrame]:
     """
     Obtém os DataFrames BRUTOS do Orçado e da Estrutura de CC, otimizando
@@ -89,7 +94,7 @@ def _buscar_dados_hubdados_sql_raw() -> pd.DataFrame:
 
 
 # << ALTERAÇÃO 3: A função agora aceita o 'engine' como parâmetro >>
-def _salvar_dados_no_cache(df_orcado: pd.DataFrame, df_cc: pd.DataFrame, engine_cache: Engine) -> None:
+def _salvar_dados_no_cache(df_orcado: pd.DataFrame, df_cc: pd.DataFrame, engine_cache: "Engine") -> None:
     """Salva os DataFrames brutos no cache SQLite."""
     df_orcado.to_sql(
         TABELA_ORCADO_CACHE, engine_cache, if_exists="replace", index=False
@@ -99,7 +104,7 @@ def _salvar_dados_no_cache(df_orcado: pd.DataFrame, df_cc: pd.DataFrame, engine_
 
 
 # << ALTERAÇÃO 4: A função agora aceita o 'engine' como parâmetro >>
-def _carregar_dados_do_cache(tabela: str, engine_cache: Engine) -> pd.DataFrame:
+def _carregar_dados_do_cache(tabela: str, engine_cache: "Engine") -> pd.DataFrame:
     """Carrega uma tabela específica do cache SQLite usando uma conexão existente."""
     return pd.read_sql(tabela, engine_cache)
 
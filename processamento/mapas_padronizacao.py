@@ -0,0 +1,155 @@
+# processamento/mapas_padronizacao.py
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from config.config import CONFIG
+
+logger = logging.getLogger(__name__)
+
+VERSAO_COMPILACAO = 1
+
+# nome do mapa -> (atributo em CONFIG.paths, coluna de origem, coluna de destino)
+DEFINICOES_MAPAS = {
+    'unidade': ('unidade_csv', 'nm_unidade_padronizada', 'final'),
+    'natureza': ('natureza_csv', 'Descricao_Natureza_Orcamentaria', 'Descricao_Natureza_Orcamentaria_FINAL'),
+}
+
+# Cache em memória: nome do mapa -> (assinatura rápida do CSV, conteúdo compilado)
+_MAPAS_COMPILADOS: dict[str, tuple[tuple[int, int], dict]] = {}
+
+
+def carregar_mapa(nome: str) -> dict:
+    """
+    Retorna o mapa de padronização `nome` ('unidade' ou 'natureza').
+
+    O CSV só é lido e compilado quando muda. A assinatura rápida (mtime/tamanho)
+    evita qualquer leitura; se ela mudar, o hash do conteúdo decide se é preciso
+    recompilar. O resultado compilado fica em 'cache/mapa_<nome>.json'.
+    """
+    return _obter_compilado(nome)['mapa']
+
+
+def carregar_mapa_unidade() -> dict:
+    return carregar_mapa('unidade')
+
+
+def carregar_mapa_natureza() -> dict:
+    return carregar_mapa('natureza')
+
+
+def validar_mapas_padronizacao() -> dict[str, dict[str, list]]:
+    """
+    Retorna, por mapa, as chaves com regras conflitantes (mesma origem
+    padronizada apontando para destinos diferentes). Vale a última regra do CSV.
+    """
+    relatorio = {}
+    for nome in DEFINICOES_MAPAS:
+        conflitos = _obter_compilado(nome)['conflitos']
+        relatorio[nome] = conflitos
+        for chave, destinos in conflitos.items():
+            logger.warning("Mapa '%s': regra conflitante para '%s' -> %s (vale '%s').", nome, chave, destinos, destinos[-1])
+    return relatorio
+
+
+def _obter_compilado(nome: str) -> dict:
+    atributo_caminho, _, _ = DEFINICOES_MAPAS[nome]
+    caminho_csv: Path = getattr(CONFIG.paths, atributo_caminho)
+    if not caminho_csv.exists():
+        logger.warning("Arquivo '%s' não encontrado.", caminho_csv.name)
+        return {'mapa': {}, 'conflitos': {}}
+
+    stat = caminho_csv.stat()
+    assinatura = (stat.st_mtime_ns, stat.st_size)
+
+    em_memoria = _MAPAS_COMPILADOS.get(nome)
+    if em_memoria and em_memoria[0] == assinatura:
+        return em_memoria[1]
+
+    caminho_compilado = CONFIG.paths.cache_dir / f"mapa_{nome}.json"
+    compilado = _ler_compilado(caminho_compilado)
+
+    if compilado and (compilado['mtime_ns'], compilado['tamanho']) == assinatura:
+        logger.debug("Mapa '%s' reaproveitado do cache compilado.", nome)
+    else:
+        sha256 = hashlib.sha256(caminho_csv.read_bytes()).hexdigest()
+        if compilado and compilado['sha256'] == sha256:
+            logger.debug("Mapa '%s': arquivo tocado mas sem alterações de conteúdo.", nome)
+        else:
+            try:
+                compilado = _compilar_mapa(nome, caminho_csv)
+                compilado['sha256'] = sha256
+                logger.info("Mapa de %s compilado com %d regras.", nome, len(compilado['mapa']))
+                for chave, destinos in compilado['conflitos'].items():
+                    logger.warning("Mapa '%s': regra conflitante para '%s' -> %s (vale '%s').", nome, chave, destinos, destinos[-1])
+            except Exception as e:
+                if not compilado:
+                    logger.error(f"Falha crítica ao compilar o mapa de {nome}: {e}")
+                    return {'mapa': {}, 'conflitos': {}}
+                # A versão anterior vale só nesta execução: gravá-la com a assinatura do CSV novo
+                # faria as próximas execuções reaproveitá-la sem tentar compilar de novo.
+                logger.error(f"Falha ao recompilar o mapa de {nome} ({e}). Mantendo a última versão válida.")
+                _MAPAS_COMPILADOS[nome] = (assinatura, compilado)
+                return compilado
+        compilado['mtime_ns'], compilado['tamanho'] = assinatura
+        _salvar_compilado(caminho_compilado, compilado)
+
+    _MAPAS_COMPILADOS[nome] = (assinatura, compilado)
+    return compilado
+
+
+def _compilar_mapa(nome: str, caminho_csv: Path) -> dict:
+    _, coluna_origem, coluna_destino = DEFINICOES_MAPAS[nome]
+    df = pd.read_csv(caminho_csv, sep=';', encoding='utf-8-sig', on_bad_lines='warn')
+    df['chave_std'] = df[coluna_origem].astype(str).str.strip().str.upper()
+    df[coluna_destino] = df[coluna_destino].astype(object).where(df[coluna_destino].notna(), None)
+
+    # keep='last' deixa cada lista ordenada pela última ocorrência, então o destino vigente é o último.
+    destinos_por_chave = df.drop_duplicates(subset=['chave_std', coluna_destino], keep='last').groupby('chave_std', sort=False)[coluna_destino].agg(list)
+    conflitos = {chave: [_valor_nativo(d) for d in destinos] for chave, destinos in destinos_por_chave.items() if len(destinos) > 1}
+
+    # Mesma semântica de antes: em chaves repetidas, vale a última ocorrência do CSV.
+    df_unico = df.drop_duplicates(subset=['chave_std'], keep='last')
+    return {
+        'versao': VERSAO_COMPILACAO,
+        'arquivo': caminho_csv.name,
+        'mapa': {chave: _valor_nativo(destino) for chave, destino in zip(df_unico['chave_std'], df_unico[coluna_destino])},
+        'conflitos': conflitos,
+    }
+
+
+def _valor_nativo(valor):
+    """Escalares do numpy (ex.: np.int64 de uma coluna numérica) viram tipos do Python, serializáveis em JSON."""
+    return valor.item() if isinstance(valor, np.generic) else valor
+
+
+def _ler_compilado(caminho: Path) -> dict | None:
+    if not caminho.exists():
+        return None
+    try:
+        with open(caminho, 'r', encoding='utf-8') as f:
+            compilado = json.load(f)
+        return compilado if compilado.get('versao') == VERSAO_COMPILACAO else None
+    except (OSError, ValueError) as e:
+        logger.warning("Cache compilado '%s' ilegível (%s). Será recriado.", caminho.name, e)
+        return None
+
+
+def _salvar_compilado(caminho: Path, compilado: dict) -> None:
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    caminho_tmp = caminho.with_suffix('.tmp')
+    with open(caminho_tmp, 'w', encoding='utf-8') as f:
+        json.dump(compilado, f, ensure_ascii=False, indent=1)
+    os.replace(caminho_tmp, caminho)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    relatorio = validar_mapas_padronizacao()
+    total = sum(len(c) for c in relatorio.values())
+    print(f"\n{total} regra(s) conflitante(s) encontrada(s).")
@@ -0,0 +1,60 @@
+# processamento/particionamento.py
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+class ParticaoUnidades:
+    """
+    Visão da base (ou do cubo agregado) particionada por unidade e tipo de projeto.
+
+    A base é ordenada uma única vez por (UNIDADE_FINAL, tipo_projeto) com ordenação
+    estável, então cada unidade, e dentro dela cada bloco Exclusivo/Compartilhado,
+    ocupa um intervalo contíguo de linhas. Os blocos são entregues por fatiamento
+    posicional (`iloc`), sem varrer a base nem copiar dados. Os blocos devem ser
+    tratados como somente leitura.
+    """
+    def __init__(self, df: pd.DataFrame, coluna_unidade: str = 'UNIDADE_FINAL', coluna_tipo: str = 'tipo_projeto'):
+        self.coluna_unidade = coluna_unidade
+        self.coluna_tipo = coluna_tipo
+        self.df = df.sort_values([coluna_unidade, coluna_tipo], kind='stable', na_position='last').reset_index(drop=True)
+
+        tamanhos = self.df.groupby([coluna_unidade, coluna_tipo], sort=False, dropna=False).size()
+        fins = np.cumsum(tamanhos.to_numpy())
+        inicios = fins - tamanhos.to_numpy()
+
+        self._blocos: dict[tuple[str, str], tuple[int, int]] = {}
+        self._unidades: dict[str, tuple[int, int]] = {}
+        for (unidade, tipo), inicio, fim in zip(tamanhos.index, inicios.tolist(), fins.tolist()):
+            self._blocos[(unidade, tipo)] = (inicio, fim)
+            inicio_unidade, _ = self._unidades.get(unidade, (inicio, fim))
+            self._unidades[unidade] = (inicio_unidade, fim)
+
+        logger.debug("Base particionada em %d unidades / %d blocos.", len(self._unidades), len(self._blocos))
+
+    @property
+    def unidades(self) -> list[str]:
+        return list(self._unidades)
+
+    def __contains__(self, unidade: str) -> bool:
+        return unidade in self._unidades
+
+    def intervalo(self, unidade: str, tipo: str | None = None) -> tuple[int, int]:
+        """Retorna o intervalo [início, fim) de linhas da unidade (ou do seu bloco `tipo`)."""
+        if tipo is None:
+            return self._unidades.get(unidade, (0, 0))
+        return self._blocos.get((unidade, tipo), (0, 0))
+
+    def bloco(self, unidade: str, tipo: str | None = None) -> pd.DataFrame:
+        """Linhas da unidade (opcionalmente só de um tipo de projeto). Unidade ausente gera um DataFrame vazio."""
+        inicio, fim = self.intervalo(unidade, tipo)
+        return self.df.iloc[inicio:fim]
+
+    def exclusivos(self, unidade: str) -> pd.DataFrame:
+        return self.bloco(unidade, 'Exclusivo')
+
+    def compartilhados(self, unidade: str) -> pd.DataFrame:
+        return self.bloco(unidade, 'Compartilhado')
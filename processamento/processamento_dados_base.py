@@ -1,20 +1,22 @@
 # processamento_dados_base.py
+import hashlib
 import logging
 import os
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
 from pathlib import Path
 import pandas as pd
 import numpy as np
 
 try:
     from config.logger_config import configurar_logger
-    from config.inicializacao import carregar_drivers_externos
 except ImportError:
     logging.basicConfig(level=logging.INFO)
     logger = logging.getLogger(__name__)
-    logger.warning("Não foi possível importar logger_config ou inicializacao.")
+    logger.warning("Não foi possível importar logger_config.")
     def configurar_logger(name): return logging.getLogger(name)
-    def carregar_drivers_externos(): pass
 
 logger = logging.getLogger(__name__)
 
@@ -25,80 +27,259 @@ except ImportError:
     sys.exit(1)
 
 from config.database import get_conexao
+from processamento.mapas_padronizacao import carregar_mapa_natureza, carregar_mapa_unidade
+from utils.instrumentacao import instrumentar
 
-def formatar_brl(valor):
+# Regra do formato "R$ x.xx M" / "R$ x.x k" / "R$ x.xx", compartilhada pelas versões escalar e vetorizada:
+# (limite inferior do valor absoluto, divisor, formato, sufixo), da maior faixa para a menor. Nulos e zeros viram "R$ 0".
+FAIXAS_BRL = (
+    (1_000_000, 1_000_000, ".2f", " M"),
+    (1_000, 1_000, ".1f", " k"),
+    (0, 1, ",.2f", ""),
+)
+
+def formatar_brl(valor) -> str:
     if pd.isna(valor) or valor == 0: return "R$ 0"
-    if abs(valor) >= 1_000_000: return f"R$ {(valor / 1_000_000):.2f} M"
-    if abs(valor) >= 1_000: return f"R$ {(valor / 1_000):.1f} k"
-    return f"R$ {valor:,.2f}"
+    for limite, divisor, formato, sufixo in FAIXAS_BRL:
+        if abs(valor) >= limite:
+            return f"R$ {format(valor / divisor, formato)}{sufixo}"
+
+def formatar_brl_series(valores: pd.Series) -> pd.Series:
+    """
+    Formata uma Series inteira como `formatar_brl`, de uma só vez. O índice da entrada é preservado.
+    """
+    numeros = pd.to_numeric(pd.Series(valores), errors='coerce')
+    arr = numeros.to_numpy(dtype=float, na_value=np.nan)
+    absolutos = np.abs(arr)
+
+    resultado = np.full(arr.shape, "R$ 0", dtype=object)
+    limite_superior = np.inf
+    for limite, divisor, formato, sufixo in FAIXAS_BRL:
+        mascara = (absolutos >= limite) & (absolutos < limite_superior) & (arr != 0)
+        limite_superior = limite
+        if not mascara.any():
+            continue
+        textos = np.char.mod("%" + formato.lstrip(','), arr[mascara] / divisor)
+        if formato.startswith(','):
+            # Abaixo de 1.000 só o arredondamento (999.999 -> 1000.00) chega a ter separador de milhar.
+            textos = np.where(np.char.lstrip(textos, '-') == "1000.00", np.char.replace(textos, "1000", "1,000"), textos)
+        resultado[mascara] = np.char.add(np.char.add("R$ ", textos), sufixo).astype(object)
+
+    return pd.Series(resultado, index=numeros.index)
 
 def carregar_mapas_padronizacao() -> tuple[dict, dict]:
+    """Mantido por compatibilidade: prefira `carregar_mapa_unidade`/`carregar_mapa_natureza`, que carregam só o necessário."""
     logger.info("Carregando arquivos de mapeamento para padronização...")
-    mapa_unidade, mapa_natureza = {}, {}
-    try:
-        unidade_csv_path = CONFIG.paths.unidade_csv 
-        if unidade_csv_path.exists():
-            df_unidade = pd.read_csv(unidade_csv_path, sep=';', encoding='utf-8-sig', on_bad_lines='warn')
-            df_unidade['nm_unidade_padronizada_std'] = df_unidade['nm_unidade_padronizada'].astype(str).str.strip().str.upper()
-            mapa_unidade = pd.Series(df_unidade['final'].values, index=df_unidade['nm_unidade_padronizada_std']).to_dict()
-            logger.info("Mapa de unidades carregado com %d regras.", len(mapa_unidade))
-        else:
-            logger.warning("Arquivo 'UNIDADE.CSV' não encontrado.")
-
-        natureza_csv_path = CONFIG.paths.natureza_csv 
-        if natureza_csv_path.exists():
-            df_natureza = pd.read_csv(natureza_csv_path, sep=';', encoding='utf-8-sig', on_bad_lines='warn')
-            df_natureza['Descricao_Natureza_Orcamentaria_std'] = df_natureza['Descricao_Natureza_Orcamentaria'].astype(str).str.strip().str.upper()
-            df_natureza.drop_duplicates(subset=['Descricao_Natureza_Orcamentaria_std'], keep='last', inplace=True)
-            mapa_natureza = pd.Series(df_natureza['Descricao_Natureza_Orcamentaria_FINAL'].values, index=df_natureza['Descricao_Natureza_Orcamentaria_std']).to_dict()
-            logger.info("Mapa de naturezas carregado com %d regras.", len(mapa_natureza))
+    return carregar_mapa_unidade(), carregar_mapa_natureza()
+
+Periodo = tuple[int, str]
+
+SQL_VIEW_BASE = "SELECT * FROM dbo.vw_Analise_Planejado_vs_Executado_v2(?, ?, ?)"
+# v2: registra o número de linhas, para que uma partição vazia também conste do cache.
+TABELA_METADADOS_PARTICOES = "particoes_metadados_v2"
+MAX_WORKERS_PARTICOES = 4
+
+
+def obter_periodos_configurados() -> list[Periodo]:
+    """
+    Lê do .env os pares (ano, PPA) a processar.
+
+    'PERIODOS_FILTRO' aceita vários pares no formato "2024|PPA 2024 - 2024/DEZ;2025|PPA 2025 - 2025/DEZ".
+    Na sua ausência, usa o par único 'ANO_FILTRO'/'PPA_FILTRO'.
+    """
+    periodos_str = os.getenv("PERIODOS_FILTRO", "").strip()
+    if not periodos_str:
+        return [(int(os.getenv("ANO_FILTRO", 2025)), os.getenv("PPA_FILTRO", 'PPA 2025 - 2025/DEZ'))]
+
+    periodos = []
+    for item in periodos_str.split(';'):
+        if not item.strip():
+            continue
+        ano_str, separador, ppa = item.partition('|')
+        if not separador or not ppa.strip():
+            raise ValueError(f"Período inválido em 'PERIODOS_FILTRO': '{item}'. Use o formato 'ANO|PPA'.")
+        periodos.append((int(ano_str.strip()), ppa.strip()))
+    return periodos
+
+
+def selecionar_periodo(df_base: pd.DataFrame, periodo: Periodo | None = None) -> tuple[pd.DataFrame, Periodo]:
+    """
+    Restringe a base processada a um único par (ano, PPA), para que os dashboards não somem
+    meses de anos diferentes. Sem `periodo`, usa o último período da base (o último configurado).
+    """
+    unicos = df_base[['ANO_REFERENCIA', 'PPA_REFERENCIA']].drop_duplicates()
+    periodos = [(int(ano), str(ppa)) for ano, ppa in unicos.itertuples(index=False)]
+    if periodo is None:
+        periodo = periodos[-1]
+    elif periodo not in periodos:
+        raise ValueError(f"Período {periodo} não está na base. Disponíveis: {periodos}.")
+    if len(periodos) > 1:
+        logger.info("Base com %d períodos; usando %s. Os demais: %s.", len(periodos), periodo, [p for p in periodos if p != periodo])
+    filtro = (df_base['ANO_REFERENCIA'] == periodo[0]) & (df_base['PPA_REFERENCIA'] == periodo[1])
+    return df_base[filtro].reset_index(drop=True), periodo
+
+
+class BaseParticionada:
+    """
+    Acesso preguiçoso à base da view, particionada por (ano, PPA).
+
+    Cada partição é guardada em sua própria tabela do cache SQLite e só é lida
+    (ou buscada no servidor) quando solicitada. Adicionar um período novo custa
+    apenas a busca daquela partição.
+    """
+    def __init__(self, periodos: list[Periodo], forcar_atualizacao: bool = False):
+        self.periodos = list(dict.fromkeys(periodos))
+        self.forcar_atualizacao = forcar_atualizacao
+        self._engine_cache = get_conexao(CONFIG.conexoes["CacheBase"])
+        self._engine_db = None
+        self._lock_engine_db = threading.Lock()
+        self._carregadas: dict[Periodo, pd.DataFrame] = {}
+
+    @staticmethod
+    def nome_tabela(periodo: Periodo) -> str:
+        ano, ppa = periodo
+        return f"base_{ano}_{hashlib.sha1(ppa.encode('utf-8')).hexdigest()[:10]}"
+
+    def __getitem__(self, periodo: Periodo) -> pd.DataFrame:
+        if periodo not in self._carregadas:
+            linhas = self._linhas_em_cache(periodo)
+            if linhas == 0:
+                logger.info("Partição %s sem dados no servidor (registrada assim no cache local).", periodo)
+                self._carregadas[periodo] = pd.DataFrame()
+            elif linhas is not None:
+                logger.info("Carregando partição %s do cache local...", periodo)
+                self._carregadas[periodo] = pd.read_sql(self.nome_tabela(periodo), self._engine_cache)
+            else:
+                self._salvar_no_cache(periodo, self._buscar_particao(periodo))
+        return self._carregadas[periodo]
+
+    def precarregar(self) -> None:
+        """Busca no servidor, em paralelo, todas as partições ausentes ou vencidas no cache."""
+        pendentes = [p for p in self.periodos if p not in self._carregadas and not self._cache_valido(p)]
+        if not pendentes:
+            return
+
+        logger.info("Buscando %d partição(ões) no servidor em paralelo...", len(pendentes))
+        # Um único engine (e pool de conexões) para todas as threads, criado antes de distribuí-las.
+        self._engine_servidor()
+        with ThreadPoolExecutor(max_workers=min(MAX_WORKERS_PARTICOES, len(pendentes))) as executor:
+            futuros = {executor.submit(self._buscar_particao, periodo): periodo for periodo in pendentes}
+            for futuro in as_completed(futuros):
+                # A escrita no SQLite fica na thread principal para evitar concorrência no arquivo.
+                self._salvar_no_cache(futuros[futuro], futuro.result())
+
+    def _cache_valido(self, periodo: Periodo) -> bool:
+        return self._linhas_em_cache(periodo) is not None
+
+    def _linhas_em_cache(self, periodo: Periodo) -> int | None:
+        """Linhas da partição no cache local (0 se ela veio vazia do servidor), ou None se ausente ou vencida."""
+        if self.forcar_atualizacao:
+            return None
+        from sqlalchemy.exc import DBAPIError
+
+        try:
+            metadados = pd.read_sql(
+                f"SELECT linhas, carregado_em FROM {TABELA_METADADOS_PARTICOES} WHERE tabela = ?",
+                self._engine_cache, params=(self.nome_tabela(periodo),)
+            )
+            if metadados.empty:
+                return None
+            linhas = int(metadados['linhas'].iloc[0])
+            carregado_em = datetime.fromisoformat(metadados['carregado_em'].iloc[0])
+        except (DBAPIError, OSError, ValueError, TypeError) as e:
+            # Cache novo (sem a tabela de metadados) ou registro ilegível: a partição é buscada de novo.
+            logger.debug("Metadados da partição %s indisponíveis no cache local (%s).", periodo, e)
+            return None
+        validade_horas = float(os.getenv("CACHE_BASE_VALIDADE_HORAS", 12))
+        return linhas if datetime.now() - carregado_em < timedelta(hours=validade_horas) else None
+
+    def _engine_servidor(self):
+        with self._lock_engine_db:
+            if self._engine_db is None:
+                self._engine_db = get_conexao(CONFIG.conexoes["FINANCA_SQL"])
+            return self._engine_db
+
+    def _buscar_particao(self, periodo: Periodo) -> pd.DataFrame:
+        ano, ppa = periodo
+        params = (f'{ano}-01-01', f'{ano}-12-31', ppa)
+        logger.info("Carregando partição %s da view (com natureza já padronizada)...", periodo)
+        df = pd.read_sql(SQL_VIEW_BASE, self._engine_servidor(), params=params)
+        logger.info("Partição %s: %d linhas carregadas.", periodo, len(df))
+        return df
+
+    def _salvar_no_cache(self, periodo: Periodo, df: pd.DataFrame) -> None:
+        self._carregadas[periodo] = df
+        tabela = self.nome_tabela(periodo)
+        if df.empty:
+            # Só os metadados (com 0 linhas) marcam a partição vazia: ela não é buscada de novo até vencer.
+            logger.warning("A partição %s não retornou dados; registrada como vazia no cache local.", periodo)
+            with self._engine_cache.begin() as conn:
+                conn.exec_driver_sql(f"DROP TABLE IF EXISTS {tabela}")
         else:
-            logger.warning("Arquivo 'NATUREZA.csv' não encontrado.")
-    except Exception as e:
-        logger.error(f"Falha crítica ao carregar os mapas de padronização: {e}")
-    return mapa_unidade, mapa_natureza
+            df.to_sql(tabela, self._engine_cache, if_exists="replace", index=False)
+            logger.info("Partição %s salva no cache local (tabela '%s').", periodo, tabela)
+        with self._engine_cache.begin() as conn:
+            conn.exec_driver_sql(
+                f"CREATE TABLE IF NOT EXISTS {TABELA_METADADOS_PARTICOES} "
+                "(tabela TEXT PRIMARY KEY, ano INTEGER, ppa TEXT, linhas INTEGER, carregado_em TEXT)"
+            )
+            conn.exec_driver_sql(
+                f"INSERT OR REPLACE INTO {TABELA_METADADOS_PARTICOES} VALUES (?, ?, ?, ?, ?)",
+                (tabela, periodo[0], periodo[1], len(df), datetime.now().isoformat()),
+            )
+
+
+def _padronizar_particao(df_base: pd.DataFrame, periodo: Periodo, mapa_unidade: dict) -> pd.DataFrame:
+    """Aplica a padronização de unidade e a categorização de projetos a uma partição."""
+    df_base = df_base.copy()
+    df_base['ANO_REFERENCIA'], df_base['PPA_REFERENCIA'] = periodo
 
-def obter_dados_processados() -> pd.DataFrame | None:
+    # Padronização da UNIDADE continua sendo feita aqui
+    df_base['nm_unidade_padronizada'] = df_base['UNIDADE'].astype(str).str.replace('SP - ', '', regex=False).str.strip().str.upper()
+    df_base['UNIDADE_FINAL'] = df_base['nm_unidade_padronizada'].map(mapa_unidade).fillna(df_base['nm_unidade_padronizada'])
+
+    # A padronização da NATUREZA foi REMOVIDA, pois a coluna NATUREZA_FINAL já vem pronta do SQL
+
+    # 'tipo_projeto' é calculado dentro do período: um projeto pode mudar de categoria entre anos
+    unidades_por_projeto = df_base.groupby('PROJETO')['nm_unidade_padronizada'].nunique()
+    df_base['tipo_projeto'] = df_base['PROJETO'].map(unidades_por_projeto).apply(lambda x: 'Compartilhado' if x > 1 else 'Exclusivo')
+
+    # Remove colunas intermediárias/originais para manter a base limpa
+    colunas_para_remover = ['UNIDADE', 'nm_unidade_padronizada']
+    return df_base.drop(columns=[col for col in colunas_para_remover if col in df_base.columns])
+
+
+@instrumentar("base_processada")
+def obter_dados_processados(
+    periodos: list[Periodo] | None = None, forcar_atualizacao: bool = False
+) -> pd.DataFrame | None:
+    """
+    Carrega e padroniza a base de análise para um ou mais pares (ano, PPA).
+
+    Sem 'periodos', usa os configurados no .env (ver `obter_periodos_configurados`).
+    Cada partição é buscada em paralelo e guardada separadamente no cache local.
+    """
     configurar_logger("processamento_base.log")
-    carregar_drivers_externos()
-    
+
     # Carrega apenas o mapa de unidades, a natureza já vem tratada do banco.
-    mapa_unidade, _ = carregar_mapas_padronizacao()
+    mapa_unidade = carregar_mapa_unidade()
 
     try:
-        engine_db = get_conexao(CONFIG.conexoes["FINANCA_SQL"])
-        PPA_FILTRO = os.getenv("PPA_FILTRO", 'PPA 2025 - 2025/DEZ')
-        ANO_FILTRO = int(os.getenv("ANO_FILTRO", 2025))
-        
-        # A VIEW/Function agora retorna a coluna 'NATUREZA_FINAL' diretamente
-        sql_query = "SELECT * FROM dbo.vw_Analise_Planejado_vs_Executado_v2(?, ?, ?)"
-        params = (f'{ANO_FILTRO}-01-01', f'{ANO_FILTRO}-12-31', PPA_FILTRO)
-        
-        logger.info("Carregando dados base da view (com natureza já padronizada)...")
-        df_base = pd.read_sql(sql_query, engine_db, params=params)
-        logger.info("%d linhas carregadas.", len(df_base))
-
-        if df_base.empty:
-            logger.warning("A consulta não retornou dados.")
-            return df_base
+        periodos = periodos or obter_periodos_configurados()
+        base = BaseParticionada(periodos, forcar_atualizacao=forcar_atualizacao)
+        base.precarregar()
 
         logger.info("Iniciando padronização e categorização dos dados...")
-        
-        # Padronização da UNIDADE continua sendo feita aqui
-        df_base['nm_unidade_padronizada'] = df_base['UNIDADE'].astype(str).str.replace('SP - ', '', regex=False).str.strip().str.upper()
-        df_base['UNIDADE_FINAL'] = df_base['nm_unidade_padronizada'].map(mapa_unidade).fillna(df_base['nm_unidade_padronizada'])
-        
-        # A padronização da NATUREZA foi REMOVIDA, pois a coluna NATUREZA_FINAL já vem pronta do SQL
-        
-        # O groupby para 'tipo_projeto' continua igual
-        unidades_por_projeto = df_base.groupby('PROJETO')['nm_unidade_padronizada'].nunique()
-        df_base['tipo_projeto'] = df_base['PROJETO'].map(unidades_por_projeto).apply(lambda x: 'Compartilhado' if x > 1 else 'Exclusivo')
-        
-        # Remove colunas intermediárias/originais para manter a base limpa
-        colunas_para_remover = ['UNIDADE', 'nm_unidade_padronizada']
-        df_base.drop(columns=[col for col in colunas_para_remover if col in df_base.columns], inplace=True)
-        
-        logger.info("Processamento da base de dados (Python) concluído.")
+        particoes = [
+            _padronizar_particao(base[periodo], periodo, mapa_unidade)
+            for periodo in base.periodos if not base[periodo].empty
+        ]
+        if not particoes:
+            logger.warning("A consulta não retornou dados.")
+            return pd.DataFrame()
+
+        df_base = pd.concat(particoes, ignore_index=True)
+        logger.info("Processamento da base de dados (Python) concluído: %d linhas em %d período(s).", len(df_base), len(particoes))
         return df_base
 
     except Exception as e:
@@ -6,9 +6,11 @@ from typing import Dict
 
 import pandas as pd
 from config.config import CONFIG
+from utils.instrumentacao import instrumentar
 
 logger = logging.getLogger(__name__)
 
+@instrumentar("preparacao")
 def preparar_dados_para_validacao(
     df_raw: pd.DataFrame, chaves_base: list[str], incluir_ano_na_chave: bool = False
 ) -> pd.DataFrame:
@@ -48,6 +50,7 @@ def preparar_dados_para_validacao(
     return df
 
 # ... (o resto do arquivo permanece exatamente como na última versão)
+@instrumentar("correcao")
 def aplicar_mapa_correcoes(df: pd.DataFrame, mapa_correcoes: Dict[str, str]) -> pd.DataFrame:
     if not mapa_correcoes:
         df['CHAVE_CONCAT_original'] = df['CHAVE_CONCAT']
@@ -8,14 +8,13 @@ import plotly.graph_objects as go
 try:
     from config.logger_config import configurar_logger
     configurar_logger("test_script.log")
-    from config.inicializacao import carregar_drivers_externos
-    carregar_drivers_externos()
 except (ImportError, FileNotFoundError) as e:
     logging.basicConfig(level=logging.INFO)
     logging.critical("Falha gravíssima na inicialização: %s", e, exc_info=True)
     sys.exit(1)
 
-from processamento.processamento_dados_base import obter_dados_processados
+from processamento.processamento_dados_base import obter_dados_processados, selecionar_periodo
+from processamento.cubo_agregado import construir_cubo_agregado
 from visualizacao.preparadores_dados import (
     preparar_dados_orcamento_ocioso,
     preparar_dados_execucao_sem_planejamento
@@ -34,11 +33,13 @@ def run_test():
         print("ERRO: A base de dados não pôde ser carregada. Encerrando teste.")
         return
     print("Base de dados carregada com sucesso.")
+    df_base_total, _ = selecionar_periodo(df_base_total)
+    df_cubo = construir_cubo_agregado(df_base_total)
 
     # 2. Isola os dados de uma unidade de teste
     UNIDADE_TESTE = 'ATENDIMENTO AO CLIENTE'
     print(f"\nFiltrando dados para a unidade: '{UNIDADE_TESTE}'...")
-    df_unidade = df_base_total[df_base_total['UNIDADE_FINAL'] == UNIDADE_TESTE].copy()
+    df_unidade = df_cubo[df_cubo['UNIDADE_FINAL'] == UNIDADE_TESTE].copy()
     
     if df_unidade.empty:
         print(f"ERRO: Nenhum dado encontrado para a unidade '{UNIDADE_TESTE}'.")
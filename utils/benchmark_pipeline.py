@@ -0,0 +1,127 @@
+# utils/benchmark_pipeline.py
+"""
+Benchmark das etapas de transformação sobre dados sintéticos (utils/dados_sinteticos.py), sem
+acesso aos bancos: validação (preparação das chaves do Orçado e do CC), aplicação do mapa de
+correções, enriquecimento, padronização da base processada, cubo agregado, cada preparador de
+dados dos dashboards, cada gráfico Plotly e a codificação do JSON, em todas as unidades.
+
+Cada escala roda como uma execução instrumentada 'benchmark_<escala>': as métricas vão para
+'logs/metricas/' e para o histórico de execuções, com o commit atual, e a execução é comparada
+com as anteriores da mesma escala. Para comparar dois commits, rode o benchmark em cada um e use
+    python -m utils.historico_execucoes --pipeline benchmark_10x --commit-base <hash>
+
+Uso (a partir da raiz do projeto):
+    python -m utils.benchmark_pipeline [--escalas 1x,10x] [--semente 0] [--repeticoes 1]
+
+A escala 100x (~8 milhões de linhas na base de análise) precisa de vários GB de memória.
+"""
+import argparse
+import logging
+import sys
+import time
+
+from processamento.cubo_agregado import construir_cubo_agregado
+from processamento.enriquecimento import enriquecer_orcado_com_cc
+from processamento.particionamento import ParticaoUnidades
+from processamento.processamento_dados_base import _padronizar_particao
+from processamento.validacao import aplicar_mapa_correcoes, preparar_dados_para_validacao
+from utils.dados_sinteticos import ESCALAS, gerar_conjunto
+from utils.instrumentacao import etapa, execucao_instrumentada
+from visualizacao import componentes_plotly, preparadores_dados
+from visualizacao.codificacao_json import codificar_dados_graficos
+
+logging.basicConfig(level=logging.WARNING, format="%(message)s")
+
+CHAVES_BASE = ['PROJETO', 'ACAO', 'UNIDADE']
+
+# Preparadores e gráficos de um dashboard, na ordem de gerar_relatorio_para_unidade:
+# (nome da etapa, função, argumentos a partir dos blocos (unidade, exclusivos, compartilhados, nome)).
+PREPARADORES = (
+    ("prep_kpi", preparadores_dados.preparar_dados_kpi, lambda u, e, c, n: (u, e, c, n)),
+    ("prep_tendencia", preparadores_dados.preparar_dados_grafico_tendencia, lambda u, e, c, n: (u,)),
+    ("prep_treemap", preparadores_dados.preparar_dados_treemap, lambda u, e, c, n: (e,)),
+    ("prep_orcamento_ocioso", preparadores_dados.preparar_dados_orcamento_ocioso, lambda u, e, c, n: (u,)),
+    ("prep_sem_planejamento", preparadores_dados.preparar_dados_execucao_sem_planejamento, lambda u, e, c, n: (e, 'Exclusivo')),
+    ("prep_sunburst", preparadores_dados.preparar_dados_sunburst, lambda u, e, c, n: (e,)),
+    ("prep_heatmap", preparadores_dados.preparar_dados_heatmap, lambda u, e, c, n: (e,)),
+    ("prep_inercia", preparadores_dados.preparar_dados_inercia, lambda u, e, c, n: (e,)),
+    ("grafico_sunburst", componentes_plotly.criar_grafico_sunburst, lambda u, e, c, n: (e,)),
+    ("grafico_heatmap", componentes_plotly.criar_grafico_heatmap, lambda u, e, c, n: (e,)),
+    ("grafico_inercia", componentes_plotly.criar_grafico_inercia, lambda u, e, c, n: (e,)),
+)
+
+
+def _sem_instrumentacao(funcao):
+    """A função original de um @instrumentar, para não registrar a etapa duas vezes."""
+    return getattr(funcao, "__wrapped__", funcao)
+
+
+def executar_benchmark(escala: str, semente: int = 0) -> str:
+    """Roda todas as etapas sobre o conjunto sintético da escala. Retorna o id da execução."""
+    inicio = time.perf_counter()
+    dados = gerar_conjunto(ESCALAS[escala], semente)
+    tamanhos = {'Orçado': dados.orcado_nacional, 'CC': dados.estrutura_cc, 'base': dados.base_analise}
+    print(f"[{escala}] dados gerados em {time.perf_counter() - inicio:.1f}s: "
+          + ", ".join(f"{nome} {len(df):,}".replace(",", ".") for nome, df in tamanhos.items()) + " linhas")
+
+    with execucao_instrumentada(f"benchmark_{escala}") as execucao:
+        with etapa("validacao_orcado", linhas_entrada=len(dados.orcado_nacional)) as medicao:
+            df_orcado = _sem_instrumentacao(preparar_dados_para_validacao)(dados.orcado_nacional, CHAVES_BASE, incluir_ano_na_chave=True)
+            medicao.linhas_saida = len(df_orcado)
+        with etapa("validacao_cc", linhas_entrada=len(dados.estrutura_cc)) as medicao:
+            df_cc = _sem_instrumentacao(preparar_dados_para_validacao)(dados.estrutura_cc, CHAVES_BASE, incluir_ano_na_chave=True)
+            medicao.linhas_saida = len(df_cc)
+        with etapa("correcao", linhas_entrada=len(df_orcado)) as medicao:
+            df_orcado = _sem_instrumentacao(aplicar_mapa_correcoes)(df_orcado, dados.mapa_correcoes)
+            medicao.linhas_saida = len(df_orcado)
+        with etapa("enriquecimento", linhas_entrada=len(df_orcado)) as medicao:
+            df_enriquecido = _sem_instrumentacao(enriquecer_orcado_com_cc)(df_orcado, df_cc)
+            medicao.linhas_saida = len(df_enriquecido)
+        with etapa("padronizacao_base", linhas_entrada=len(dados.base_analise)) as medicao:
+            df_base = _padronizar_particao(dados.base_analise, (dados.ano, dados.ppa), dados.mapa_unidade)
+            medicao.linhas_saida = len(df_base)
+        with etapa("cubo_agregado", linhas_entrada=len(df_base)) as medicao:
+            particao = ParticaoUnidades(_sem_instrumentacao(construir_cubo_agregado)(df_base))
+            medicao.linhas_saida = len(particao.df)
+
+        blocos = [(particao.bloco(u), particao.exclusivos(u), particao.compartilhados(u), u) for u in particao.unidades]
+        linhas_cubo = len(particao.df)
+        dados_graficos = {unidade: {} for *_, unidade in blocos}
+        for nome, funcao, argumentos in PREPARADORES:
+            with etapa(nome, linhas_entrada=linhas_cubo):
+                for bloco in blocos:
+                    dados_graficos[bloco[3]][nome] = funcao(*argumentos(*bloco))
+        with etapa("codificacao_json", linhas_entrada=linhas_cubo):
+            for graficos in dados_graficos.values():
+                codificar_dados_graficos({k: v for k, v in graficos.items() if k.startswith("prep_")})
+    return execucao.execucao_id
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark das etapas de transformação sobre dados sintéticos.")
+    parser.add_argument("--escalas", default="1x,10x", help=f"Escalas separadas por vírgula, entre {', '.join(ESCALAS)} (padrão: 1x,10x).")
+    parser.add_argument("--semente", type=int, default=0, help="Semente do gerador; a mesma semente gera os mesmos dados (padrão: 0).")
+    parser.add_argument("--repeticoes", type=int, default=1, help="Execuções por escala, para formar a linha de base mais rápido (padrão: 1).")
+    args = parser.parse_args()
+
+    escalas = [e.strip() for e in args.escalas.split(",") if e.strip()]
+    invalidas = [e for e in escalas if e not in ESCALAS]
+    if invalidas:
+        parser.error(f"escala(s) desconhecida(s): {', '.join(invalidas)}")
+
+    # Mostra o resumo das métricas e os avisos de regressão, mas não os logs de cada etapa do pipeline.
+    for nome in ("utils.instrumentacao", "utils.historico_execucoes"):
+        logging.getLogger(nome).setLevel(logging.INFO)
+
+    from utils.historico_execucoes import comparar_execucao
+    regressoes = 0
+    for escala in escalas:
+        for _ in range(args.repeticoes):
+            execucao_id = executar_benchmark(escala, args.semente)
+        _, comparacoes = comparar_execucao(execucao_id)
+        regressoes += sum(1 for c in comparacoes if c.situacao == 'regressao')
+    sys.exit(1 if regressoes else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# utils/comparar_graficos_plotly.py
+"""
+Compara, por unidade, o custo dos gráficos Sunburst/Heatmap/Inércia gerados como HTML do
+Plotly no Python (forma anterior) com o dos dados agregados enviados ao JS do dashboard.
+
+Uso (a partir da raiz do projeto):
+    python -m utils.comparar_graficos_plotly [--unidades N]
+"""
+import argparse
+import logging
+import sys
+import time
+
+try:
+    from config.logger_config import configurar_logger
+    configurar_logger("comparar_graficos_plotly.log")
+except (ImportError, FileNotFoundError) as e:
+    logging.basicConfig(level=logging.INFO)
+    logging.critical("Falha gravíssima na inicialização: %s", e, exc_info=True)
+    sys.exit(1)
+
+from processamento.processamento_dados_base import obter_dados_processados, selecionar_periodo
+from processamento.cubo_agregado import construir_cubo_agregado
+from processamento.particionamento import ParticaoUnidades
+from visualizacao.componentes_plotly import criar_grafico_sunburst, criar_grafico_heatmap, criar_grafico_inercia
+from visualizacao.preparadores_dados import preparar_dados_sunburst, preparar_dados_heatmap, preparar_dados_inercia
+from visualizacao.codificacao_json import codificar_dados_graficos
+
+GRAFICOS = (
+    ('sunburst', criar_grafico_sunburst, preparar_dados_sunburst),
+    ('heatmap', criar_grafico_heatmap, preparar_dados_heatmap),
+    ('inercia', criar_grafico_inercia, preparar_dados_inercia),
+)
+
+
+def medir_unidade(df_exclusivos) -> dict:
+    """Bytes e milissegundos de cada forma, somados nos três gráficos."""
+    resultado = {'html_bytes': 0, 'html_ms': 0.0, 'json_bytes': 0, 'json_ms': 0.0}
+    for _, criar_html, preparar_dados in GRAFICOS:
+        inicio = time.perf_counter()
+        html = criar_html(df_exclusivos)
+        resultado['html_ms'] += (time.perf_counter() - inicio) * 1000
+        resultado['html_bytes'] += len(html.encode('utf-8'))
+
+        inicio = time.perf_counter()
+        dados = codificar_dados_graficos(preparar_dados(df_exclusivos))
+        resultado['json_ms'] += (time.perf_counter() - inicio) * 1000
+        resultado['json_bytes'] += len(dados.encode('utf-8'))
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara HTML do Plotly gerado no Python com os dados enviados ao JS.")
+    parser.add_argument("--unidades", type=int, default=None, help="Limita às N unidades com mais linhas no cubo.")
+    args = parser.parse_args()
+
+    df_base_total = obter_dados_processados()
+    if df_base_total is None or df_base_total.empty:
+        print("ERRO: A base de dados não pôde ser carregada.")
+        sys.exit(1)
+
+    df_base_total, _ = selecionar_periodo(df_base_total)
+    particao = ParticaoUnidades(construir_cubo_agregado(df_base_total))
+    unidades = sorted(particao.unidades, key=lambda u: len(particao.exclusivos(u)), reverse=True)[:args.unidades]
+
+    print(f"{'UNIDADE':<40} {'HTML (KB)':>10} {'HTML (ms)':>10} {'JSON (KB)':>10} {'JSON (ms)':>10}")
+    totais = {'html_bytes': 0, 'html_ms': 0.0, 'json_bytes': 0, 'json_ms': 0.0}
+    for unidade in unidades:
+        medidas = medir_unidade(particao.exclusivos(unidade))
+        for chave, valor in medidas.items():
+            totais[chave] += valor
+        print(f"{str(unidade)[:40]:<40} {medidas['html_bytes'] / 1024:>10.1f} {medidas['html_ms']:>10.1f} "
+              f"{medidas['json_bytes'] / 1024:>10.1f} {medidas['json_ms']:>10.1f}")
+
+    print("-" * 84)
+    print(f"{'TOTAL':<40} {totais['html_bytes'] / 1024:>10.1f} {totais['html_ms']:>10.1f} "
+          f"{totais['json_bytes'] / 1024:>10.1f} {totais['json_ms']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
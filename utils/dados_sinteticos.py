@@ -0,0 +1,193 @@
+# utils/dados_sinteticos.py
+"""
+Gerador determinístico de dados sintéticos com os esquemas das fontes reais, para benchmarks
+e testes sem acesso aos bancos:
+
+- `gerar_orcado_nacional`: FATOAJUSTADONACIONAL (queries/nacional.sql), com os nomes de coluna
+  do cubo OLAP que `preparar_dados_para_validacao` renomeia;
+- `gerar_estrutura_cc`: saída de queries/cc.sql (centros de custo da estrutura do HubDados);
+- `gerar_base_analise`: saída de dbo.vw_Analise_Planejado_vs_Executado_v2 (queries/CRIA_VIEW.SQL).
+
+As três fontes compartilham o mesmo catálogo de unidades, projetos e ações, então a junção
+Orçado x CC encontra a maioria das chaves; uma fração das linhas do Orçado traz ações com nome
+antigo, que só casam depois de `mapa_correcoes`. A mesma semente e escala geram sempre os mesmos dados.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+ESCALAS = {'1x': 1, '10x': 10, '100x': 100}
+# Volumes da escala 1x, próximos aos de um ano de operação; as escalas multiplicam linhas e projetos.
+VOLUME_1X = {'linhas_orcado': 50_000, 'linhas_base': 80_000, 'projetos': 1_000}
+UNIDADES = 40
+ACOES_POR_PROJETO = 4
+# Fração de projetos compartilhados entre unidades e de linhas do Orçado com ação de nome antigo.
+FRACAO_COMPARTILHADOS = 0.25
+FRACAO_ACOES_ANTIGAS = 0.03
+SUFIXO_ACAO_ANTIGA = " (ANTIGA)"
+
+NATUREZAS = (
+    ('3.1.1.01', 'Pessoal'), ('3.1.1.02', 'Encargos Sociais'), ('3.1.1.03', 'Benefícios Sociais'),
+    ('3.1.2.01', 'Serviços Especializados'), ('3.1.2.02', 'Serviços Contratados'),
+    ('3.1.2.03', 'Encargos Sociais S/Serviços De Terceiros'), ('3.1.3.01', 'Despesas Com Viagens'),
+    ('3.1.3.02', 'Aluguéis E Encargos'), ('3.1.3.03', 'Divulgação, Anúncios, Publicidade E Propaganda'),
+    ('3.1.3.04', 'Serviços Gráficos E De Reprodução'), ('3.1.3.05', 'Serviços De Comunicação Em Geral'),
+    ('3.1.4.01', 'Materiais De Consumo'), ('3.1.4.02', 'Demais Custos E Despesas Gerais'),
+    ('3.1.5.01', 'Doações E Subvenções'), ('3.1.6.01', 'Despesas Tributárias'), ('3.1.6.02', 'Despesas Financeiras'),
+    ('3.2.1.01', 'Transf. Externas - Convênios C/Outras Entidades'), ('4.1.1.01', 'Bens Móveis'),
+    ('4.1.1.02', 'Bens Imóveis'), ('4.1.2.01', 'Bens Intangíveis'),
+)
+
+# Nomes de coluna de FATOAJUSTADONACIONAL, vindos do cubo OLAP (ver validacao._renomear_colunas_orcado_fonte).
+COLUNAS_ORCADO = {
+    'PROJETO': '[Iniciativa].[Iniciativas].[Iniciativa].[MEMBER_CAPTION]',
+    'ACAO': '[Ação].[Ação].[Nome de Ação].[MEMBER_CAPTION]',
+    'UNIDADE': '[Unidade Organizacional de Ação].[Unidade Organizacional de Ação].[Nome de Unidade Organizacional de Ação].[MEMBER_CAPTION]',
+    'ANO': '[Tempo].[Ano].[Número Ano].[MEMBER_CAPTION]',
+    'MES': '[Tempo].[Mês].[Número Mês].[MEMBER_CAPTION]',
+    'Descricao_PPA': '[PPA].[PPA com Fotografia].[Descrição de PPA com Fotografia].[MEMBER_CAPTION]',
+    'Codigo_Natureza_Orcamentaria': '[Natureza Orçamentária].[Código Estruturado 4 nível].[Código Estruturado 4 nível].[MEMBER_CAPTION]',
+    'Descricao_Natureza_Orcamentaria': '[Natureza Orçamentária].[Descrição de Natureza 4 nível].[Descrição de Natureza 4 nível].[MEMBER_CAPTION]',
+    'Valor_Ajustado': '[Measures].[ValorAjustado]',
+}
+
+
+@dataclass
+class ConjuntoSintetico:
+    """Fontes sintéticas de uma escala, mais os mapas usados pelas etapas que as consomem."""
+    fator: int
+    ano: int
+    ppa: str
+    orcado_nacional: pd.DataFrame
+    estrutura_cc: pd.DataFrame
+    base_analise: pd.DataFrame
+    mapa_unidade: dict[str, str]
+    mapa_correcoes: dict[str, str]
+
+
+def gerar_catalogo(fator: int = 1, semente: int = 0) -> pd.DataFrame:
+    """
+    Linhas (UNIDADE, PROJETO, ACAO, CODCCUSTO) da estrutura: cada projeto pertence a uma
+    unidade ou, se compartilhado, a duas ou três; cada ação de um projeto em uma unidade é um centro de custo.
+    """
+    rng = np.random.default_rng(semente)
+    projetos = VOLUME_1X['projetos'] * fator
+    unidades = np.array([f'UNIDADE {i:02d}' for i in range(UNIDADES)], dtype=object)
+
+    n_unidades = np.where(rng.random(projetos) < FRACAO_COMPARTILHADOS, rng.integers(2, 4, projetos), 1)
+    id_projeto = np.repeat(np.arange(projetos), n_unidades)
+    unidade_principal = np.repeat(rng.integers(0, UNIDADES, projetos), n_unidades)
+    deslocamento = np.concatenate([np.arange(n) for n in n_unidades]) * rng.integers(1, UNIDADES, len(id_projeto))
+    id_unidade = (unidade_principal + deslocamento) % UNIDADES
+
+    id_projeto = np.repeat(id_projeto, ACOES_POR_PROJETO)
+    id_unidade = np.repeat(id_unidade, ACOES_POR_PROJETO)
+    id_acao = np.tile(np.arange(ACOES_POR_PROJETO), len(id_projeto) // ACOES_POR_PROJETO)
+    catalogo = pd.DataFrame({
+        'UNIDADE': unidades[id_unidade],
+        'PROJETO': pd.Series(id_projeto).map('PROJETO {:06d}'.format).to_numpy(dtype=object),
+        'ACAO': pd.Series(id_acao).map('AÇÃO {:02d}'.format).to_numpy(dtype=object),
+    })
+    catalogo['CODCCUSTO'] = [f"1.{u:03d}.{p:06d}.{a:02d}.0001" for u, p, a in zip(id_unidade, id_projeto, id_acao)]
+    return catalogo
+
+
+def gerar_estrutura_cc(catalogo: pd.DataFrame, ano: int, semente: int = 0) -> pd.DataFrame:
+    """Saída de queries/cc.sql: CODCCUSTO, ACAO, PROJETO, UNIDADE e as datas de criação de cada nível."""
+    rng = np.random.default_rng(semente + 1)
+    n = len(catalogo)
+    inicio_ano = np.datetime64(f'{ano}-01-01')
+    dtacao = inicio_ano + rng.integers(0, 365, n).astype('timedelta64[D]')
+    return pd.DataFrame({
+        'CODCCUSTO': catalogo['CODCCUSTO'].to_numpy(),
+        'ACAO': catalogo['ACAO'].to_numpy(),
+        'PROJETO': catalogo['PROJETO'].to_numpy(),
+        'UNIDADE': catalogo['UNIDADE'].to_numpy(),
+        'DTUNIDADE': pd.to_datetime(inicio_ano - rng.integers(365, 3650, n).astype('timedelta64[D]')),
+        'DTPROJETO': pd.to_datetime(inicio_ano - rng.integers(0, 365, n).astype('timedelta64[D]')),
+        'DTACAO': pd.to_datetime(dtacao),
+    })
+
+
+def gerar_orcado_nacional(catalogo: pd.DataFrame, linhas: int, ano: int, ppa: str, semente: int = 0) -> pd.DataFrame:
+    """FATOAJUSTADONACIONAL: valores ajustados por (projeto, ação, unidade, mês, natureza), com os nomes de coluna do cubo."""
+    rng = np.random.default_rng(semente + 2)
+    linha_catalogo = rng.integers(0, len(catalogo), linhas)
+    natureza = rng.integers(0, len(NATUREZAS), linhas)
+    acoes = catalogo['ACAO'].to_numpy()[linha_catalogo]
+    antigas = rng.random(linhas) < FRACAO_ACOES_ANTIGAS
+    acoes[antigas] = acoes[antigas] + SUFIXO_ACAO_ANTIGA
+    dados = {
+        'PROJETO': catalogo['PROJETO'].to_numpy()[linha_catalogo],
+        'ACAO': acoes,
+        'UNIDADE': 'SP - ' + catalogo['UNIDADE'].to_numpy()[linha_catalogo],
+        'ANO': np.full(linhas, ano),
+        'MES': rng.integers(1, 13, linhas),
+        'Descricao_PPA': np.full(linhas, ppa, dtype=object),
+        'Codigo_Natureza_Orcamentaria': np.array([c for c, _ in NATUREZAS], dtype=object)[natureza],
+        'Descricao_Natureza_Orcamentaria': np.array([d for _, d in NATUREZAS], dtype=object)[natureza],
+        'Valor_Ajustado': np.round(rng.gamma(1.5, 4_000, linhas), 2),
+    }
+    return pd.DataFrame({COLUNAS_ORCADO[coluna]: valores for coluna, valores in dados.items()})
+
+
+def gerar_base_analise(catalogo: pd.DataFrame, linhas: int, ano: int, semente: int = 0) -> pd.DataFrame:
+    """
+    Saída de dbo.vw_Analise_Planejado_vs_Executado_v2: planejado e executado por chave, com
+    linhas só planejadas (orçamento ocioso) e só executadas (execução sem planejamento).
+    """
+    rng = np.random.default_rng(semente + 3)
+    linha_catalogo = rng.integers(0, len(catalogo), linhas)
+    natureza = rng.integers(0, len(NATUREZAS), linhas)
+    planejado = np.round(rng.gamma(1.5, 4_000, linhas), 2)
+    executado = np.round(planejado * rng.uniform(0.2, 1.3, linhas), 2)
+    tipo_linha = rng.random(linhas)
+    executado[tipo_linha < 0.15] = 0.0                                         # só planejado
+    planejado[(tipo_linha >= 0.15) & (tipo_linha < 0.25)] = 0.0                # só executado
+    descricoes = np.array([d for _, d in NATUREZAS], dtype=object)[natureza]
+    return pd.DataFrame({
+        'ANO': np.full(linhas, ano),
+        'MES': rng.integers(1, 13, linhas),
+        'PROJETO': catalogo['PROJETO'].to_numpy()[linha_catalogo],
+        'ACAO': catalogo['ACAO'].to_numpy()[linha_catalogo],
+        'UNIDADE': 'SP - ' + catalogo['UNIDADE'].to_numpy()[linha_catalogo],
+        'CODCCUSTO': catalogo['CODCCUSTO'].to_numpy()[linha_catalogo],
+        'Codigo_Natureza_Orcamentaria': np.array([c for c, _ in NATUREZAS], dtype=object)[natureza],
+        'Descricao_Natureza_Orcamentaria': np.char.upper(descricoes.astype(str)).astype(object),
+        'NATUREZA_FINAL': descricoes,
+        'Valor_Planejado': planejado,
+        'Valor_Executado': executado,
+    })
+
+
+def gerar_mapa_correcoes(orcado_nacional: pd.DataFrame, fracao: float = 0.5, semente: int = 0) -> dict[str, str]:
+    """Correções (CHAVE_CONCAT antiga -> corrigida) para parte das chaves com ação de nome antigo."""
+    rng = np.random.default_rng(semente + 4)
+    colunas = [COLUNAS_ORCADO[c] for c in ('PROJETO', 'ACAO', 'UNIDADE', 'ANO')]
+    chaves = orcado_nacional.loc[orcado_nacional[COLUNAS_ORCADO['ACAO']].str.endswith(SUFIXO_ACAO_ANTIGA), colunas].drop_duplicates()
+    chaves = chaves[rng.random(len(chaves)) < fracao]
+    mapa = {}
+    for projeto, acao, unidade, ano in chaves.itertuples(index=False):
+        unidade = unidade.replace('SP - ', '')
+        mapa[f"{projeto}|{acao}|{unidade}|{ano}"] = f"{projeto}|{acao.removesuffix(SUFIXO_ACAO_ANTIGA)}|{unidade}|{ano}"
+    return mapa
+
+
+def gerar_conjunto(fator: int = 1, semente: int = 0, ano: int = 2025, ppa: str = 'PPA 2025 - 2025/DEZ') -> ConjuntoSintetico:
+    """Todas as fontes sintéticas de uma escala (1, 10, 100...) a partir do mesmo catálogo."""
+    catalogo = gerar_catalogo(fator, semente)
+    orcado = gerar_orcado_nacional(catalogo, VOLUME_1X['linhas_orcado'] * fator, ano, ppa, semente)
+    # Parte das unidades aparece com nome antigo na view e é padronizada pelo mapa de unidades.
+    mapa_unidade = {f'UNIDADE {i:02d} (ANTIGA)': f'UNIDADE {i:02d}' for i in range(0, UNIDADES, 5)}
+    base = gerar_base_analise(catalogo, VOLUME_1X['linhas_base'] * fator, ano, semente)
+    renomear = base['UNIDADE'].str.removeprefix('SP - ').isin(mapa_unidade.values())
+    base.loc[renomear, 'UNIDADE'] = base.loc[renomear, 'UNIDADE'] + ' (ANTIGA)'
+    return ConjuntoSintetico(
+        fator=fator, ano=ano, ppa=ppa,
+        orcado_nacional=orcado,
+        estrutura_cc=gerar_estrutura_cc(catalogo, ano, semente),
+        base_analise=base,
+        mapa_unidade=mapa_unidade,
+        mapa_correcoes=gerar_mapa_correcoes(orcado, semente=semente),
+    )
@@ -0,0 +1,289 @@
+# utils/historico_execucoes.py
+"""
+Histórico das execuções instrumentadas (ver utils/instrumentacao.py) em 'cache/historico_execucoes.db'
+e detecção de regressões de desempenho.
+
+Cada execução do main.py, do gerar_relatorio.py e do envio é acrescentada ao histórico ao terminar
+e comparada com a linha de base: a mediana das últimas execuções bem-sucedidas do mesmo pipeline.
+Uma etapa regrediu quando ficou mais lenta que a linha de base além do limite. A variação de linhas
+da etapa (de entrada ou, nas etapas de origem, de saída) é mostrada ao lado: se o tempo por linha
+não piorou, a lentidão é explicada pelo volume de dados, e não pelo código ou pelo ambiente.
+
+Relatório (a partir da raiz do projeto):
+    python -m utils.historico_execucoes [--pipeline geracao_relatorio] [--janela 10] [--limite 0.3] [--commit-base HASH] [--listar 10]
+"""
+import argparse
+import logging
+import os
+import sqlite3
+import statistics
+import sys
+from contextlib import closing
+from dataclasses import dataclass
+from pathlib import Path
+
+from config.config import CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Execuções anteriores usadas na linha de base, e o mínimo para haver comparação.
+JANELA_PADRAO = int(os.getenv("HISTORICO_JANELA", 10))
+MINIMO_EXECUCOES_BASE = 3
+# Fração acima da linha de base a partir da qual uma etapa é marcada (0.3 = 30% mais lenta)...
+LIMITE_PADRAO = float(os.getenv("REGRESSAO_LIMITE", 0.3))
+# ...desde que a diferença absoluta também passe deste mínimo, para ignorar ruído em etapas curtas.
+MINIMO_SEGUNDOS_PADRAO = float(os.getenv("REGRESSAO_MINIMO_S", 1.0))
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS execucoes (
+    execucao_id TEXT PRIMARY KEY,
+    pipeline TEXT NOT NULL,
+    inicio TEXT NOT NULL,
+    fim TEXT,
+    duracao_s REAL,
+    status TEXT,
+    host TEXT,
+    python TEXT,
+    commit_git TEXT,
+    pico_rss_mb REAL
+);
+CREATE INDEX IF NOT EXISTS ix_execucoes_pipeline ON execucoes (pipeline, inicio);
+CREATE TABLE IF NOT EXISTS etapas (
+    execucao_id TEXT NOT NULL REFERENCES execucoes (execucao_id),
+    ordem INTEGER NOT NULL,
+    chave TEXT NOT NULL,
+    etapa TEXT NOT NULL,
+    nivel INTEGER,
+    duracao_s REAL,
+    cpu_s REAL,
+    linhas_entrada INTEGER,
+    linhas_saida INTEGER,
+    pico_rss_mb REAL,
+    status TEXT,
+    PRIMARY KEY (execucao_id, ordem)
+);
+"""
+
+
+def _conectar(caminho: Path | None = None) -> sqlite3.Connection:
+    conexao = sqlite3.connect(caminho or CONFIG.paths.historico_execucoes)
+    conexao.row_factory = sqlite3.Row
+    conexao.executescript(_ESQUEMA)
+    return conexao
+
+
+def chaves_etapas(etapas: list[dict]) -> list[str]:
+    """
+    Chave de cada etapa na comparação entre execuções: o nome, com '#2', '#3'... nas repetições
+    (ex.: 'preparacao' roda para o Orçado e depois para o CC).
+    """
+    vistas: dict[str, int] = {}
+    chaves = []
+    for etapa in etapas:
+        vistas[etapa['etapa']] = vistas.get(etapa['etapa'], 0) + 1
+        chaves.append(etapa['etapa'] if vistas[etapa['etapa']] == 1 else f"{etapa['etapa']}#{vistas[etapa['etapa']]}")
+    return chaves
+
+
+def registrar_execucao(execucao: dict, caminho: Path | None = None) -> None:
+    """Acrescenta ao histórico uma execução no formato de `ExecucaoInstrumentada.como_dict()`."""
+    with closing(_conectar(caminho)) as conexao, conexao:
+        conexao.execute(
+            "INSERT OR REPLACE INTO execucoes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (execucao['execucao_id'], execucao['pipeline'], execucao['inicio'], execucao.get('fim'), execucao.get('duracao_s'),
+             execucao.get('status'), execucao.get('host'), execucao.get('python'), execucao.get('commit'), execucao.get('pico_rss_mb')),
+        )
+        conexao.execute("DELETE FROM etapas WHERE execucao_id = ?", (execucao['execucao_id'],))
+        conexao.executemany(
+            "INSERT INTO etapas VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (execucao['execucao_id'], ordem, chave, e['etapa'], e.get('nivel'), e.get('duracao_s'), e.get('cpu_s'),
+                 e.get('linhas_entrada'), e.get('linhas_saida'), e.get('pico_rss_mb'), e.get('status'))
+                for ordem, (chave, e) in enumerate(zip(chaves_etapas(execucao['etapas']), execucao['etapas']))
+            ],
+        )
+
+
+@dataclass
+class ComparacaoEtapa:
+    chave: str
+    duracao_s: float
+    base_duracao_s: float | None
+    linhas: int | None
+    base_linhas: float | None
+    pico_rss_mb: float | None
+    base_pico_rss_mb: float | None
+    execucoes_base: int
+    situacao: str  # 'ok', 'regressao', 'volume' (mais lenta, mas proporcional às linhas), 'sem_base' ou 'erro'
+
+    @property
+    def variacao_tempo(self) -> float | None:
+        return _variacao(self.duracao_s, self.base_duracao_s)
+
+    @property
+    def variacao_linhas(self) -> float | None:
+        return _variacao(self.linhas, self.base_linhas)
+
+
+def _variacao(atual: float | None, base: float | None) -> float | None:
+    if atual is None or not base:
+        return None
+    return atual / base - 1
+
+
+def _linhas(etapa: sqlite3.Row) -> int | None:
+    """Volume da etapa: linhas de entrada ou, nas etapas de origem (ex.: extração), as de saída."""
+    return etapa['linhas_entrada'] if etapa['linhas_entrada'] is not None else etapa['linhas_saida']
+
+
+def _mediana(valores) -> float | None:
+    valores = [v for v in valores if v is not None]
+    return statistics.median(valores) if valores else None
+
+
+def comparar_execucao(execucao_id: str | None = None, pipeline: str | None = None, janela: int = JANELA_PADRAO,
+                      limite: float = LIMITE_PADRAO, minimo_s: float = MINIMO_SEGUNDOS_PADRAO,
+                      caminho: Path | None = None, commit_base: str | None = None) -> tuple[dict | None, list[ComparacaoEtapa]]:
+    """
+    Compara uma execução (por padrão, a mais recente do pipeline) com a mediana das `janela`
+    execuções bem-sucedidas anteriores do mesmo pipeline. Retorna a execução e a comparação por etapa.
+
+    Com `commit_base`, a linha de base são as execuções desse commit (prefixo do hash), em qualquer
+    data: compara o código atual com o de outro commit, como no benchmark sintético.
+    """
+    with closing(_conectar(caminho)) as conexao:
+        if execucao_id:
+            execucao = conexao.execute("SELECT * FROM execucoes WHERE execucao_id = ?", (execucao_id,)).fetchone()
+        else:
+            filtro, parametros = ("WHERE pipeline = ?", (pipeline,)) if pipeline else ("", ())
+            execucao = conexao.execute(f"SELECT * FROM execucoes {filtro} ORDER BY inicio DESC, rowid DESC LIMIT 1", parametros).fetchone()
+        if execucao is None:
+            return None, []
+
+        filtro_base, parametros_base = ("commit_git LIKE ?", f"{commit_base}%") if commit_base else ("inicio <= ?", execucao['inicio'])
+        anteriores = [linha['execucao_id'] for linha in conexao.execute(
+            f"SELECT execucao_id FROM execucoes WHERE pipeline = ? AND status = 'ok' AND {filtro_base} AND execucao_id <> ? "
+            "ORDER BY inicio DESC, rowid DESC LIMIT ?",
+            (execucao['pipeline'], parametros_base, execucao['execucao_id'], janela),
+        )]
+        etapas_base: dict[str, list[sqlite3.Row]] = {}
+        if anteriores:
+            marcadores = ", ".join("?" * len(anteriores))
+            for linha in conexao.execute(f"SELECT * FROM etapas WHERE execucao_id IN ({marcadores}) AND status = 'ok'", anteriores):
+                etapas_base.setdefault(linha['chave'], []).append(linha)
+        etapas = conexao.execute("SELECT * FROM etapas WHERE execucao_id = ? ORDER BY ordem", (execucao['execucao_id'],)).fetchall()
+
+    comparacoes = []
+    for etapa in etapas:
+        base = etapas_base.get(etapa['chave'], [])
+        base_duracao = _mediana(b['duracao_s'] for b in base)
+        base_linhas = _mediana(_linhas(b) for b in base)
+        comparacao = ComparacaoEtapa(
+            chave=etapa['chave'], duracao_s=etapa['duracao_s'], base_duracao_s=base_duracao,
+            linhas=_linhas(etapa), base_linhas=base_linhas,
+            pico_rss_mb=etapa['pico_rss_mb'], base_pico_rss_mb=_mediana(b['pico_rss_mb'] for b in base),
+            execucoes_base=len(base), situacao='ok',
+        )
+        if etapa['status'] != 'ok':
+            comparacao.situacao = 'erro'
+        elif len(base) < MINIMO_EXECUCOES_BASE or base_duracao is None:
+            comparacao.situacao = 'sem_base'
+        elif etapa['duracao_s'] > base_duracao * (1 + limite) and etapa['duracao_s'] - base_duracao > minimo_s:
+            # Tempo por linha dentro do limite: a etapa só processou mais dados.
+            por_linha = _variacao(etapa['duracao_s'] / comparacao.linhas, base_duracao / base_linhas) \
+                if comparacao.linhas and base_linhas else None
+            comparacao.situacao = 'volume' if por_linha is not None and por_linha <= limite else 'regressao'
+        comparacoes.append(comparacao)
+    return dict(execucao), comparacoes
+
+
+def listar_execucoes(pipeline: str | None = None, quantidade: int = 10, caminho: Path | None = None) -> list[dict]:
+    filtro, parametros = ("WHERE pipeline = ?", (pipeline,)) if pipeline else ("", ())
+    with closing(_conectar(caminho)) as conexao:
+        return [dict(linha) for linha in conexao.execute(
+            f"SELECT * FROM execucoes {filtro} ORDER BY inicio DESC, rowid DESC LIMIT ?", (*parametros, quantidade))]
+
+
+def listar_pipelines(caminho: Path | None = None) -> list[str]:
+    with closing(_conectar(caminho)) as conexao:
+        return [linha['pipeline'] for linha in conexao.execute("SELECT DISTINCT pipeline FROM execucoes ORDER BY pipeline")]
+
+
+def _percentual(variacao: float | None) -> str:
+    return "-" if variacao is None else f"{variacao:+.0%}"
+
+
+def formatar_comparacao(execucao: dict, comparacoes: list[ComparacaoEtapa]) -> str:
+    linhas = [
+        f"Execução {execucao['execucao_id']} de '{execucao['pipeline']}' em {execucao['inicio']} "
+        f"({execucao['status']}, {execucao['duracao_s'] or 0:.1f}s, commit {execucao['commit_git'] or '-'})",
+        f"{'etapa':<28}{'base':>9}{'atual':>9}{'var.':>7}{'linhas base':>14}{'linhas atual':>14}{'var.':>7}{'RSS':>9}  situação",
+    ]
+    for c in comparacoes:
+        base = "-" if c.base_duracao_s is None else f"{c.base_duracao_s:.2f}s"
+        base_linhas = "-" if c.base_linhas is None else f"{c.base_linhas:,.0f}".replace(",", ".")
+        linhas_atual = "-" if c.linhas is None else f"{c.linhas:,}".replace(",", ".")
+        rss = "-" if c.pico_rss_mb is None else f"{c.pico_rss_mb:.0f} MB"
+        linhas.append(
+            f"{c.chave[:27]:<28}{base:>9}{c.duracao_s:>8.2f}s{_percentual(c.variacao_tempo):>7}"
+            f"{base_linhas:>14}{linhas_atual:>14}{_percentual(c.variacao_linhas):>7}{rss:>9}  {c.situacao}"
+        )
+    return "\n".join(linhas)
+
+
+def verificar_regressoes(execucao_id: str) -> list[ComparacaoEtapa]:
+    """Compara a execução recém-registrada com a linha de base e avisa no log sobre as etapas que regrediram."""
+    execucao, comparacoes = comparar_execucao(execucao_id)
+    regressoes = [c for c in comparacoes if c.situacao == 'regressao']
+    for c in regressoes:
+        logger.warning(
+            "Regressão de desempenho em '%s' (%s): %.2fs contra %.2fs na linha de base (%s); linhas %s.",
+            c.chave, execucao['pipeline'], c.duracao_s, c.base_duracao_s, _percentual(c.variacao_tempo), _percentual(c.variacao_linhas),
+        )
+    for c in comparacoes:
+        if c.situacao == 'volume':
+            logger.info("Etapa '%s' mais lenta (%s), proporcional ao volume de linhas (%s).",
+                        c.chave, _percentual(c.variacao_tempo), _percentual(c.variacao_linhas))
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara a execução mais recente com a linha de base e aponta regressões de desempenho.")
+    parser.add_argument("--pipeline", help="Pipeline a analisar (ex.: pipeline_principal, geracao_relatorio, envio_relatorios). Padrão: todos.")
+    parser.add_argument("--execucao", help="Id de uma execução específica, em vez da mais recente.")
+    parser.add_argument("--janela", type=int, default=JANELA_PADRAO, help=f"Execuções anteriores na linha de base (padrão: {JANELA_PADRAO}).")
+    parser.add_argument("--limite", type=float, default=LIMITE_PADRAO, help=f"Fração de lentidão tolerada (padrão: {LIMITE_PADRAO}).")
+    parser.add_argument("--minimo-s", type=float, default=MINIMO_SEGUNDOS_PADRAO, help=f"Diferença mínima em segundos para marcar (padrão: {MINIMO_SEGUNDOS_PADRAO}).")
+    parser.add_argument("--commit-base", help="Usa como linha de base as execuções deste commit, em vez das anteriores.")
+    parser.add_argument("--listar", type=int, metavar="N", help="Lista as N execuções mais recentes em vez de comparar.")
+    args = parser.parse_args()
+
+    if not CONFIG.paths.historico_execucoes.exists():
+        print(f"Histórico vazio: '{CONFIG.paths.historico_execucoes}' ainda não existe.")
+        return
+
+    if args.listar:
+        for e in listar_execucoes(args.pipeline, args.listar):
+            print(f"{e['inicio']}  {e['execucao_id']}  {e['pipeline']:<20} {e['status']:<5} {e['duracao_s'] or 0:>8.1f}s  "
+                  f"pico {e['pico_rss_mb'] or 0:>6.0f} MB  commit {e['commit_git'] or '-'}")
+        return
+
+    pipelines = [args.pipeline] if args.pipeline or args.execucao else listar_pipelines()
+    total_regressoes = 0
+    for pipeline in pipelines:
+        execucao, comparacoes = comparar_execucao(args.execucao, pipeline, args.janela, args.limite, args.minimo_s,
+                                                  commit_base=args.commit_base)
+        if execucao is None:
+            print(f"Nenhuma execução encontrada para '{pipeline or args.execucao}'.")
+            continue
+        print(formatar_comparacao(execucao, comparacoes) + "\n")
+        total_regressoes += sum(1 for c in comparacoes if c.situacao == 'regressao')
+
+    if total_regressoes:
+        print(f"{total_regressoes} etapa(s) com regressão de desempenho.")
+        sys.exit(1)
+    print("Nenhuma regressão de desempenho.")
+
+
+if __name__ == "__main__":
+    main()
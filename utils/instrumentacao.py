@@ -0,0 +1,308 @@
+# utils/instrumentacao.py
+"""
+Métricas por etapa das pipelines: tempo de relógio, tempo de CPU, linhas de entrada e saída
+e pico de memória (RSS) de cada etapa, gravados em JSON ao final de cada execução.
+
+    with execucao_instrumentada("pipeline_principal"):
+        df = etapa_decorada(...)           # funções com @instrumentar("nome")
+        with etapa("salvamento", linhas_entrada=len(df)) as medicao:
+            ...
+            medicao.linhas_saida = ...
+
+Fora de uma execução instrumentada, as etapas são medidas e só registradas no log (DEBUG).
+"""
+import functools
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterator
+
+from config.config import CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Intervalo da amostragem de memória durante as etapas. O pico do processo (high-water mark)
+# é exato; a amostragem só cobre etapas que não elevam esse pico.
+INTERVALO_AMOSTRAGEM_S = 0.05
+_MB = 1024 * 1024
+
+
+# --- Leitura de memória do processo (sem dependências externas) ---
+
+if sys.platform == "win32":
+    import ctypes
+    from ctypes import wintypes
+
+    class _ContadoresMemoria(ctypes.Structure):
+        _fields_ = [
+            ("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+            ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+            ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t),
+        ]
+
+    def _memoria_processo() -> tuple[int | None, int | None]:
+        contadores = _ContadoresMemoria()
+        contadores.cb = ctypes.sizeof(contadores)
+        processo = ctypes.windll.kernel32.GetCurrentProcess()
+        if not ctypes.windll.psapi.GetProcessMemoryInfo(processo, ctypes.byref(contadores), contadores.cb):
+            return None, None
+        return contadores.WorkingSetSize, contadores.PeakWorkingSetSize
+else:
+    import resource
+
+    def _memoria_processo() -> tuple[int | None, int | None]:
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        pico = pico if sys.platform == "darwin" else pico * 1024  # bytes no macOS, KiB no Linux
+        try:
+            with open("/proc/self/statm") as statm:
+                atual = int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, IndexError):
+            atual = None
+        return atual, pico
+
+
+def memoria_processo_mb() -> tuple[float | None, float | None]:
+    """RSS atual e pico de RSS do processo, em MB (None quando a plataforma não informa)."""
+    atual, pico = _memoria_processo()
+    return (None if atual is None else atual / _MB), (None if pico is None else pico / _MB)
+
+
+def contar_linhas(objeto) -> int | None:
+    """Linhas de um DataFrame/Series, ou a soma das de uma tupla/lista deles; None se não houver nenhum."""
+    if hasattr(objeto, "shape") and getattr(objeto, "ndim", 0) >= 1:
+        return int(objeto.shape[0])
+    if isinstance(objeto, (tuple, list)):
+        contagens = [c for c in (contar_linhas(item) for item in objeto if hasattr(item, "shape")) if c is not None]
+        return sum(contagens) if contagens else None
+    return None
+
+
+def commit_atual() -> str | None:
+    """Commit do git em uso (abreviado), para associar as métricas à versão do código; None fora de um repositório."""
+    try:
+        resultado = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=CONFIG.paths.base_dir,
+                                   capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    if resultado.returncode != 0:
+        return None
+    return resultado.stdout.strip() or None
+
+
+# --- Etapas e execuções ---
+
+# eq=False: medições abertas são removidas da lista por identidade, não por valor.
+@dataclass(eq=False)
+class MedicaoEtapa:
+    etapa: str
+    nivel: int = 0
+    inicio: str = ""
+    duracao_s: float = 0.0
+    cpu_s: float = 0.0
+    linhas_entrada: int | None = None
+    linhas_saida: int | None = None
+    rss_inicio_mb: float | None = None
+    rss_fim_mb: float | None = None
+    pico_rss_mb: float | None = None
+    status: str = "ok"
+    erro: str | None = None
+
+
+@dataclass
+class ExecucaoInstrumentada:
+    pipeline: str
+    execucao_id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+    inicio: str = field(default_factory=lambda: datetime.now().isoformat(timespec="seconds"))
+    fim: str | None = None
+    duracao_s: float = 0.0
+    status: str = "ok"
+    host: str = field(default_factory=platform.node)
+    python: str = field(default_factory=platform.python_version)
+    commit: str | None = field(default_factory=commit_atual)
+    pico_rss_mb: float | None = None
+    etapas: list[MedicaoEtapa] = field(default_factory=list)
+
+    def como_dict(self) -> dict:
+        return asdict(self)
+
+
+_EXECUCAO_ATUAL: ExecucaoInstrumentada | None = None
+_trava = threading.Lock()
+_abertas: list[MedicaoEtapa] = []
+_nivel = threading.local()
+
+
+class _AmostradorMemoria:
+    """Thread que, enquanto houver etapas abertas, atualiza o pico de RSS de cada uma."""
+
+    def __init__(self):
+        self._thread: threading.Thread | None = None
+        self._parar = threading.Event()
+
+    def _rodar(self) -> None:
+        while not self._parar.wait(INTERVALO_AMOSTRAGEM_S):
+            atual, _ = memoria_processo_mb()
+            if atual is None:
+                return
+            with _trava:
+                for medicao in _abertas:
+                    if medicao.pico_rss_mb is None or atual > medicao.pico_rss_mb:
+                        medicao.pico_rss_mb = atual
+
+    def garantir_ativo(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._parar.clear()
+            self._thread = threading.Thread(target=self._rodar, name="amostrador_memoria", daemon=True)
+            self._thread.start()
+
+    def parar(self) -> None:
+        self._parar.set()
+
+
+_amostrador = _AmostradorMemoria()
+
+
+@contextmanager
+def etapa(nome: str, linhas_entrada: int | None = None) -> Iterator[MedicaoEtapa]:
+    """
+    Mede um trecho como uma etapa da execução atual. A medição é devolvida para que o
+    chamador preencha `linhas_saida` (e, se não informou antes, `linhas_entrada`).
+    """
+    nivel = getattr(_nivel, "valor", 0)
+    rss_inicio, pico_processo_inicio = memoria_processo_mb()
+    medicao = MedicaoEtapa(etapa=nome, nivel=nivel, inicio=datetime.now().isoformat(timespec="seconds"),
+                           linhas_entrada=linhas_entrada, rss_inicio_mb=rss_inicio, pico_rss_mb=rss_inicio)
+    with _trava:
+        _abertas.append(medicao)
+    if _EXECUCAO_ATUAL is not None:
+        _amostrador.garantir_ativo()
+    _nivel.valor = nivel + 1
+    inicio, inicio_cpu = time.perf_counter(), time.process_time()
+    try:
+        yield medicao
+    except BaseException as e:
+        medicao.status, medicao.erro = "erro", f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        medicao.duracao_s = round(time.perf_counter() - inicio, 4)
+        medicao.cpu_s = round(time.process_time() - inicio_cpu, 4)
+        _nivel.valor = nivel
+        with _trava:
+            _abertas.remove(medicao)
+        rss_fim, pico_processo_fim = memoria_processo_mb()
+        medicao.rss_fim_mb = rss_fim
+        candidatos = [v for v in (medicao.pico_rss_mb, rss_fim) if v is not None]
+        # Se o pico do processo subiu durante a etapa, ele foi atingido nela: é o valor exato.
+        if pico_processo_fim is not None and pico_processo_inicio is not None and pico_processo_fim > pico_processo_inicio:
+            candidatos.append(pico_processo_fim)
+        medicao.pico_rss_mb = max(candidatos) if candidatos else None
+        for atributo in ("rss_inicio_mb", "rss_fim_mb", "pico_rss_mb"):
+            if getattr(medicao, atributo) is not None:
+                setattr(medicao, atributo, round(getattr(medicao, atributo), 1))
+        _registrar_etapa(medicao)
+
+
+def _registrar_etapa(medicao: MedicaoEtapa) -> None:
+    logger.debug("Etapa '%s': %.2fs (CPU %.2fs), linhas %s -> %s, pico RSS %s MB.", medicao.etapa, medicao.duracao_s,
+                 medicao.cpu_s, medicao.linhas_entrada, medicao.linhas_saida, medicao.pico_rss_mb)
+    execucao = _EXECUCAO_ATUAL
+    if execucao is not None:
+        with _trava:
+            execucao.etapas.append(medicao)
+
+
+def instrumentar(nome: str | None = None) -> Callable:
+    """
+    Decorador que mede cada chamada da função como uma etapa. As linhas de entrada são a soma
+    das linhas dos DataFrames recebidos; as de saída, as do DataFrame (ou tupla de DataFrames) retornado.
+    """
+    def decorador(funcao: Callable) -> Callable:
+        nome_etapa = nome or funcao.__name__
+
+        @functools.wraps(funcao)
+        def envoltorio(*args, **kwargs):
+            contagens = [c for c in (contar_linhas(v) for v in (*args, *kwargs.values()) if hasattr(v, "shape")) if c is not None]
+            with etapa(nome_etapa, linhas_entrada=sum(contagens) if contagens else None) as medicao:
+                resultado = funcao(*args, **kwargs)
+                medicao.linhas_saida = contar_linhas(resultado)
+                return resultado
+        return envoltorio
+    return decorador
+
+
+def _formatar_linhas(valor: int | None) -> str:
+    return "-" if valor is None else f"{valor:,}".replace(",", ".")
+
+
+def _resumo(execucao: ExecucaoInstrumentada) -> str:
+    linhas = [f"{'etapa':<40}{'tempo':>10}{'CPU':>10}{'linhas in':>12}{'linhas out':>12}{'pico RSS':>11}"]
+    for m in execucao.etapas:
+        linhas.append(
+            f"{('  ' * m.nivel + m.etapa)[:39]:<40}{m.duracao_s:>9.2f}s{m.cpu_s:>9.2f}s"
+            f"{_formatar_linhas(m.linhas_entrada):>12}{_formatar_linhas(m.linhas_saida):>12}"
+            f"{'-' if m.pico_rss_mb is None else f'{m.pico_rss_mb:.0f} MB':>11}"
+            + ("" if m.status == "ok" else "  (erro)")
+        )
+    return "\n".join(linhas)
+
+
+def salvar_metricas(execucao: ExecucaoInstrumentada, diretorio: Path | None = None) -> Path:
+    """Grava a execução em '<diretorio>/<pipeline>_<data>_<id>.json' (por padrão, 'logs/metricas')."""
+    diretorio = Path(diretorio or CONFIG.paths.metricas_dir)
+    diretorio.mkdir(parents=True, exist_ok=True)
+    destino = diretorio / f"{execucao.pipeline}_{datetime.now():%Y%m%d_%H%M%S}_{execucao.execucao_id}.json"
+    caminho_tmp = destino.with_name(destino.name + ".tmp")
+    caminho_tmp.write_text(json.dumps(execucao.como_dict(), indent=2, ensure_ascii=False), encoding="utf-8")
+    os.replace(caminho_tmp, destino)
+    return destino
+
+
+@contextmanager
+def execucao_instrumentada(pipeline: str) -> Iterator[ExecucaoInstrumentada]:
+    """
+    Agrupa as etapas medidas dentro do bloco em uma execução, gravada em JSON ao sair
+    (mesmo em caso de erro, com status 'erro'), resumida no log e acrescentada ao histórico
+    de execuções, que avisa sobre etapas mais lentas que a linha de base.
+    """
+    global _EXECUCAO_ATUAL
+    anterior = _EXECUCAO_ATUAL
+    execucao = _EXECUCAO_ATUAL = ExecucaoInstrumentada(pipeline=pipeline)
+    inicio = time.perf_counter()
+    try:
+        yield execucao
+    except BaseException:
+        execucao.status = "erro"
+        raise
+    finally:
+        _EXECUCAO_ATUAL = anterior
+        if anterior is None:
+            _amostrador.parar()
+        execucao.fim = datetime.now().isoformat(timespec="seconds")
+        execucao.duracao_s = round(time.perf_counter() - inicio, 4)
+        _, pico = memoria_processo_mb()
+        execucao.pico_rss_mb = None if pico is None else round(pico, 1)
+        try:
+            destino = salvar_metricas(execucao)
+            logger.info("Métricas da execução '%s' (%.1fs, pico RSS %s MB) gravadas em '%s':\n%s", pipeline,
+                        execucao.duracao_s, execucao.pico_rss_mb, destino, _resumo(execucao))
+        except OSError as e:
+            logger.warning("Não foi possível gravar as métricas da execução '%s': %s", pipeline, e)
+        # Histórico em cache/historico_execucoes.db, comparado com as execuções anteriores.
+        try:
+            from utils.historico_execucoes import registrar_execucao, verificar_regressoes
+            registrar_execucao(execucao.como_dict())
+            verificar_regressoes(execucao.execucao_id)
+        except Exception as e:
+            logger.warning("Não foi possível registrar a execução '%s' no histórico: %s", pipeline, e)
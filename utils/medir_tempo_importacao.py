@@ -0,0 +1,110 @@
+# utils/medir_tempo_importacao.py
+"""
+Mede o tempo de inicialização dos pontos de entrada e verifica que os backends pesados
+(pandas, SQLAlchemy, pythonnet/clr, pyadomd, pyodbc...) só são carregados quando usados.
+
+Cada cenário roda em um processo novo, algumas vezes; vale a mediana descontada do tempo
+de um interpretador vazio ('python -c pass'). Uma execução extra com '-X importtime' lista
+os módulos carregados. Sai com código 1 se algum cenário passar do limite ou carregar um
+módulo proibido, para uso na integração contínua.
+
+Uso (a partir da raiz do projeto):
+    python -m utils.medir_tempo_importacao [--repeticoes 5] [--fator 1.0] [--detalhar]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+BACKENDS_BANCO = ("clr", "pyadomd", "pyodbc")
+BACKENDS_PESADOS = BACKENDS_BANCO + ("pandas", "numpy", "sqlalchemy", "plotly", "matplotlib", "selenium", "xlsxwriter")
+
+# (nome, argumentos do interpretador, limite em ms acima do interpretador vazio, módulos que não podem ser carregados)
+CENARIOS = (
+    ("main.py --help", ["main.py", "--help"], 300, BACKENDS_PESADOS),
+    ("gerar_relatorio.py --help", ["gerar_relatorio.py", "--help"], 300, BACKENDS_PESADOS),
+    ("enviar_relatorios --help", ["-m", "comunicacao.enviar_relatorios", "--help"], 300, BACKENDS_PESADOS),
+    ("import config.database", ["-c", "import config.database"], 200, BACKENDS_PESADOS),
+    ("import gerar_relatorio", ["-c", "import gerar_relatorio"], 300, BACKENDS_PESADOS),
+    # Execução só com cache: o pandas é necessário, os drivers de banco não.
+    ("import dados_base", ["-c", "import processamento.processamento_dados_base"], 900, BACKENDS_BANCO),
+)
+
+
+def _executar(argumentos: list[str], importtime: bool = False) -> subprocess.CompletedProcess:
+    comando = [sys.executable] + (["-X", "importtime"] if importtime else []) + argumentos
+    return subprocess.run(comando, cwd=RAIZ, capture_output=True, text=True, encoding="utf-8", errors="replace",
+                          env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"})
+
+
+def medir_ms(argumentos: list[str], repeticoes: int) -> float:
+    """Mediana, em milissegundos, do tempo total de um processo com os argumentos dados."""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = _executar(argumentos)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+        if resultado.returncode != 0:
+            raise RuntimeError(f"'{' '.join(argumentos)}' terminou com código {resultado.returncode}:\n{resultado.stderr[-2000:]}")
+    return statistics.median(tempos)
+
+
+def modulos_importados(argumentos: list[str]) -> dict[str, tuple[int, int]]:
+    """
+    Módulos carregados pelo processo (nome -> (tempo acumulado em µs, profundidade)), lidos da
+    saída do '-X importtime'; profundidade 0 é um import feito diretamente pelo script.
+    """
+    modulos = {}
+    for linha in _executar(argumentos, importtime=True).stderr.splitlines():
+        if not linha.startswith("import time:"):
+            continue
+        partes = linha.split("|")
+        if len(partes) != 3 or not partes[1].strip().isdigit():
+            continue
+        nome = partes[2].rstrip()
+        modulos[nome.strip()] = (int(partes[1]), (len(nome) - len(nome.lstrip()) - 1) // 2)
+    return modulos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mede o tempo de inicialização dos pontos de entrada.")
+    parser.add_argument("--repeticoes", type=int, default=5, help="Execuções por cenário; vale a mediana (padrão: 5).")
+    parser.add_argument("--fator", type=float, default=1.0, help="Multiplica os limites, para máquinas mais lentas (padrão: 1.0).")
+    parser.add_argument("--detalhar", action="store_true", help="Lista os módulos de primeiro nível mais lentos de cada cenário.")
+    args = parser.parse_args()
+
+    base_ms = medir_ms(["-c", "pass"], args.repeticoes)
+    print(f"Interpretador vazio: {base_ms:.0f} ms (descontado dos tempos abaixo)\n")
+    print(f"{'cenário':<28}{'tempo':>10}{'limite':>10}  situação")
+
+    falhas = 0
+    for nome, argumentos, limite_ms, proibidos in CENARIOS:
+        tempo_ms = medir_ms(argumentos, args.repeticoes) - base_ms
+        modulos = modulos_importados(argumentos)
+        carregados = [m for m in proibidos if m in modulos]
+        limite_ms *= args.fator
+        problemas = []
+        if tempo_ms > limite_ms:
+            problemas.append("acima do limite")
+        if carregados:
+            problemas.append(f"carregou {', '.join(carregados)}")
+        falhas += bool(problemas)
+        print(f"{nome:<28}{tempo_ms:>8.0f}ms{limite_ms:>8.0f}ms  {'; '.join(problemas) or 'ok'}")
+        if args.detalhar:
+            primeiro_nivel = sorted(((us, m) for m, (us, profundidade) in modulos.items() if profundidade == 0), reverse=True)[:5]
+            for us, modulo in primeiro_nivel:
+                print(f"{'':<4}{modulo:<40}{us / 1000:>8.1f}ms")
+
+    if falhas:
+        print(f"\n{falhas} cenário(s) com problema.")
+        sys.exit(1)
+    print("\nTodos os cenários dentro do limite.")
+
+
+if __name__ == "__main__":
+    main()
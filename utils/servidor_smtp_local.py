@@ -0,0 +1,95 @@
+# utils/servidor_smtp_local.py
+"""
+Servidor SMTP local para testar o envio dos relatórios sem entregar e-mails de verdade.
+Aceita qualquer remetente/destinatário (sem TLS nem autenticação) e grava cada mensagem
+recebida como .eml na pasta de saída.
+
+Uso (a partir da raiz do projeto), em um terminal:
+    python -m utils.servidor_smtp_local [--porta 1025] [--saida caixa_saida/smtp_local]
+e, em outro:
+    SMTP_HOST=localhost SMTP_PORTA=1025 SMTP_SEGURANCA=nenhuma python enviar_relatorios.py --transporte smtp
+"""
+import argparse
+import itertools
+import socketserver
+import threading
+from pathlib import Path
+
+_contador = itertools.count(1)
+_trava_contador = threading.Lock()
+
+
+class _SessaoSMTP(socketserver.StreamRequestHandler):
+    """Implementa o mínimo do protocolo usado pelo smtplib: EHLO/HELO, MAIL, RCPT, DATA, RSET, NOOP e QUIT."""
+
+    def _responder(self, linha: str) -> None:
+        self.wfile.write((linha + "\r\n").encode('ascii'))
+
+    def handle(self) -> None:
+        self._responder("220 servidor_smtp_local pronto")
+        remetente, destinatarios = None, []
+        while linha := self.rfile.readline():
+            comando = linha.decode('utf-8', errors='replace').strip()
+            verbo = comando[:4].upper()
+            if verbo == "EHLO":
+                self._responder("250-servidor_smtp_local")
+                self._responder("250-8BITMIME")
+                self._responder("250 SMTPUTF8")
+            elif verbo == "HELO":
+                self._responder("250 servidor_smtp_local")
+            elif verbo == "MAIL":
+                remetente, destinatarios = comando.split(":", 1)[1].strip(), []
+                self._responder("250 OK")
+            elif verbo == "RCPT":
+                destinatarios.append(comando.split(":", 1)[1].strip())
+                self._responder("250 OK")
+            elif verbo == "DATA":
+                self._responder("354 Termine com <CRLF>.<CRLF>")
+                linhas = []
+                while (dados := self.rfile.readline()) not in (b".\r\n", b".\n", b""):
+                    linhas.append(dados[1:] if dados.startswith(b"..") else dados)
+                with _trava_contador:
+                    numero = next(_contador)
+                destino = self.server.saida / f"mensagem_{numero:05d}.eml"
+                destino.write_bytes(b"".join(linhas))
+                print(f"[{numero}] {remetente} -> {', '.join(destinatarios)} ({destino.stat().st_size} bytes)")
+                self._responder("250 OK")
+            elif verbo == "RSET":
+                remetente, destinatarios = None, []
+                self._responder("250 OK")
+            elif verbo == "NOOP":
+                self._responder("250 OK")
+            elif verbo == "QUIT":
+                self._responder("221 Encerrando")
+                return
+            else:
+                self._responder("502 Comando nao implementado")
+
+
+class ServidorSMTPLocal(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, endereco: tuple[str, int], saida: Path):
+        self.saida = Path(saida)
+        self.saida.mkdir(parents=True, exist_ok=True)
+        super().__init__(endereco, _SessaoSMTP)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor SMTP local que grava as mensagens recebidas em arquivos .eml.")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--porta", type=int, default=1025)
+    parser.add_argument("--saida", default="caixa_saida/smtp_local", help="Pasta onde as mensagens são gravadas.")
+    args = parser.parse_args()
+
+    with ServidorSMTPLocal((args.host, args.porta), args.saida) as servidor:
+        print(f"Servidor SMTP local em {args.host}:{args.porta}, gravando em '{servidor.saida}'. Ctrl+C para encerrar.")
+        try:
+            servidor.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
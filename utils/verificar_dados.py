@@ -4,7 +4,7 @@ import sys
 import pandas as pd
 
 try:
-    from processamento_dados_base import obter_dados_processados, formatar_brl
+    from processamento_dados_base import obter_dados_processados, formatar_brl, formatar_brl_series
 except ImportError:
     logging.basicConfig(level=logging.INFO)
     logging.critical("Erro: O arquivo 'processamento_dados_base.py' ou suas funções não foram encontrados.")
@@ -42,13 +42,14 @@ def verificar_unidade(unidade_alvo: str, df_base_total: pd.DataFrame):
         df_agg = df_agg[df_agg['Valor_Executado'] > 0]
         
         if not df_agg.empty:
+            df_agg['valor_brl'] = formatar_brl_series(df_agg['Valor_Executado'])
             df_natureza_sum = df_agg.groupby('NATUREZA_FINAL')['Valor_Executado'].sum().nlargest(5)
             print("Top 5 Naturezas por Valor Executado em Projetos Exclusivos:")
-            for natureza, valor in df_natureza_sum.items():
-                print(f"- {natureza}: {formatar_brl(valor)}")
+            for natureza, valor_brl in formatar_brl_series(df_natureza_sum).items():
+                print(f"- {natureza}: {valor_brl}")
                 df_projetos = df_agg[df_agg['NATUREZA_FINAL'] == natureza].nlargest(3, 'Valor_Executado')
-                for _, row in df_projetos.iterrows():
-                    print(f"  > {row['PROJETO']}: {formatar_brl(row['Valor_Executado'])}")
+                for projeto, projeto_brl in zip(df_projetos['PROJETO'], df_projetos['valor_brl']):
+                    print(f"  > {projeto}: {projeto_brl}")
         else:
             print("Nenhum gasto executado para projetos exclusivos.")
     else:
@@ -0,0 +1,92 @@
+# utils/verificar_motor_agregacao.py
+"""
+Verifica a paridade entre os motores de agregação do cubo (pandas x DuckDB) e compara o tempo.
+
+Por padrão roda sobre bases sintéticas com casos de borda (chaves e valores nulos, mês 0,
+valores negativos); com --base-real usa a base processada (requer acesso aos bancos).
+
+Uso (a partir da raiz do projeto):
+    python -m utils.verificar_motor_agregacao [--linhas N] [--base-real]
+"""
+import argparse
+import logging
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from processamento.cubo_agregado import construir_cubo_agregado
+
+logging.basicConfig(level=logging.WARNING)
+
+
+def base_sintetica(linhas: int, semente: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(semente)
+    projetos = rng.integers(0, max(linhas // 200, 10), linhas)
+    anos = rng.choice([2024, 2025], linhas)
+    df = pd.DataFrame({
+        # Dois períodos, como numa base com PERIODOS_FILTRO: o mesmo mês de anos diferentes não pode ser somado.
+        'ANO_REFERENCIA': anos,
+        'PPA_REFERENCIA': pd.Series(anos).map('PPA {0} - {0}/DEZ'.format).astype(object),
+        'UNIDADE_FINAL': rng.choice([f'UNIDADE {i:02d}' for i in range(12)], linhas).astype(object),
+        'tipo_projeto': np.where(projetos % 3 == 0, 'Compartilhado', 'Exclusivo').astype(object),
+        'PROJETO': pd.Series(projetos).map('PROJETO {:04d}'.format).astype(object),
+        'ACAO': rng.choice([f'AÇÃO {i}' for i in range(8)], linhas).astype(object),
+        'NATUREZA_FINAL': rng.choice([f'NATUREZA {i}' for i in range(15)], linhas).astype(object),
+        'MES': rng.integers(0, 13, linhas),
+        'Valor_Planejado': rng.gamma(2, 1000, linhas) * (rng.random(linhas) > 0.4),
+        'Valor_Executado': rng.normal(800, 900, linhas) * (rng.random(linhas) > 0.5),
+    })
+    for coluna, fracao in (('ACAO', 0.01), ('NATUREZA_FINAL', 0.01), ('Valor_Planejado', 0.02), ('Valor_Executado', 0.02)):
+        df.loc[rng.random(linhas) < fracao, coluna] = None
+    return df
+
+
+def comparar(df_base: pd.DataFrame, descricao: str) -> bool:
+    tempos = {}
+    cubos = {}
+    for motor in ('pandas', 'duckdb'):
+        inicio = time.perf_counter()
+        cubos[motor] = construir_cubo_agregado(df_base, motor=motor)
+        tempos[motor] = time.perf_counter() - inicio
+
+    try:
+        pd.testing.assert_frame_equal(cubos['pandas'], cubos['duckdb'], check_dtype=False, rtol=1e-9)
+        resultado = "OK"
+    except AssertionError as e:
+        resultado = f"DIVERGENTE\n{e}"
+    print(f"{descricao:<35} {len(df_base):>10} linhas  pandas {tempos['pandas']:7.2f}s  duckdb {tempos['duckdb']:7.2f}s  {resultado}")
+    return resultado == "OK"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verifica a paridade entre os motores de agregação do cubo.")
+    parser.add_argument("--linhas", type=int, default=200_000, help="Linhas da maior base sintética (padrão: 200000).")
+    parser.add_argument("--base-real", action="store_true", help="Compara também sobre a base processada real.")
+    args = parser.parse_args()
+
+    try:
+        import duckdb  # noqa: F401
+    except ImportError:
+        print("O pacote 'duckdb' não está instalado (pip install duckdb).")
+        sys.exit(1)
+
+    ok = True
+    for semente, linhas in enumerate((1_000, args.linhas // 10, args.linhas)):
+        ok &= comparar(base_sintetica(linhas, semente), f"Sintética (semente {semente})")
+    ok &= comparar(base_sintetica(1_000).iloc[:0], "Sintética vazia")
+
+    if args.base_real:
+        from processamento.processamento_dados_base import obter_dados_processados
+        df_base_total = obter_dados_processados()
+        if df_base_total is None or df_base_total.empty:
+            print("ERRO: A base de dados não pôde ser carregada.")
+            sys.exit(1)
+        ok &= comparar(df_base_total, "Base processada")
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# visualizacao/ativos.py
+import functools
+import hashlib
+import logging
+import urllib.request
+
+from config.config import CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Versão única do plotly.js usada por todos os dashboards (template e gráficos gerados em Python).
+PLOTLY_JS_VERSAO = "2.32.0"
+PLOTLY_JS_CDN = f"https://cdn.plot.ly/plotly-{PLOTLY_JS_VERSAO}.min.js"
+
+
+@functools.lru_cache(maxsize=None)
+def publicar_plotly_js() -> str:
+    """
+    Garante uma única cópia do plotly.js em 'docs/assets', com a impressão digital
+    do conteúdo no nome (ex.: 'plotly-2.32.0.<hash>.min.js'), e retorna o caminho
+    relativo a 'docs/' para usar no <script src>.
+
+    O arquivo vem do pacote plotly instalado, quando ele embarca exatamente a versão
+    fixada, ou de um download único do CDN. Se nenhum dos dois estiver disponível,
+    retorna a URL do CDN para que o dashboard continue funcionando.
+    """
+    assets_dir = CONFIG.paths.assets_dir
+    for existente in sorted(assets_dir.glob(f"plotly-{PLOTLY_JS_VERSAO}.*.min.js")):
+        impressao = existente.name[len(f"plotly-{PLOTLY_JS_VERSAO}."):-len(".min.js")]
+        if hashlib.sha256(existente.read_bytes()).hexdigest().startswith(impressao):
+            return f"{assets_dir.name}/{existente.name}"
+        logger.warning("Ativo '%s' não confere com sua impressão digital. Será recriado.", existente.name)
+        existente.unlink()
+
+    conteudo = _obter_plotly_js()
+    if conteudo is None:
+        logger.warning("Não foi possível publicar o plotly.js localmente. Os dashboards usarão o CDN: %s", PLOTLY_JS_CDN)
+        return PLOTLY_JS_CDN
+
+    nome_arquivo = f"plotly-{PLOTLY_JS_VERSAO}.{hashlib.sha256(conteudo).hexdigest()[:12]}.min.js"
+    assets_dir.mkdir(parents=True, exist_ok=True)
+    (assets_dir / nome_arquivo).write_bytes(conteudo)
+    logger.info("plotly.js %s publicado em '%s'.", PLOTLY_JS_VERSAO, assets_dir / nome_arquivo)
+    return f"{assets_dir.name}/{nome_arquivo}"
+
+
+def _obter_plotly_js() -> bytes | None:
+    try:
+        from plotly.offline import get_plotlyjs, get_plotlyjs_version
+        if get_plotlyjs_version() == PLOTLY_JS_VERSAO:
+            return get_plotlyjs().encode('utf-8')
+    except ImportError:
+        pass
+
+    logger.info("Baixando plotly.js %s do CDN...", PLOTLY_JS_VERSAO)
+    try:
+        with urllib.request.urlopen(PLOTLY_JS_CDN, timeout=30) as resposta:
+            return resposta.read()
+    except OSError as e:
+        logger.warning("Falha ao baixar o plotly.js do CDN: %s", e)
+        return None
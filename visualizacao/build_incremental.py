@@ -0,0 +1,115 @@
+# visualizacao/build_incremental.py
+import functools
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from config.config import CONFIG
+
+logger = logging.getLogger(__name__)
+
+VERSAO_MANIFESTO = 2
+
+# Código que influencia o HTML gerado; qualquer alteração nesses arquivos invalida todos os dashboards.
+ARQUIVOS_CODIGO = (
+    'gerar_relatorio.py',
+    'visualizacao/*.py',
+    'processamento/cubo_agregado.py',
+    'processamento/particionamento.py',
+    'processamento/processamento_dados_base.py',
+)
+
+
+@functools.lru_cache(maxsize=None)
+def versao_codigo() -> str:
+    """Hash do conteúdo dos arquivos de código que participam da geração dos dashboards."""
+    base_dir = CONFIG.paths.base_dir
+    h = hashlib.sha256()
+    for padrao in ARQUIVOS_CODIGO:
+        for arquivo in sorted(base_dir.glob(padrao)):
+            h.update(arquivo.relative_to(base_dir).as_posix().encode('utf-8') + b'\0')
+            h.update(arquivo.read_bytes())
+    return h.hexdigest()
+
+
+def impressao_dados(df: pd.DataFrame) -> str:
+    """Hash do conteúdo de um DataFrame (colunas e valores, na ordem das linhas), independente do índice."""
+    h = hashlib.sha256()
+    h.update(json.dumps([str(coluna) for coluna in df.columns]).encode('utf-8'))
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def impressao_dashboard(df_unidade: pd.DataFrame, unidade_nova: str, sha256_template: str, cores: dict, plotly_js_src: str,
+                        parametros: dict | None = None) -> str:
+    """
+    Impressão digital de um dashboard: tudo o que determina o HTML de uma unidade.
+    Se ela não mudou e o arquivo em 'docs/' é o que foi gerado da última vez, a geração pode ser pulada.
+    `parametros` reúne as configurações de execução que alteram o HTML (ex.: limites do heatmap).
+    """
+    componentes = {
+        'manifesto': VERSAO_MANIFESTO,
+        'unidade': unidade_nova,
+        'dados': impressao_dados(df_unidade),
+        'template': sha256_template,
+        'cores': cores,
+        'plotly_js': plotly_js_src,
+        'codigo': versao_codigo(),
+        'parametros': parametros or {},
+    }
+    return hashlib.sha256(json.dumps(componentes, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def sha256_arquivo(caminho: Path) -> str:
+    return hashlib.sha256(Path(caminho).read_bytes()).hexdigest()
+
+
+def saida_atualizada(entrada: dict | None, impressao: str, caminho_saida: Path) -> bool:
+    """
+    True se o manifesto registra esta impressão e o arquivo de saída (e os arquivos auxiliares
+    em 'extras', relativos à mesma pasta) ainda são os que foram gerados.
+    """
+    if entrada is None or entrada.get('impressao') != impressao:
+        return False
+    arquivos = {caminho_saida: entrada.get('sha256')}
+    arquivos.update({caminho_saida.parent / nome: sha256 for nome, sha256 in entrada.get('extras', {}).items()})
+    return all(caminho.exists() and sha256_arquivo(caminho) == sha256 for caminho, sha256 in arquivos.items())
+
+
+def gravar_se_alterado(caminho: Path, conteudo: str) -> bool:
+    """Grava `conteudo` em `caminho` só se for diferente do atual, preservando a data do arquivo. Retorna True se gravou."""
+    if caminho.exists() and caminho.read_text(encoding='utf-8') == conteudo:
+        return False
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    caminho_tmp = caminho.with_name(caminho.name + '.tmp')
+    caminho_tmp.write_text(conteudo, encoding='utf-8')
+    os.replace(caminho_tmp, caminho)
+    return True
+
+
+def carregar_manifesto(caminho: Path | None = None) -> dict[str, dict]:
+    """Lê o manifesto do último build (unidade -> entrada). Manifesto ausente ou inválido equivale a vazio."""
+    caminho = caminho or CONFIG.paths.manifesto_build
+    if not caminho.exists():
+        return {}
+    try:
+        dados = json.loads(caminho.read_text(encoding='utf-8'))
+    except (OSError, ValueError) as e:
+        logger.warning("Manifesto de build '%s' ilegível (%s). Todos os dashboards serão gerados.", caminho.name, e)
+        return {}
+    if dados.get('versao') != VERSAO_MANIFESTO:
+        return {}
+    return dados.get('dashboards', {})
+
+
+def salvar_manifesto(dashboards: dict[str, dict], caminho: Path | None = None) -> None:
+    caminho = caminho or CONFIG.paths.manifesto_build
+    conteudo = json.dumps({'versao': VERSAO_MANIFESTO, 'dashboards': dashboards}, indent=2, sort_keys=True, ensure_ascii=False)
+    caminho_tmp = caminho.with_name(caminho.name + '.tmp')
+    caminho_tmp.write_text(conteudo, encoding='utf-8')
+    os.replace(caminho_tmp, caminho)
+    logger.info("Manifesto de build salvo em '%s' (%d dashboards).", caminho, len(dashboards))
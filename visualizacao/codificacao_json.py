@@ -0,0 +1,106 @@
+# visualizacao/codificacao_json.py
+import json
+import logging
+import math
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # Dependência opcional: sem ela, usa o json da biblioteca padrão.
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+VERSAO_CODIFICACAO = 1
+# Precisão dos números do dashboard: centavos bastam para valores e para percentuais.
+CASAS_DECIMAIS = 2
+CHAVE_TEXTOS = "$s"
+
+
+def codificar_dados_graficos(dados: dict, casas_decimais: int = CASAS_DECIMAIS) -> str:
+    """
+    Serializa os dados dos gráficos para a 'data-island' em formato compacto.
+
+    - Listas de textos (inclusive listas de listas, como os detalhes por projeto) viram
+      listas de índices em um dicionário de textos único para o documento, então rótulos
+      repetidos entre gráficos são escritos uma vez só: {"$s": [0, 3, 3, 1]}.
+    - Números são arredondados para `casas_decimais`; valores inteiros saem sem ".0" e
+      NaN/infinito viram null.
+
+    O resultado é {"v": versão, "s": [textos], "d": dados}, decodificado pelo template
+    (decodificarDadosGraficos) ou por `decodificar_dados_graficos`.
+    """
+    textos: dict[str, int] = {}
+    pacote = {"v": VERSAO_CODIFICACAO, "s": None, "d": _codificar(dados, textos, casas_decimais)}
+    pacote["s"] = list(textos)
+
+    if orjson is not None:
+        texto = orjson.dumps(pacote).decode('utf-8')
+    else:
+        texto = json.dumps(pacote, ensure_ascii=False, separators=(',', ':'), allow_nan=False)
+    # O JSON fica dentro de um <script>: impede que um texto feche a tag antes da hora.
+    return texto.replace('</', '<\\/')
+
+
+def decodificar_dados_graficos(texto: str) -> dict:
+    """Inverso de `codificar_dados_graficos` (a menos do arredondamento)."""
+    pacote = json.loads(texto)
+    textos = pacote["s"]
+
+    def mapear(indices):
+        return [mapear(i) for i in indices] if isinstance(indices, list) else textos[indices]
+
+    def expandir(valor):
+        if isinstance(valor, dict):
+            if CHAVE_TEXTOS in valor:
+                return mapear(valor[CHAVE_TEXTOS])
+            return {chave: expandir(v) for chave, v in valor.items()}
+        if isinstance(valor, list):
+            return [expandir(v) for v in valor]
+        return valor
+
+    return expandir(pacote["d"])
+
+
+def _codificar(valor, textos: dict[str, int], casas_decimais: int):
+    if isinstance(valor, dict):
+        return {chave: _codificar(v, textos, casas_decimais) for chave, v in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        if _somente_textos(valor):
+            return {CHAVE_TEXTOS: _indices(valor, textos)}
+        return [_codificar(v, textos, casas_decimais) for v in valor]
+    if isinstance(valor, np.generic):
+        valor = valor.item()
+    if isinstance(valor, float):
+        return _numero(valor, casas_decimais)
+    return valor
+
+
+def _somente_textos(valores) -> bool:
+    """True se a lista (possivelmente aninhada) contém ao menos um texto e nada além de textos."""
+    tem_texto = False
+    for valor in valores:
+        if isinstance(valor, str):
+            tem_texto = True
+        elif isinstance(valor, (list, tuple)):
+            if valor and not _somente_textos(valor):
+                return False
+            tem_texto = tem_texto or bool(valor)
+        else:
+            return False
+    return tem_texto
+
+
+def _indices(valores, textos: dict[str, int]):
+    return [
+        _indices(valor, textos) if isinstance(valor, (list, tuple)) else textos.setdefault(valor, len(textos))
+        for valor in valores
+    ]
+
+
+def _numero(valor: float, casas_decimais: int):
+    if not math.isfinite(valor):
+        return None
+    arredondado = round(valor, casas_decimais)
+    return int(arredondado) if arredondado.is_integer() else arredondado
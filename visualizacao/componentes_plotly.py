@@ -1,71 +1,59 @@
 # visualizacao/componentes_plotly.py
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
-import numpy as np
 from config.config import CORES # Importa o dicionário de cores
+from visualizacao.preparadores_dados import preparar_dados_sunburst, preparar_dados_heatmap, preparar_dados_inercia, MAX_PROJETOS_HEATMAP
 
-def criar_grafico_sunburst(df_exclusivos: pd.DataFrame) -> str:
-    """Gera o código HTML de um gráfico Sunburst a partir dos dados de projetos exclusivos."""
-    if df_exclusivos.empty:
-        return '<div class="flex items-center justify-center h-full text-center text-gray-500">Sem dados para exibir.</div>'
+# Nos dashboards, estes três gráficos são desenhados pelo JS do template a partir dos dados
+# em 'data-island' (ver preparadores_dados.py). As funções abaixo montam as mesmas figuras
+# em Python, a partir dos mesmos dados, para uso fora do dashboard (testes, exportações).
+# Os gráficos emitem apenas o <div> e a especificação; o plotly.js é carregado uma única vez
+# pelo template a partir de 'docs/assets' (ver visualizacao/ativos.py).
 
-    df_sun = df_exclusivos.groupby(['PROJETO', 'NATUREZA_FINAL']).agg(
-        Valor_Planejado=('Valor_Planejado', 'sum'),
-        Valor_Executado=('Valor_Executado', 'sum')
-    ).reset_index()
-    df_sun = df_sun[df_sun['Valor_Planejado'] > 0]
+def _mensagem_sem_dados(dados: dict) -> str:
+    mensagem = dados.get('mensagem', 'Sem dados para exibir.')
+    return f'<div class="flex items-center justify-center h-full text-center text-gray-500">{mensagem}</div>'
 
-    if df_sun.empty:
-        return '<div class="flex items-center justify-center h-full text-center text-gray-500">Sem dados com orçamento planejado para exibir.</div>'
-
-    df_sun['perc_exec'] = (df_sun['Valor_Executado'] / df_sun['Valor_Planejado']) * 100
-    cores_projeto = df_sun.groupby('PROJETO').apply(
-        lambda x: (x['Valor_Executado'].sum() / x['Valor_Planejado'].sum()) * 100 if x['Valor_Planejado'].sum() > 0 else 0,
-        include_groups=False
-    ).tolist()
+def criar_grafico_sunburst(df_exclusivos: pd.DataFrame) -> str:
+    """Gera o código HTML de um gráfico Sunburst a partir dos dados de projetos exclusivos."""
+    dados = preparar_dados_sunburst(df_exclusivos)
+    if not dados.get('labels'):
+        return _mensagem_sem_dados(dados)
 
     fig = go.Figure()
     fig.add_trace(go.Sunburst(
-        labels=df_sun['NATUREZA_FINAL'].tolist() + df_sun['PROJETO'].unique().tolist(),
-        parents=df_sun['PROJETO'].tolist() + [""] * df_sun['PROJETO'].nunique(),
-        values=df_sun['Valor_Planejado'].tolist() + df_sun.groupby('PROJETO')['Valor_Planejado'].sum().tolist(),
+        labels=dados['labels'],
+        parents=dados['parents'],
+        values=dados['values'],
         branchvalues='total',
         marker=dict(
-            colors=df_sun['perc_exec'].tolist() + cores_projeto,
+            colors=dados['colors'],
             colorscale='RdYlGn', cmin=0, cmax=120,
             colorbar=dict(title='% Executado')
         ),
         hovertemplate='<b>%{label}</b><br>Planejado: %{value:,.2f}<br>Execução: %{color:.1f}%<extra></extra>'
     ))
     fig.update_layout(margin=dict(t=10, l=10, r=10, b=10))
-    
-    return fig.to_html(full_html=False)
 
-def criar_grafico_heatmap(df_exclusivos: pd.DataFrame) -> str:
-    """Gera o código HTML de um gráfico Heatmap da performance de execução."""
-    if df_exclusivos.empty:
-        return '<div class="flex items-center justify-center h-full text-center text-gray-500">Sem dados para exibir.</div>'
-
-    df_agg = df_exclusivos.groupby(['PROJETO', 'NATUREZA_FINAL']).agg(
-        Valor_Planejado=('Valor_Planejado', 'sum'),
-        Valor_Executado=('Valor_Executado', 'sum')
-    ).reset_index()
-    
-    df_agg = df_agg[df_agg['Valor_Planejado'] > 0]
-    if df_agg.empty:
-        return '<div class="flex items-center justify-center h-full text-center text-gray-500">Sem dados com orçamento planejado para exibir.</div>'
+    return fig.to_html(full_html=False, include_plotlyjs=False)
 
-    df_agg['perc_exec'] = (df_agg['Valor_Executado'] / df_agg['Valor_Planejado']) * 100
-    pivot_df = df_agg.pivot_table(index='PROJETO', columns='NATUREZA_FINAL', values='perc_exec', fill_value=None)
-    
-    if pivot_df.empty:
-        return '<div class="flex items-center justify-center h-full text-center text-gray-500">Não foi possível criar a visão pivotada.</div>'
+def criar_grafico_heatmap(df_exclusivos: pd.DataFrame, max_projetos: int | None = MAX_PROJETOS_HEATMAP) -> str:
+    """Gera o código HTML de um gráfico Heatmap da performance de execução."""
+    dados = preparar_dados_heatmap(df_exclusivos, max_projetos)
+    if not dados.get('y'):
+        return _mensagem_sem_dados(dados)
 
-    num_projetos = len(pivot_df.index)
+    num_projetos = len(dados['y'])
     dynamic_height = max(400, num_projetos * 35)
 
+    # Expande as triplas esparsas (i, j, v) para a matriz densa, com None nas células sem planejamento.
+    z = [[None] * len(dados['x']) for _ in dados['y']]
+    for i, j, v in zip(dados['i'], dados['j'], dados['v']):
+        z[i][j] = v
+
     fig = go.Figure(data=go.Heatmap(
-        z=pivot_df.values, x=pivot_df.columns, y=pivot_df.index,
+        z=z, x=dados['x'], y=dados['y'],
         colorscale='RdYlGn', zmin=0, zmid=80, zmax=120,
         hovertemplate='Projeto: %{y}<br>Natureza: %{x}<br>Execução: %{z:.1f}%<extra></extra>',
         xgap=1, ygap=1
@@ -74,48 +62,32 @@ def criar_grafico_heatmap(df_exclusivos: pd.DataFrame) -> str:
         yaxis_nticks=num_projetos, xaxis_tickangle=-45,
         height=dynamic_height, margin=dict(l=250)
     )
-    
-    return fig.to_html(full_html=False)
 
-def criar_grafico_inercia(df_exclusivos: pd.DataFrame) -> str:
-    """Gera o código HTML de um gráfico de barras para a inércia de execução."""
-    if df_exclusivos.empty:
-        return '<div class="flex items-center justify-center h-full text-center text-gray-500">Sem dados para exibir.</div>'
+    return fig.to_html(full_html=False, include_plotlyjs=False)
 
-    def calcular_inercia(group):
-        if (plan_mes := group[group['Valor_Planejado'] > 0]['MES'].min()) and pd.notna(plan_mes):
-            if (gasto_mes := group[group['Valor_Executado'] > 0]['MES'].min()) and pd.notna(gasto_mes):
-                return gasto_mes - plan_mes
-        return np.nan
+def criar_grafico_inercia(df_exclusivos: pd.DataFrame) -> str:
+    """
+    Gera o código HTML de um gráfico de barras para a inércia de execução.
+    Espera uma fatia do cubo agregado (usa os marcadores de primeiro mês).
+    """
+    dados = preparar_dados_inercia(df_exclusivos)
+    if not dados.get('naturezas'):
+        return _mensagem_sem_dados(dados)
 
-    df_inercia = df_exclusivos.groupby(['PROJETO', 'ACAO', 'NATUREZA_FINAL']).apply(calcular_inercia, include_groups=False).dropna()
-    if df_inercia.empty:
-        return '<div class="flex items-center justify-center h-full text-center text-gray-500">Não há dados de inércia para calcular.</div>'
-        
-    df_inercia = df_inercia.reset_index(name='inercia_meses')
-    df_inercia = df_inercia[df_inercia['inercia_meses'] > 0]
-    
-    if df_inercia.empty:
-        return '<div class="flex items-center justify-center h-full text-center text-gray-500">Nenhum atraso de execução identificado.</div>'
-    
-    idx_max = df_inercia.groupby('NATUREZA_FINAL')['inercia_meses'].idxmax()
-    df_maior_inercia = df_inercia.loc[idx_max].sort_values(by='inercia_meses', ascending=False)
-    
     hover_text = [
-        f"<b>Projeto:</b> {row['PROJETO']}<br>"
-        f"<b>Ação:</b> {row['ACAO']}<br>"
-        f"<b>Atraso:</b> {row['inercia_meses']:.0f} meses"
-        for _, row in df_maior_inercia.iterrows()
+        f"<b>Projeto:</b> {projeto}<br>"
+        f"<b>Ação:</b> {acao}<br>"
+        f"<b>Atraso:</b> {meses:.0f} meses"
+        for projeto, acao, meses in zip(dados['projetos'], dados['acoes'], dados['meses'])
     ]
 
     fig = go.Figure()
     fig.add_trace(go.Bar(
-        x=df_maior_inercia['inercia_meses'], y=df_maior_inercia['NATUREZA_FINAL'],
+        x=dados['meses'], y=dados['naturezas'],
         orientation='h', marker_color=CORES['alert_danger'],
-        text=df_maior_inercia['inercia_meses'], textposition='outside',
+        text=np.asarray(dados['meses']), textposition='outside',
         hoverinfo='text', hovertext=hover_text
     ))
     fig.update_layout(plot_bgcolor='white', yaxis=dict(autorange="reversed"), margin=dict(l=250))
 
-    return fig.to_html(full_html=False)
-
+    return fig.to_html(full_html=False, include_plotlyjs=False)
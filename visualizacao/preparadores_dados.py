@@ -1,8 +1,20 @@
 # visualizacao/preparadores_dados.py (VERSÃO FINAL E CORRIGIDA)
 import pandas as pd
-from processamento.processamento_dados_base import formatar_brl
+from processamento.processamento_dados_base import formatar_brl_series
 from config.config import CORES
 
+# Acima deste número de projetos o heatmap mostra os de maior valor planejado e agrupa o resto em "Outros".
+MAX_PROJETOS_HEATMAP = 40
+
+def _top_k_por_grupo(df: pd.DataFrame, coluna_grupo: str, coluna_valor: str, k: int = 3) -> pd.DataFrame:
+    """
+    As `k` linhas de maior `coluna_valor` de cada grupo, em ordem decrescente de valor.
+    Equivale a `nlargest(k)` por grupo (empates resolvidos pela ordem original das linhas),
+    mas com uma única ordenação estável para todos os grupos em vez de um `apply` por grupo.
+    """
+    ordenado = df.dropna(subset=[coluna_valor]).sort_values(coluna_valor, ascending=False, kind='stable')
+    return ordenado.groupby(coluna_grupo, sort=False).head(k)
+
 def preparar_dados_kpi(df_unidade: pd.DataFrame, df_exclusivos: pd.DataFrame, df_compartilhados: pd.DataFrame, unidade_nova: str) -> dict:
     def safe_div(numerator, denominator): return (numerator / denominator * 100) if denominator > 0 else 0
     kpi_total_executado = df_unidade['Valor_Executado'].sum()
@@ -11,14 +23,20 @@ def preparar_dados_kpi(df_unidade: pd.DataFrame, df_exclusivos: pd.DataFrame, df
     kpi_exclusivo_planejado = df_exclusivos['Valor_Planejado'].sum()
     kpi_compartilhado_executado = df_compartilhados['Valor_Executado'].sum()
     kpi_compartilhado_planejado = df_compartilhados['Valor_Planejado'].sum()
+    (
+        total_exec_brl, total_plan_brl, exclusivo_exec_brl, exclusivo_plan_brl, compartilhado_exec_brl, compartilhado_plan_brl
+    ) = formatar_brl_series(pd.Series([
+        kpi_total_executado, kpi_total_planejado, kpi_exclusivo_executado,
+        kpi_exclusivo_planejado, kpi_compartilhado_executado, kpi_compartilhado_planejado
+    ])).tolist()
     return {
         "__UNIDADE_ALVO__": unidade_nova,
         "__KPI_TOTAL_PERC__": f"{safe_div(kpi_total_executado, kpi_total_planejado):.1f}%",
-        "__KPI_TOTAL_VALORES__": f"{formatar_brl(kpi_total_executado)} de {formatar_brl(kpi_total_planejado)}",
+        "__KPI_TOTAL_VALORES__": f"{total_exec_brl} de {total_plan_brl}",
         "__KPI_EXCLUSIVO_PERC__": f"{safe_div(kpi_exclusivo_executado, kpi_exclusivo_planejado):.1f}%",
-        "__KPI_EXCLUSIVO_VALORES__": f"{formatar_brl(kpi_exclusivo_executado)} de {formatar_brl(kpi_exclusivo_planejado)}",
+        "__KPI_EXCLUSIVO_VALORES__": f"{exclusivo_exec_brl} de {exclusivo_plan_brl}",
         "__KPI_COMPARTILHADO_PERC__": f"{safe_div(kpi_compartilhado_executado, kpi_compartilhado_planejado):.1f}%",
-        "__KPI_COMPARTILHADO_VALORES__": f"{formatar_brl(kpi_compartilhado_executado)} de {formatar_brl(kpi_compartilhado_planejado)}",
+        "__KPI_COMPARTILHADO_VALORES__": f"{compartilhado_exec_brl} de {compartilhado_plan_brl}",
     }
 
 def preparar_dados_grafico_tendencia(df_unidade: pd.DataFrame) -> dict:
@@ -38,10 +56,9 @@ def preparar_dados_treemap(df_source: pd.DataFrame) -> dict:
     df_agg = df_source.groupby(['NATUREZA_FINAL', 'PROJETO'])['Valor_Executado'].sum().reset_index()
     df_agg = df_agg[df_agg['Valor_Executado'] > 0]
     if df_agg.empty: return {}
-    def format_projetos(group):
-        top_projetos = group.nlargest(3, 'Valor_Executado')
-        return '<br>'.join([f"- {row.PROJETO} ({formatar_brl(row.Valor_Executado)})" for _, row in top_projetos.iterrows()])
-    projetos_por_natureza = df_agg.groupby('NATUREZA_FINAL').apply(format_projetos, include_groups=False).to_dict()
+    df_top = _top_k_por_grupo(df_agg, 'NATUREZA_FINAL', 'Valor_Executado')
+    rotulos = "- " + df_top['PROJETO'].astype(str) + " (" + formatar_brl_series(df_top['Valor_Executado']) + ")"
+    projetos_por_natureza = rotulos.groupby(df_top['NATUREZA_FINAL'], sort=False).agg('<br>'.join).to_dict()
     df_natureza_sum = df_agg.groupby('NATUREZA_FINAL')['Valor_Executado'].sum().reset_index()
     return {
         'labels': df_natureza_sum['NATUREZA_FINAL'].tolist(),
@@ -51,18 +68,23 @@ def preparar_dados_treemap(df_source: pd.DataFrame) -> dict:
     }
 
 def preparar_dados_orcamento_ocioso(df_unidade: pd.DataFrame) -> dict:
-    """Prepara os dados para o gráfico de orçamento ocioso (Chart.js), com lógica robusta à prova de falhas."""
+    """
+    Prepara os dados para o gráfico de orçamento ocioso (Chart.js), com lógica robusta à prova de falhas.
+    Espera uma fatia do cubo agregado (usa 'Saldo_Positivo' para o detalhe por ação).
+    """
     if df_unidade.empty: return {}
 
-    df_unidade['saldo_nao_executado'] = df_unidade['Valor_Planejado'].fillna(0) - df_unidade['Valor_Executado'].fillna(0)
+    # O saldo não é gravado em df_unidade: ele pode ser um bloco somente leitura da base particionada.
+    saldo_nao_executado = df_unidade['Valor_Planejado'].fillna(0) - df_unidade['Valor_Executado'].fillna(0)
 
-    saldo_total_por_projeto = df_unidade.groupby('PROJETO')['saldo_nao_executado'].sum()
+    saldo_total_por_projeto = saldo_nao_executado.groupby(df_unidade['PROJETO']).sum()
     top_7_projetos_com_saldo_positivo = saldo_total_por_projeto[saldo_total_por_projeto > 0].nlargest(7)
 
     if top_7_projetos_com_saldo_positivo.empty: return {}
 
     top_7_nomes_projetos = top_7_projetos_com_saldo_positivo.index
-    df_filtrado = df_unidade[df_unidade['PROJETO'].isin(top_7_nomes_projetos)].copy()
+    mascara_top = df_unidade['PROJETO'].isin(top_7_nomes_projetos)
+    df_filtrado = df_unidade[mascara_top].assign(saldo_nao_executado=saldo_nao_executado[mascara_top])
     
     df_pivot = df_filtrado.pivot_table(index='PROJETO', columns='tipo_projeto', values='saldo_nao_executado', aggfunc='sum', fill_value=0)
     df_pivot = df_pivot.reindex(top_7_nomes_projetos).fillna(0)
@@ -72,11 +94,10 @@ def preparar_dados_orcamento_ocioso(df_unidade: pd.DataFrame) -> dict:
     values_exclusivo = df_pivot['Exclusivo'].tolist() if 'Exclusivo' in df_pivot.columns else [0] * len(df_pivot)
     values_compartilhado = df_pivot['Compartilhado'].tolist() if 'Compartilhado' in df_pivot.columns else [0] * len(df_pivot)
 
-    def formatar_acoes(group):
-        top_acoes = group[group['saldo_nao_executado'] > 0].groupby('ACAO')['saldo_nao_executado'].sum().nlargest(3)
-        return [f"- {acao}: {formatar_brl(saldo)}" for acao, saldo in top_acoes.items()]
-
-    detalhes_por_projeto = df_filtrado.groupby('PROJETO').apply(formatar_acoes, include_groups=False).reindex(df_pivot.index, fill_value=[])
+    saldo_por_acao = df_filtrado.groupby(['PROJETO', 'ACAO'])['Saldo_Positivo'].sum().reset_index()
+    top_acoes = _top_k_por_grupo(saldo_por_acao[saldo_por_acao['Saldo_Positivo'] > 0], 'PROJETO', 'Saldo_Positivo')
+    rotulos = "- " + top_acoes['ACAO'].astype(str) + ": " + formatar_brl_series(top_acoes['Saldo_Positivo'])
+    detalhes_por_projeto = rotulos.groupby(top_acoes['PROJETO'], sort=False).agg(list)
     tipos_projeto = df_filtrado.drop_duplicates(subset=['PROJETO']).set_index('PROJETO')['tipo_projeto']
     
     detalhes_exclusivo = [detalhes_por_projeto.get(proj, []) if tipos_projeto.get(proj) == 'Exclusivo' else [] for proj in df_pivot.index]
@@ -98,14 +119,111 @@ def preparar_dados_execucao_sem_planejamento(df_source: pd.DataFrame, tipo: str)
     ).reset_index()
     df_sem_plan = df_agg[(df_agg['Valor_Planejado'] <= 0) & (df_agg['Valor_Executado'] > 0)]
     if df_sem_plan.empty: return {}
-    def formatar_projetos(group):
-        top = group.nlargest(3, 'Valor_Executado')
-        return [f"- {row.PROJETO}: {formatar_brl(row.Valor_Executado)}" for _, row in top.iterrows()]
+    df_top = _top_k_por_grupo(df_sem_plan, 'NATUREZA_FINAL', 'Valor_Executado')
+    rotulos = "- " + df_top['PROJETO'].astype(str) + ": " + formatar_brl_series(df_top['Valor_Executado'])
+    detalhes = rotulos.groupby(df_top['NATUREZA_FINAL'], sort=False).agg(list)
     df_sum = df_sem_plan.groupby('NATUREZA_FINAL')['Valor_Executado'].sum().sort_values(ascending=False)
-    detalhes = df_sem_plan.groupby('NATUREZA_FINAL').apply(formatar_projetos, include_groups=False).reindex(df_sum.index)
     return {
         "labels": df_sum.index.tolist(),
         "values": df_sum.values.tolist(),
-        "projetos": [d if isinstance(d, list) else [] for d in detalhes],
+        "projetos": [detalhes.get(natureza, []) for natureza in df_sum.index],
         "color": CORES['alert_danger'] if tipo == 'Exclusivo' else CORES['alert_warning']
     }
+
+def preparar_dados_sunburst(df_exclusivos: pd.DataFrame) -> dict:
+    """
+    Dados do Sunburst (Plotly, desenhado no navegador): naturezas como folhas sob cada projeto,
+    com o Valor Planejado como tamanho e o % de execução como cor.
+    """
+    if df_exclusivos.empty: return {}
+    df_sun = df_exclusivos.groupby(['PROJETO', 'NATUREZA_FINAL']).agg(
+        Valor_Planejado=('Valor_Planejado', 'sum'),
+        Valor_Executado=('Valor_Executado', 'sum')
+    ).reset_index()
+    df_sun = df_sun[df_sun['Valor_Planejado'] > 0]
+    if df_sun.empty: return {"mensagem": "Sem dados com orçamento planejado para exibir."}
+
+    perc_exec = df_sun['Valor_Executado'] / df_sun['Valor_Planejado'] * 100
+    df_projeto = df_sun.groupby('PROJETO')[['Valor_Planejado', 'Valor_Executado']].sum()
+    perc_projeto = df_projeto['Valor_Executado'] / df_projeto['Valor_Planejado'] * 100
+    return {
+        "labels": df_sun['NATUREZA_FINAL'].tolist() + df_projeto.index.tolist(),
+        "parents": df_sun['PROJETO'].tolist() + [""] * len(df_projeto),
+        "values": df_sun['Valor_Planejado'].tolist() + df_projeto['Valor_Planejado'].tolist(),
+        "colors": perc_exec.tolist() + perc_projeto.tolist(),
+    }
+
+def preparar_dados_heatmap(df_exclusivos: pd.DataFrame, max_projetos: int | None = MAX_PROJETOS_HEATMAP) -> dict:
+    """
+    Matriz Projeto x Natureza com o % de execução, em formato esparso: apenas as células com
+    planejamento, como triplas (linha 'i', coluna 'j', valor 'v') sobre os eixos 'y' e 'x'.
+
+    Com mais de `max_projetos` projetos, exibe os `max_projetos` de maior valor planejado e
+    agrega os demais em uma linha "Outros" (% de execução do conjunto), de modo que o tamanho
+    do gráfico não cresce com a unidade. `max_projetos=None` devolve a matriz completa.
+    """
+    if df_exclusivos.empty: return {}
+    df_agg = df_exclusivos.groupby(['PROJETO', 'NATUREZA_FINAL']).agg(
+        Valor_Planejado=('Valor_Planejado', 'sum'),
+        Valor_Executado=('Valor_Executado', 'sum')
+    ).reset_index()
+    df_agg = df_agg[df_agg['Valor_Planejado'] > 0]
+    if df_agg.empty: return {"mensagem": "Sem dados com orçamento planejado para exibir."}
+
+    planejado_por_projeto = df_agg.groupby('PROJETO')['Valor_Planejado'].sum()
+    df_outros = df_agg.iloc[:0]
+    if max_projetos is not None and len(planejado_por_projeto) > max_projetos:
+        mascara_top = df_agg['PROJETO'].isin(planejado_por_projeto.nlargest(max_projetos).index)
+        df_outros = df_agg[~mascara_top].groupby('NATUREZA_FINAL')[['Valor_Planejado', 'Valor_Executado']].sum().reset_index()
+        df_agg = df_agg[mascara_top]
+
+    projetos = pd.Index(df_agg['PROJETO'].unique())
+    naturezas = pd.Index(sorted(set(df_agg['NATUREZA_FINAL']) | set(df_outros['NATUREZA_FINAL'])))
+    linhas = projetos.get_indexer(df_agg['PROJETO']).tolist() + [len(projetos)] * len(df_outros)
+    colunas = naturezas.get_indexer(df_agg['NATUREZA_FINAL']).tolist() + naturezas.get_indexer(df_outros['NATUREZA_FINAL']).tolist()
+    perc_exec = pd.concat([df_agg, df_outros])
+    perc_exec = perc_exec['Valor_Executado'] / perc_exec['Valor_Planejado'] * 100
+
+    dados = {
+        "x": naturezas.tolist(),
+        "y": projetos.tolist(),
+        "i": linhas,
+        "j": colunas,
+        "v": perc_exec.tolist(),
+    }
+    if not df_outros.empty:
+        projetos_omitidos = len(planejado_por_projeto) - len(projetos)
+        dados["y"].append(f"Outros ({projetos_omitidos} projetos)")
+        dados["omitidos"] = projetos_omitidos
+    return dados
+
+def preparar_dados_inercia(df_exclusivos: pd.DataFrame) -> dict:
+    """
+    Maior inércia (meses entre o primeiro mês planejado e o primeiro mês executado) por natureza.
+    Espera uma fatia do cubo agregado (usa os marcadores de primeiro mês).
+    """
+    if df_exclusivos.empty: return {}
+
+    # Primeiro mês planejado e primeiro mês executado de cada (projeto, ação, natureza) em uma única agregação.
+    meses = df_exclusivos['MES']
+    primeiros_meses = pd.DataFrame({
+        'planejado': meses.where(df_exclusivos['Primeiro_Mes_Planejado']),
+        'executado': meses.where(df_exclusivos['Primeiro_Mes_Executado']),
+    }).groupby([df_exclusivos['PROJETO'], df_exclusivos['ACAO'], df_exclusivos['NATUREZA_FINAL']]).min()
+    # Mês ausente ou igual a 0 não gera inércia.
+    validos = primeiros_meses.notna().all(axis=1) & primeiros_meses.ne(0).all(axis=1)
+    df_inercia = (primeiros_meses['executado'] - primeiros_meses['planejado'])[validos]
+    if df_inercia.empty: return {"mensagem": "Não há dados de inércia para calcular."}
+
+    df_inercia = df_inercia.reset_index(name='inercia_meses')
+    df_inercia = df_inercia[df_inercia['inercia_meses'] > 0]
+    if df_inercia.empty: return {"mensagem": "Nenhum atraso de execução identificado."}
+
+    idx_max = df_inercia.groupby('NATUREZA_FINAL')['inercia_meses'].idxmax()
+    df_maior_inercia = df_inercia.loc[idx_max].sort_values(by='inercia_meses', ascending=False)
+    return {
+        "naturezas": df_maior_inercia['NATUREZA_FINAL'].tolist(),
+        "meses": df_maior_inercia['inercia_meses'].tolist(),
+        "projetos": df_maior_inercia['PROJETO'].tolist(),
+        "acoes": df_maior_inercia['ACAO'].tolist(),
+    }
@@ -0,0 +1,95 @@
+# visualizacao/previa_estatica.py
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from config.config import CORES
+
+logger = logging.getLogger(__name__)
+
+# 1280 x 720 px: mesma largura da captura do navegador, suficiente para o corpo do e-mail.
+TAMANHO_FIGURA = (12.8, 7.2)
+DPI = 100
+
+CARTOES_KPI = (
+    ("Execução Total", "__KPI_TOTAL_PERC__", "__KPI_TOTAL_VALORES__", CORES['brand_primary']),
+    ("Projetos Exclusivos", "__KPI_EXCLUSIVO_PERC__", "__KPI_EXCLUSIVO_VALORES__", CORES['project_exclusive']),
+    ("Projetos Compartilhados", "__KPI_COMPARTILHADO_PERC__", "__KPI_COMPARTILHADO_VALORES__", CORES['project_shared']),
+)
+
+
+def _formatar_eixo(valor: float, _posicao=None) -> str:
+    """Mesmo formato dos ticks do gráfico de tendência no dashboard (Chart.js)."""
+    return f"{valor / 1e6:.1f}M" if valor >= 1e6 else f"{valor / 1e3:.0f}k"
+
+
+def renderizar_previa(kpi_dict: dict, tendencia: dict, destino: Path) -> Path:
+    """
+    Gera a prévia estática (PNG) de um dashboard: os três KPIs e o gráfico de tendência.
+
+    Usa os mesmos dicionários de `preparar_dados_kpi` e `preparar_dados_grafico_tendencia`,
+    desenhados com o matplotlib no próprio processo, sem navegador nem rede.
+    """
+    # Figure + FigureCanvasAgg (sem pyplot): nenhum estado global, seguro em processos paralelos.
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    from matplotlib.ticker import FuncFormatter
+
+    fig = Figure(figsize=TAMANHO_FIGURA, dpi=DPI, facecolor='#F8FAFC')
+    FigureCanvasAgg(fig)
+    grade = fig.add_gridspec(2, 3, height_ratios=(1, 2.4), left=0.04, right=0.96, top=0.86, bottom=0.08, hspace=0.35, wspace=0.08)
+    fig.text(0.04, 0.93, f"Performance Orçamentária — {kpi_dict.get('__UNIDADE_ALVO__', '')}",
+             fontsize=18, fontweight='bold', color='#0F172A', va='center', parse_math=False)
+
+    for coluna, (titulo, chave_perc, chave_valores, cor) in enumerate(CARTOES_KPI):
+        ax = fig.add_subplot(grade[0, coluna])
+        ax.set_xticks([]); ax.set_yticks([])
+        ax.set_facecolor('white')
+        for lado, spine in ax.spines.items():
+            spine.set_color(cor if lado == 'left' else '#E2E8F0')
+            spine.set_linewidth(4 if lado == 'left' else 1)
+        ax.text(0.06, 0.78, titulo, transform=ax.transAxes, fontsize=12, color='#475569', va='center')
+        ax.text(0.06, 0.45, kpi_dict.get(chave_perc, ''), transform=ax.transAxes, fontsize=26, fontweight='bold', color=cor, va='center',
+                parse_math=False)
+        ax.text(0.06, 0.15, kpi_dict.get(chave_valores, ''), transform=ax.transAxes, fontsize=11, color='#64748B', va='center',
+                parse_math=False)
+
+    ax = fig.add_subplot(grade[1, :])
+    ax.set_facecolor('white')
+    meses = tendencia['labels']
+    for dataset in tendencia['datasets']:
+        ax.plot(meses, dataset['data'], label=dataset['label'], color=dataset.get('borderColor'), linewidth=2,
+                linestyle='--' if dataset.get('borderDash') else '-', marker='o', markersize=3)
+    ax.set_title("Tendência de Execução Mensal", loc='left', fontsize=13, fontweight='bold', color='#1E293B')
+    ax.set_ylim(bottom=0)
+    ax.yaxis.set_major_formatter(FuncFormatter(_formatar_eixo))
+    ax.grid(axis='y', color='#E2E8F0')
+    ax.tick_params(colors='#475569')
+    for lado in ('top', 'right'):
+        ax.spines[lado].set_visible(False)
+    ax.legend(loc='upper left', frameon=False, ncol=3)
+
+    destino = Path(destino)
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    fig.savefig(destino, facecolor=fig.get_facecolor())
+    return destino
+
+
+def _renderizar_previa_segura(kpi_dict: dict, tendencia: dict, destino: Path) -> Path | None:
+    try:
+        return renderizar_previa(kpi_dict, tendencia, destino)
+    except Exception as e:
+        logger.error(f"Falha ao gerar a prévia estática '{Path(destino).name}': {e}", exc_info=True)
+        return None
+
+
+def renderizar_previas(previas: dict[Path, tuple[dict, dict]], workers: int = 1) -> dict[Path, Path | None]:
+    """
+    Gera várias prévias (destino -> (kpi_dict, tendencia)), em série ou em um pool de processos.
+    Retorna destino -> caminho gerado, ou None para as que falharam.
+    """
+    if workers <= 1 or len(previas) <= 1:
+        return {destino: _renderizar_previa_segura(kpi, tendencia, destino) for destino, (kpi, tendencia) in previas.items()}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futuros = {destino: executor.submit(_renderizar_previa_segura, kpi, tendencia, destino) for destino, (kpi, tendencia) in previas.items()}
+        return {destino: futuro.result() for destino, futuro in futuros.items()}
@@ -0,0 +1,80 @@
+# visualizacao/renderizador_template.py
+import filecmp
+import hashlib
+import logging
+import os
+import re
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Placeholders no formato __NOME__, opcionalmente envoltos em comentário HTML (<!--__NOME__-->).
+PADRAO_PLACEHOLDER = re.compile(r'<!--(__[A-Z][A-Z0-9_]*__)-->|(__[A-Z][A-Z0-9_]*__)')
+
+_TEMPLATES_COMPILADOS: dict[Path, tuple[int, "TemplateCompilado"]] = {}
+
+
+class TemplateCompilado:
+    """
+    Template HTML dividido uma única vez em trechos literais e placeholders.
+
+    A renderização percorre os trechos em sequência e grava direto no arquivo de
+    saída, sem as cópias intermediárias do documento inteiro que cada `str.replace`
+    produzia.
+    """
+    def __init__(self, caminho: Path):
+        self.caminho = Path(caminho)
+        conteudo = self.caminho.read_text(encoding='utf-8')
+        self.sha256 = hashlib.sha256(conteudo.encode('utf-8')).hexdigest()
+
+        self._trechos: list[str] = []
+        self._chaves: list[str] = []
+        posicao = 0
+        for match in PADRAO_PLACEHOLDER.finditer(conteudo):
+            self._trechos.append(conteudo[posicao:match.start()])
+            self._chaves.append(match.group(1) or match.group(2))
+            posicao = match.end()
+        self._trechos.append(conteudo[posicao:])
+
+    @property
+    def placeholders(self) -> set[str]:
+        return set(self._chaves)
+
+    def renderizar_para_arquivo(self, valores: dict[str, object], destino: Path) -> bool:
+        """
+        Preenche todos os placeholders em uma única passada e grava em `destino`.
+        Lança ValueError se algum placeholder do template ficar sem valor.
+
+        Se o resultado for idêntico ao arquivo existente, o arquivo não é tocado (preserva
+        a data de modificação). Retorna True se o arquivo foi criado ou alterado.
+        """
+        faltantes = self.placeholders - valores.keys()
+        if faltantes:
+            raise ValueError(f"Placeholders sem valor no template '{self.caminho.name}': {', '.join(sorted(faltantes))}")
+
+        destino = Path(destino)
+        destino_tmp = destino.with_name(destino.name + '.tmp')
+        with open(destino_tmp, 'w', encoding='utf-8') as f:
+            for trecho, chave in zip(self._trechos, self._chaves):
+                f.write(trecho)
+                f.write(str(valores[chave]))
+            f.write(self._trechos[-1])
+        if destino.exists() and filecmp.cmp(destino_tmp, destino, shallow=False):
+            destino_tmp.unlink()
+            return False
+        os.replace(destino_tmp, destino)
+        return True
+
+
+def carregar_template(caminho: Path) -> TemplateCompilado:
+    """Retorna o template compilado, relendo o arquivo apenas se ele mudou desde a última compilação."""
+    caminho = Path(caminho).resolve()
+    mtime = caminho.stat().st_mtime_ns
+    em_cache = _TEMPLATES_COMPILADOS.get(caminho)
+    if em_cache and em_cache[0] == mtime:
+        return em_cache[1]
+
+    template = TemplateCompilado(caminho)
+    logger.debug("Template '%s' compilado com %d placeholders.", caminho.name, len(template.placeholders))
+    _TEMPLATES_COMPILADOS[caminho] = (mtime, template)
+    return template